@@ -0,0 +1,142 @@
+"""Script to answer a file of questions offline, e.g. for evaluation runs."""
+import sys
+import json
+import time
+import asyncio
+import argparse
+from dataclasses import asdict
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src import config
+from src.agent.core import CourseAgent
+
+
+def load_questions(input_path: Path) -> list[dict]:
+    """
+    Read questions from a file.
+
+    ``.jsonl`` files hold one JSON object per line with a "question" field;
+    any other fields (id, expected answer, ...) are copied to the output.
+    Other files hold one question per line.
+
+    Args:
+        input_path: Questions file
+
+    Returns:
+        List of records, each with a "question" key
+    """
+    records = []
+    with input_path.open(encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if input_path.suffix == ".jsonl":
+                record = json.loads(line)
+                if not str(record.get("question", "")).strip():
+                    raise ValueError(f"{input_path}:{line_number}: missing \"question\"")
+                records.append(record)
+            else:
+                records.append({"question": line})
+    return records
+
+
+async def answer_all(agent, records, output, use_web, subject, batch_size, concurrency):
+    """
+    Answer records batch by batch, writing one JSON line per question.
+
+    Returns:
+        Number of questions that failed
+    """
+    failed = 0
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        batch_start = time.time()
+        responses = await agent.aanswer_batch(
+            [r["question"] for r in batch],
+            use_web=use_web,
+            subject=subject,
+            concurrency=concurrency
+        )
+
+        for record, response in zip(batch, responses):
+            if isinstance(response, Exception):
+                failed += 1
+                result = {**record, "error": str(response)}
+            else:
+                result = {
+                    **record,
+                    "answer": response.answer,
+                    "course_citations": [asdict(c) for c in response.course_citations],
+                    "web_sources": response.web_sources,
+                    "used_web_search": response.used_web_search,
+                    "reasoning_steps": response.reasoning_steps
+                }
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        output.flush()
+
+        done = start + len(batch)
+        print(f"✅ {done}/{len(records)} questions ({time.time() - batch_start:.1f}s for this batch)")
+
+    return failed
+
+
+def parse_args():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Answer a file of questions with the course agent")
+    parser.add_argument("input", type=Path, help="Questions file (.jsonl with a \"question\" field, or one per line)")
+    parser.add_argument("-o", "--output", type=Path, default=None,
+                        help="Output JSONL file (default: <input>.answers.jsonl)")
+    parser.add_argument("--subject", default=None, help="Only search this subject")
+    parser.add_argument("--no-web", action="store_true", help="Never use web search")
+    parser.add_argument("--batch-size", type=int, default=config.BATCH_MAX_QUESTIONS,
+                        help=f"Questions per batch (default: {config.BATCH_MAX_QUESTIONS})")
+    parser.add_argument("--concurrency", type=int, default=config.BATCH_CONCURRENCY,
+                        help=f"Simultaneous LLM calls (default: {config.BATCH_CONCURRENCY})")
+    return parser.parse_args()
+
+
+def main():
+    """Main batch answering function."""
+    args = parse_args()
+    output_path = args.output or args.input.with_suffix(".answers.jsonl")
+
+    print("=" * 60)
+    print("Course AI Assistant - Batch Answering")
+    print("=" * 60)
+
+    records = load_questions(args.input)
+    if not records:
+        print(f"\n❌ No questions found in {args.input}")
+        return
+    print(f"\n📝 Loaded {len(records)} questions from {args.input}")
+
+    print("\n🤖 Initializing agent...")
+    agent = CourseAgent()
+
+    start = time.time()
+    with output_path.open("w", encoding="utf-8") as output:
+        failed = asyncio.run(answer_all(
+            agent, records, output,
+            use_web=not args.no_web,
+            subject=args.subject,
+            batch_size=max(1, args.batch_size),
+            concurrency=max(1, args.concurrency)
+        ))
+    elapsed = time.time() - start
+
+    print("\n" + "=" * 60)
+    print(f"✅ Answered {len(records) - failed}/{len(records)} questions in {elapsed:.1f}s "
+          f"({len(records) / elapsed:.2f} questions/s)")
+    if failed:
+        print(f"⚠️  {failed} questions failed; see the \"error\" field")
+    print(f"📄 Results written to {output_path}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
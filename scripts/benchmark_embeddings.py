@@ -0,0 +1,119 @@
+"""Script to compare embedding backends: startup, throughput, latency and parity."""
+import sys
+import time
+import argparse
+import itertools
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src import config
+from src.document_processor import PDFProcessor
+from src.embeddings import EmbeddingGenerator
+
+BACKENDS = {
+    "torch": ("torch", False),
+    "onnx": ("onnx", False),
+    "onnx-int8": ("onnx", True),
+}
+
+SAMPLE_TEXTS = [
+    "A Turing machine halts on some inputs and runs forever on others.",
+    "The halting problem is undecidable, which is proved by diagonalization.",
+    "Every regular language is recognized by a deterministic finite automaton.",
+    "NP-complete problems can be verified in polynomial time.",
+    "A graph is bipartite if and only if it contains no odd cycle.",
+    "Dijkstra's algorithm finds shortest paths when all edge weights are non-negative.",
+]
+
+
+def load_texts(pdf_dir: Path, limit: int) -> list[str]:
+    """Chunk texts from the course PDFs, or repeated sample sentences if there are none."""
+    processor = PDFProcessor(chunk_size=config.CHUNK_SIZE, chunk_overlap=config.CHUNK_OVERLAP)
+    texts = []
+    if pdf_dir.exists() and any(pdf_dir.rglob("*.pdf")):
+        texts = [chunk.text for chunk in itertools.islice(processor.iter_directory(pdf_dir), limit)]
+    if not texts:
+        texts = [SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)] + f" ({i})" for i in range(limit)]
+    return texts
+
+
+def startup_seconds(backend: str, quantize: bool) -> float:
+    """Time a cold start (imports and model load) in a fresh interpreter."""
+    code = (
+        "from src.embeddings import EmbeddingGenerator; "
+        f"EmbeddingGenerator(backend={backend!r}, quantize={quantize!r})"
+    )
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=project_root, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def benchmark(name: str, texts: list[str], queries: list[str]) -> dict:
+    """Measure one backend with the embedding cache disabled."""
+    backend, quantize = BACKENDS[name]
+    result = {"name": name, "startup": startup_seconds(backend, quantize)}
+
+    generator = EmbeddingGenerator(backend=backend, quantize=quantize)
+    generator.cache = None
+    generator.embed_batch_array(texts[:8], show_progress=False)  # Warm up
+
+    start = time.perf_counter()
+    result["embeddings"] = generator.embed_batch_array(texts, show_progress=False)
+    result["throughput"] = len(texts) / (time.perf_counter() - start)
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        generator.embed_text_array(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    result["p50"] = float(np.percentile(latencies, 50))
+    result["p95"] = float(np.percentile(latencies, 95))
+    return result
+
+
+def main():
+    """Main benchmark function."""
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends")
+    parser.add_argument("--backends", default=",".join(BACKENDS),
+                        help=f"Comma-separated backends to compare (default: {','.join(BACKENDS)})")
+    parser.add_argument("--chunks", type=int, default=512, help="Chunks to embed for throughput (default: 512)")
+    parser.add_argument("--queries", type=int, default=50, help="Single queries for latency (default: 50)")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.backends.split(",") if name.strip()]
+    unknown = [name for name in names if name not in BACKENDS]
+    if unknown:
+        parser.error(f"Unknown backends: {', '.join(unknown)}")
+
+    print("=" * 60)
+    print("Course AI Assistant - Embedding Backend Benchmark")
+    print("=" * 60)
+
+    texts = load_texts(config.PDF_DIR, args.chunks)
+    queries = [SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)] for i in range(args.queries)]
+    print(f"\n📝 {len(texts)} chunks, {len(queries)} queries, model {config.EMBEDDING_MODEL}")
+
+    results = []
+    for name in names:
+        print(f"\n⏱️  Benchmarking {name}...")
+        results.append(benchmark(name, texts, queries))
+
+    reference = results[0]["embeddings"]
+    print("\n" + "=" * 60)
+    print(f"{'backend':<11} {'startup':>8} {'chunks/s':>9} {'p50 ms':>7} {'p95 ms':>7}  cosine vs {results[0]['name']}")
+    for result in results:
+        # Embeddings are normalized, so the row-wise dot product is the cosine similarity
+        cosine = (result["embeddings"] * reference).sum(axis=1)
+        print(f"{result['name']:<11} {result['startup']:>7.1f}s {result['throughput']:>9.1f} "
+              f"{result['p50']:>7.2f} {result['p95']:>7.2f}  min {cosine.min():.4f} / mean {cosine.mean():.4f}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
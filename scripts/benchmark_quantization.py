@@ -0,0 +1,144 @@
+"""Script to compare vector representations: recall, latency and memory per chunk."""
+import gc
+import os
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import chromadb
+from chromadb.config import Settings
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src import config
+from src.numpy_index import NumpyCollection, distances_to
+from src.vector_store import VectorStore, chroma_batch_size, to_chroma
+from tune_index import load_vectors
+
+MODES = ("chroma", "numpy", "numpy-int8")
+
+
+def resident_bytes() -> int:
+    """Resident set size of this process (Linux), 0 where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def disk_bytes(directory: Path) -> int:
+    """Bytes allocated on disk by the files under a directory (unwritten, preallocated space excluded)."""
+    return sum(path.stat().st_blocks * 512 for path in directory.rglob("*") if path.is_file())
+
+
+def build(mode: str, directory: Path, vectors: np.ndarray, rescore: int):
+    """Build an index of the given kind; returns the collection to query and the process RSS before it was loaded."""
+    metadata = {
+        "hnsw:space": config.DISTANCE_METRIC, "hnsw:M": config.HNSW_M,
+        "hnsw:construction_ef": config.HNSW_EF_CONSTRUCTION, "hnsw:search_ef": config.HNSW_EF_SEARCH
+    }
+    ids = [str(i) for i in range(len(vectors))]
+    metadatas = [{'source': 'benchmark', 'subject': 'general'} for _ in ids]
+
+    if mode == "chroma":
+        # hnswlib keeps the graph and vectors in memory from the first addition on
+        baseline = resident_bytes()
+        client = chromadb.PersistentClient(path=str(directory), settings=Settings(anonymized_telemetry=False))
+        collection = client.create_collection("benchmark", metadata=metadata)
+        batch = chroma_batch_size(client)
+        for i in range(0, len(vectors), batch):
+            collection.add(ids=ids[i:i + batch], embeddings=to_chroma(vectors[i:i + batch]),
+                           metadatas=metadatas[i:i + batch])
+        return collection, baseline
+
+    if mode == "numpy-int8":
+        metadata["quantization"] = "int8"
+    writer = NumpyCollection(directory, "benchmark", metadata, rescore=rescore)
+    for i in range(0, len(vectors), 5000):
+        writer.upsert(ids[i:i + 5000], vectors[i:i + 5000], ids[i:i + 5000], metadatas[i:i + 5000])
+    # Unmap the pages the writer touched, then measure a reader opening the files as a server would
+    del writer
+    gc.collect()
+    baseline = resident_bytes()
+    return NumpyCollection(directory, "benchmark", rescore=rescore), baseline
+
+
+def measure(collection, queries: np.ndarray, truth: np.ndarray, k: int) -> dict:
+    """Recall@k and single-query latency."""
+    collection.query(query_embeddings=to_chroma(queries[:1]), n_results=k, include=[])  # Warm up
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = collection.query(query_embeddings=to_chroma(query[None, :]), n_results=k, include=[])['ids'][0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(set(int(i) for i in found) & set(expected.tolist()))
+    return {
+        "recall": hits / (len(queries) * k),
+        "p50": float(np.percentile(latencies, 50)),
+        "p95": float(np.percentile(latencies, 95))
+    }
+
+
+def main():
+    """Main benchmark function."""
+    parser = argparse.ArgumentParser(description="Benchmark float vs quantized vector indexes")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated modes (default: {','.join(MODES)})")
+    parser.add_argument("--sample", type=int, default=50000, help="Vectors to index (default: 50000)")
+    parser.add_argument("--queries", type=int, default=200, help="Held-out query vectors (default: 200)")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query for recall@k (default: 10)")
+    parser.add_argument("--rescore", type=int, default=config.QUANTIZATION_RESCORE,
+                        help=f"int8 candidates re-scored per result (default: {config.QUANTIZATION_RESCORE})")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.modes.split(",") if name.strip()]
+    unknown = [name for name in names if name not in MODES]
+    if unknown:
+        parser.error(f"Unknown modes: {', '.join(unknown)}")
+
+    print("=" * 60)
+    print("Course AI Assistant - Vector Quantization Benchmark")
+    print("=" * 60)
+
+    vectors = load_vectors(VectorStore(), args.sample + args.queries)
+    queries, vectors = vectors[:args.queries], vectors[args.queries:]
+    exact = distances_to(vectors, np.einsum("ij,ij->i", vectors, vectors), queries, config.DISTANCE_METRIC)
+    truth = np.argsort(exact, axis=0)[:args.k].T
+    print(f"\n📐 {len(vectors)} vectors of dimension {vectors.shape[1]}, {len(queries)} queries, "
+          f"{config.DISTANCE_METRIC} distance, recall@{args.k}")
+
+    results = []
+    for name in names:
+        print(f"\n⏱️  Benchmarking {name}...")
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            collection, before = build(name, Path(directory), vectors, args.rescore)
+            result = {"name": name, "build": time.perf_counter() - start}
+            result.update(measure(collection, queries, truth, args.k))
+            result["rss"] = max(resident_bytes() - before, 0) / len(vectors)
+            result["disk"] = disk_bytes(Path(directory))
+            results.append(result)
+            del collection
+            gc.collect()
+
+    baseline = results[0]["rss"]
+    print("\n" + "=" * 60)
+    print(f"{'mode':<11} {'build s':>8} {'recall':>7} {'p50 ms':>7} {'p95 ms':>7} {'RSS B/ch':>9} {'disk B/ch':>10} "
+          f"{'disk MB':>8}  chunks in RAM per {results[0]['name']}")
+    for result in results:
+        ratio = f"{baseline / result['rss']:.1f}x" if result['rss'] else "n/a"
+        print(f"{result['name']:<11} {result['build']:>8.1f} {result['recall']:>7.3f} {result['p50']:>7.2f} "
+              f"{result['p95']:>7.2f} {result['rss']:>9.0f} {result['disk'] / len(vectors):>10.0f} "
+              f"{result['disk'] / (1024 * 1024):>8.1f}  {ratio}")
+    print("=" * 60)
+    print("RSS B/ch: measured growth of this process's resident memory per chunk while the index was loaded and queried")
+    print("disk: bytes allocated by all index files; numpy-int8 keeps the float32 rows on disk for re-scoring")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 """Script to ingest PDF documents into the vector database."""
 import sys
+import argparse
 from pathlib import Path
 
 # Add project root to Python path
@@ -8,57 +9,104 @@ sys.path.insert(0, str(project_root))
 
 from src import config
 from src.document_processor import PDFProcessor
+from src.ingestion import (
+    plan_sync, remove_deleted, extract_in_parallel, index_update, IngestPipeline
+)
+from src.manifest import IngestManifest
 from src.embeddings import EmbeddingGenerator
 from src.vector_store import VectorStore
 from tqdm import tqdm
-import gc  # For garbage collection
 
 
-def process_in_batches(chunks, embedding_gen, vector_store, batch_size=50):
+def process_new_pdfs(new_pdfs, old_chunk_ids, vector_store, manifest, workers, pages_per_shard):
     """
-    Process chunks in batches to avoid memory issues.
+    Extract, embed and store new and changed PDFs.
 
     Args:
-        chunks: List of all chunks
-        embedding_gen: Embedding generator
-        vector_store: Vector store
-        batch_size: Number of chunks to process at once
+        new_pdfs: PDFs to process
+        old_chunk_ids: Chunk IDs of each PDF's previous version
+        vector_store: Vector store to write to (live or staged generation)
+        manifest: Manifest to record processed files in
+        workers: Number of processes for PDF extraction
+        pages_per_shard: Split large PDFs into page ranges of this size
     """
-    total_chunks = len(chunks)
-    num_batches = (total_chunks + batch_size - 1) // batch_size
+    # Step 4: Initialize models
+    print(f"\n{'='*60}")
+    print("⚙️  Step 3: Initializing models...")
+    print("=" * 60)
 
-    # Progress bar for overall batch processing
-    batch_pbar = tqdm(total=num_batches, desc="Processing batches", unit="batch", position=0)
+    processor = PDFProcessor(
+        chunk_size=config.CHUNK_SIZE,
+        chunk_overlap=config.CHUNK_OVERLAP
+    )
+    print("✓ Document processor ready")
+
+    embedding_gen = EmbeddingGenerator()
+    print("✓ Embedding generator ready")
+
+    # Step 5: Process each PDF
+    print(f"\n{'='*60}")
+    print(f"📚 Step 4: Processing {len(new_pdfs)} PDF(s)")
+    print("=" * 60)
 
-    # Progress bar for individual chunks
-    chunk_pbar = tqdm(total=total_chunks, desc="Generating embeddings", unit="chunk", position=1)
+    overall_pdf_progress = tqdm(total=len(new_pdfs), desc="Overall progress", unit="PDF", position=0)
+    chunk_progress = tqdm(desc="Embedding and storing", unit="chunk", position=1)
 
-    for i in range(0, total_chunks, batch_size):
-        batch_end = min(i + batch_size, total_chunks)
-        batch = chunks[i:batch_end]
+    if workers > 1:
+        print(f"⚡ Extracting with {workers} worker processes")
+        extracted = extract_in_parallel(new_pdfs, processor, workers, pages_per_shard)
+    else:
+        extracted = ((pdf_path, processor.iter_chunks(pdf_path)) for pdf_path in new_pdfs)
+
+    def documents():
+        for pdf_num, (pdf_path, chunks) in enumerate(extracted, 1):
+            print(f"\n📄 PDF {pdf_num}/{len(new_pdfs)}: {pdf_path.name}")
+            yield pdf_path, chunks, old_chunk_ids[pdf_path]
+
+    def document_stored(pdf_path, new_ids):
+        manifest.record(pdf_path, new_ids)
+        if new_ids:
+            print(f"\n✅ Completed: {pdf_path.name} ({len(new_ids)} chunks)")
+        else:
+            print(f"\n⚠️  No chunks created from {pdf_path.name}")
+        overall_pdf_progress.update(1)
 
-        # Generate embeddings for this batch
-        texts = [chunk.text for chunk in batch]
-        embeddings = embedding_gen.embed_batch(texts, show_progress=False)  # Disable inner progress
+    # Extraction, embedding and storage run as overlapping stages
+    pipeline = IngestPipeline(embedding_gen, vector_store)
+    pipeline.run(documents(), on_document=document_stored, on_batch=chunk_progress.update)
 
-        # Store this batch (with its own mini progress)
-        vector_store.add_chunks(batch, embeddings)
+    chunk_progress.close()
+    overall_pdf_progress.close()
 
-        # Update progress bars
-        batch_pbar.update(1)
-        chunk_pbar.update(len(batch))
+    print(f"\n⏱️  Pipeline stages:")
+    print(pipeline.report())
 
-        # Free memory
-        del texts
-        del embeddings
-        gc.collect()
 
-    batch_pbar.close()
-    chunk_pbar.close()
-    print()  # Clean line after progress bars
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Ingest PDF documents into the vector database")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=config.INGEST_WORKERS,
+        help="Number of processes for PDF extraction (1 = sequential)"
+    )
+    parser.add_argument(
+        "--pages-per-shard",
+        type=int,
+        default=config.PAGES_PER_SHARD,
+        help="Split large PDFs into page ranges of this size"
+    )
+    parser.add_argument(
+        "--staged",
+        action=argparse.BooleanOptionalAction,
+        default=config.INGEST_STAGED,
+        help="Build the update in a full copy of the index and publish it at once"
+    )
+    return parser.parse_args()
 
 
-def main():
+def main(workers: int = 1, pages_per_shard: int = config.PAGES_PER_SHARD, staged: bool = config.INGEST_STAGED):
     """Main ingestion pipeline."""
     print("=" * 60)
     print("Document Ingestion Pipeline - MEMORY EFFICIENT")
@@ -78,26 +126,21 @@ def main():
         file_size = pdf.stat().st_size / (1024 * 1024)  # Size in MB
         print(f"  📄 {pdf.name} ({file_size:.1f} MB)")
 
-    # Step 2: Check what's already processed
+    # Step 2: Compare with what's already processed
     print(f"\n📊 Step 2: Checking vector database...")
     vector_store = VectorStore()
-    processed_sources = vector_store.get_processed_sources()
+    manifest = IngestManifest(vector_store.data_dir / "manifest.sqlite3", config.PDF_DIR)
+    diff = plan_sync(pdf_files, vector_store, manifest)
 
-    if processed_sources:
-        print(f"✓ Already processed: {len(processed_sources)} documents")
-        for source in processed_sources:
-            print(f"    - {source}")
-    else:
-        print("✓ Database is empty - ready for new documents")
+    print(f"✓ Unchanged: {len(diff.unchanged)}  New: {len(diff.added)}  "
+          f"Changed: {len(diff.changed)}  Removed: {len(diff.removed)}")
 
-    # Step 3: Find new PDFs
-    new_pdfs = [pdf for pdf in pdf_files if pdf.name not in processed_sources]
+    new_pdfs = diff.added + diff.changed
+    old_chunk_ids = {pdf: (manifest.get(pdf).chunk_ids if pdf in diff.changed else []) for pdf in new_pdfs}
 
-    if not new_pdfs:
-        print(f"\n✅ All PDFs already processed!")
-        print(f"\nOptions:")
-        print(f"  1. Add new PDFs to data/pdfs/")
-        print(f"  2. To reprocess, delete data/vectordb/ and run again")
+    if not new_pdfs and not diff.removed:
+        print(f"\n✅ All PDFs up to date!")
+        print(f"\nAdd or edit PDFs in data/pdfs/ and run again to sync changes")
 
         # Show stats
         stats = vector_store.get_stats()
@@ -106,75 +149,34 @@ def main():
         print(f"  Documents: {', '.join(stats['sources'])}")
         return
 
-    print(f"\n📥 New PDFs to process: {len(new_pdfs)}")
-    for pdf in new_pdfs:
-        print(f"  📄 {pdf.name}")
-
-    # Auto-confirm if running non-interactively, otherwise ask
-    print(f"\n{'='*60}")
-    import sys
-    if sys.stdin.isatty():
-        response = input("Process these new files? (y/n): ").strip().lower()
-        if response != 'y':
-            print("Cancelled.")
-            return
-    else:
-        print("Auto-confirming (non-interactive mode)...")
-        print("Processing files...")
-
-    # Step 4: Initialize models
-    print(f"\n{'='*60}")
-    print("⚙️  Step 3: Initializing models...")
-    print("=" * 60)
-
-    processor = PDFProcessor(
-        chunk_size=config.CHUNK_SIZE,
-        chunk_overlap=config.CHUNK_OVERLAP
-    )
-    print("✓ Document processor ready")
-
-    embedding_gen = EmbeddingGenerator()
-    print("✓ Embedding generator ready")
-
-    # Step 5: Process each PDF
-    print(f"\n{'='*60}")
-    print(f"📚 Step 4: Processing {len(new_pdfs)} PDF(s)")
-    print("=" * 60)
-
-    overall_pdf_progress = tqdm(total=len(new_pdfs), desc="Overall progress", unit="PDF", position=0)
-
-    for pdf_num, pdf_path in enumerate(new_pdfs, 1):
-        print(f"\n{'─'*60}")
-        print(f"📄 PDF {pdf_num}/{len(new_pdfs)}: {pdf_path.name}")
-        print(f"{'─'*60}")
-
-        # Extract and chunk
-        chunks = processor.process_pdf(pdf_path)
-
-        if not chunks:
-            print(f"⚠️  No chunks created from {pdf_path.name}")
-            overall_pdf_progress.update(1)
-            continue
-
-        print(f"✓ Generated {len(chunks)} chunks")
-
-        # Process in batches
-        print(f"\n🔄 Generating embeddings and storing...")
-        process_in_batches(
-            chunks=chunks,
-            embedding_gen=embedding_gen,
-            vector_store=vector_store,
-            batch_size=50
-        )
-
-        # Free memory
-        del chunks
-        gc.collect()
-
-        print(f"✅ Completed: {pdf_path.name}")
-        overall_pdf_progress.update(1)
-
-    overall_pdf_progress.close()
+    if new_pdfs:
+        print(f"\n📥 PDFs to process: {len(new_pdfs)}")
+        for pdf in diff.added:
+            print(f"  📄 {manifest.key(pdf)} (new)")
+        for pdf in diff.changed:
+            print(f"  📝 {manifest.key(pdf)} (changed)")
+
+        # Auto-confirm if running non-interactively, otherwise ask
+        print(f"\n{'='*60}")
+        if sys.stdin.isatty():
+            response = input("Process these new files? (y/n): ").strip().lower()
+            if response != 'y':
+                print("Cancelled.")
+                return
+        else:
+            print("Auto-confirming (non-interactive mode)...")
+            print("Processing files...")
+
+    # Small changes are applied to the live index; with --staged they go into a
+    # full copy that a running API switches to when it is published
+    with index_update(vector_store, manifest, staged) as (target, pending):
+        # Step 3: Drop removed PDFs
+        for entry in diff.removed:
+            print(f"  🗑️  Removing {entry.path}")
+        remove_deleted(diff, target, pending, config.PDF_DIR)
+
+        if new_pdfs:
+            process_new_pdfs(new_pdfs, old_chunk_ids, target, pending, workers, pages_per_shard)
 
     print(f"\n{'='*60}")
     print("🎉 All PDFs Processed!")
@@ -201,5 +203,6 @@ def main():
 
 
 if __name__ == "__main__":
+    args = parse_args()
     config.validate_config()
-    main()
\ No newline at end of file
+    main(workers=args.workers, pages_per_shard=args.pages_per_shard, staged=args.staged)
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""Script to export the vector database to a snapshot bundle, or load one on a new node."""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src import config
+from src.manifest import IngestManifest
+from src.snapshot import export_snapshot, import_snapshot
+from src.vector_store import VectorStore
+
+
+def main():
+    """Main snapshot function."""
+    parser = argparse.ArgumentParser(description="Export or import a vector database snapshot")
+    parser.add_argument("action", choices=["export", "import"], help="Write a snapshot, or load one")
+    parser.add_argument("path", type=Path, help="Snapshot directory")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Course AI Assistant - Index Snapshot")
+    print("=" * 60)
+
+    vector_store = VectorStore()
+    manifest = IngestManifest(vector_store.data_dir / "manifest.sqlite3", config.PDF_DIR)
+
+    start = time.perf_counter()
+    if args.action == "export":
+        print(f"\n📦 Exporting generation {vector_store.generation} to {args.path}...")
+        info = export_snapshot(vector_store, manifest, args.path)
+    else:
+        print(f"\n📥 Loading snapshot {args.path}...")
+        info = import_snapshot(vector_store, manifest, args.path)
+
+    size = sum(f.stat().st_size for f in args.path.iterdir()) / (1024 * 1024)
+    print(f"\n✅ {args.action.capitalize()}ed {info['chunks']} chunks ({info['dimension']}-d, "
+          f"{info['embedding_model']}) in {time.perf_counter() - start:.1f}s; bundle {size:.1f} MB")
+    if args.action == "import":
+        print(f"  Serving generation {vector_store.generation} (catalog version {vector_store.get_version()})")
+
+
+if __name__ == "__main__":
+    main()
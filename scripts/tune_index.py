@@ -0,0 +1,134 @@
+"""Script to pick HNSW parameters: recall vs latency sweep, and index rebuild."""
+import sys
+import time
+import argparse
+import itertools
+from pathlib import Path
+
+import numpy as np
+import chromadb
+from chromadb.config import Settings
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src import config
+from src.numpy_index import distances_to
+from src.vector_store import VectorStore, as_embedding_array, chroma_batch_size, normalize_rows, to_chroma
+
+
+def parse_ints(text: str) -> list[int]:
+    """Parse a comma-separated list of integers."""
+    return [int(value) for value in text.split(",") if value.strip()]
+
+
+def load_vectors(store: VectorStore, limit: int) -> np.ndarray:
+    """Up to ``limit`` stored embeddings, or random unit vectors if the index is too small."""
+    pages = []
+    offset, page_size = 0, 5000
+    while offset < limit:
+        page = store.collection.get(include=["embeddings"], limit=min(page_size, limit - offset), offset=offset)
+        if not page['ids']:
+            break
+        pages.append(as_embedding_array(page['embeddings']))
+        offset += len(page['ids'])
+
+    if offset < limit:
+        dimension = pages[0].shape[1] if pages else 384
+        print(f"⚠️  Index holds {offset} chunks; adding {limit - offset} random vectors")
+        pages.append(np.random.default_rng(0).normal(size=(limit - offset, dimension)).astype(np.float32))
+    return normalize_rows(np.concatenate(pages))
+
+
+def sweep_one(client, vectors, queries, truth, k, metric, m, ef_construction, ef_search) -> dict:
+    """Build one index with the given parameters and measure it."""
+    name = f"tune_m{m}_efc{ef_construction}_efs{ef_search}"
+    collection = client.create_collection(name=name, metadata={
+        "hnsw:space": metric, "hnsw:M": m, "hnsw:construction_ef": ef_construction, "hnsw:search_ef": ef_search
+    })
+    try:
+        start = time.perf_counter()
+        batch = chroma_batch_size(client)
+        for i in range(0, len(vectors), batch):
+            collection.add(
+                ids=[str(j) for j in range(i, min(i + batch, len(vectors)))], embeddings=to_chroma(vectors[i:i + batch])
+            )
+        build = time.perf_counter() - start
+
+        latencies, hits = [], 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            found = collection.query(query_embeddings=to_chroma(query[None, :]), n_results=k, include=[])['ids'][0]
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len(set(int(i) for i in found) & set(expected.tolist()))
+    finally:
+        client.delete_collection(name)
+
+    return {
+        "M": m, "ef_construction": ef_construction, "ef_search": ef_search, "build": build,
+        "recall": hits / (len(queries) * k),
+        "p50": float(np.percentile(latencies, 50)), "p95": float(np.percentile(latencies, 95))
+    }
+
+
+def main():
+    """Main tuning function."""
+    parser = argparse.ArgumentParser(description="Sweep HNSW parameters for recall vs latency")
+    parser.add_argument("--sample", type=int, default=20000, help="Vectors to index (default: 20000)")
+    parser.add_argument("--queries", type=int, default=200, help="Held-out query vectors (default: 200)")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query for recall@k (default: 10)")
+    parser.add_argument("--m", default="8,16,32", help="HNSW M values (default: 8,16,32)")
+    parser.add_argument("--ef-construction", default="100,200", help="ef_construction values (default: 100,200)")
+    parser.add_argument("--ef-search", default="16,32,64,128", help="ef_search values (default: 16,32,64,128)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Skip the sweep; rebuild the live index with the configured metric and HNSW settings")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Course AI Assistant - Index Tuning")
+    print("=" * 60)
+
+    store = VectorStore()
+    if args.rebuild:
+        print(f"\n🔧 Rebuilding with {config.DISTANCE_METRIC} distance, M={config.HNSW_M}, "
+              f"ef_construction={config.HNSW_EF_CONSTRUCTION}, ef_search={config.HNSW_EF_SEARCH}")
+        staged = store.stage_generation(copy_current=True)
+        store.publish(staged)
+        return
+
+    vectors = load_vectors(store, args.sample + args.queries)
+    # Queries are stored chunks left out of the index, so none finds itself
+    queries, vectors = vectors[:args.queries], vectors[args.queries:]
+    norms = np.einsum("ij,ij->i", vectors, vectors)
+    exact = distances_to(vectors, norms, queries, config.DISTANCE_METRIC)
+    truth = np.argsort(exact, axis=0)[:args.k].T
+    print(f"\n📐 {len(vectors)} vectors, {len(queries)} queries, {config.DISTANCE_METRIC} distance, recall@{args.k}")
+
+    client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+    results = []
+    grid = list(itertools.product(parse_ints(args.m), parse_ints(args.ef_construction), parse_ints(args.ef_search)))
+    for m, ef_construction, ef_search in grid:
+        print(f"⏱️  M={m} ef_construction={ef_construction} ef_search={ef_search}...")
+        results.append(sweep_one(client, vectors, queries, truth, args.k, config.DISTANCE_METRIC,
+                                 m, ef_construction, ef_search))
+
+    print("\n" + "=" * 60)
+    print(f"{'M':>4} {'ef_con':>7} {'ef_sea':>7} {'build s':>8} {'recall':>7} {'p50 ms':>7} {'p95 ms':>7}")
+    for result in results:
+        print(f"{result['M']:>4} {result['ef_construction']:>7} {result['ef_search']:>7} {result['build']:>8.1f} "
+              f"{result['recall']:>7.3f} {result['p50']:>7.2f} {result['p95']:>7.2f}")
+    print("=" * 60)
+
+    good = [r for r in results if r['recall'] >= 0.98]
+    if good:
+        best = min(good, key=lambda r: r['p95'])
+        print(f"\n💡 Fastest with recall ≥ 0.98: HNSW_M={best['M']} HNSW_EF_CONSTRUCTION={best['ef_construction']} "
+              f"HNSW_EF_SEARCH={best['ef_search']}")
+        print("   Set these in .env, then run: python scripts/tune_index.py --rebuild")
+    else:
+        print("\n⚠️  No setting reached recall 0.98; try larger --ef-search or --m values")
+
+
+if __name__ == "__main__":
+    main()
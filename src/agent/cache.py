@@ -0,0 +1,149 @@
+"""In-memory caches used by the agent for repeated questions."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Tuple, Union
+
+import numpy as np
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so trivially different queries match."""
+    return " ".join(query.lower().split())
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache."""
+
+    def __init__(self, max_size: int):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of entries (0 disables the cache)
+        """
+        self.max_size = max_size
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None."""
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class AnswerCache:
+    """
+    Cache of final answers with near-duplicate lookup.
+
+    Answers are grouped by scope (subject, web search setting, index
+    version). Within a scope a query matches either exactly, after
+    normalization, or by cosine similarity of its embedding to a cached
+    query above ``similarity``.
+    """
+
+    def __init__(self, max_size: int, similarity: float, ttl: float):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of cached answers (0 disables the cache)
+            similarity: Minimum cosine similarity for a near-duplicate hit
+            ttl: Seconds an answer stays valid
+        """
+        self.max_size = max_size
+        self.similarity = similarity
+        self.ttl = ttl
+        # (scope, normalized query) -> (unit embedding, answer, created)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, scope: Tuple, query: str, embedding: Union[np.ndarray, List[float]]) -> Optional[Any]:
+        """
+        Find a cached answer for the query.
+
+        Args:
+            scope: Tuple identifying subject, web setting and index version
+            query: The question
+            embedding: The question's embedding
+
+        Returns:
+            Cached answer or None
+        """
+        key = (scope, normalize_query(query))
+        now = time.time()
+
+        with self._lock:
+            self._expire(now)
+
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][1]
+
+            candidates = [(k, entry) for k, entry in self._entries.items() if k[0] == scope]
+            if not candidates:
+                return None
+
+            query_vec = self._unit(embedding)
+            matrix = np.stack([entry[0] for _, entry in candidates])
+            scores = matrix @ query_vec
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity:
+                return None
+
+            best_key = candidates[best][0]
+            self._entries.move_to_end(best_key)
+            return self._entries[best_key][1]
+
+    def put(self, scope: Tuple, query: str, embedding: Union[np.ndarray, List[float]], answer: Any) -> None:
+        """Store an answer."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            key = (scope, normalize_query(query))
+            self._entries[key] = (self._unit(embedding), answer, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _expire(self, now: float) -> None:
+        """Drop entries older than the TTL."""
+        expired = [k for k, entry in self._entries.items() if now - entry[2] > self.ttl]
+        for k in expired:
+            del self._entries[k]
+
+    @staticmethod
+    def _unit(embedding: Union[np.ndarray, List[float]]) -> np.ndarray:
+        """Embedding as a unit-length float32 vector."""
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,195 @@
+"""Assembly of the sources placed in the LLM prompt, within a token budget."""
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+MIN_OVERLAP = 30  # Characters two chunks must share to be merged
+COURSE_HEADER = "COURSE MATERIALS:\n"
+WEB_HEADER = "\nWEB SEARCH RESULTS:\n"
+
+
+@dataclass
+class Passage:
+    """Course text placed in the prompt: one chunk, or overlapping chunks merged."""
+    source: str
+    first_page: int
+    last_page: int
+    text: str
+    relevance: float
+    number: int = 1  # 1-based position of its best citation in the retrieved list
+
+    @property
+    def pages(self) -> str:
+        """Page label, e.g. "4" or "4-5"."""
+        if self.first_page == self.last_page:
+            return str(self.first_page)
+        return f"{self.first_page}-{self.last_page}"
+
+
+@dataclass
+class PromptContext:
+    """The assembled sources and what it took to fit them."""
+    text: str
+    tokens: int  # Tokens used by the sources
+    budget: int  # Tokens available for the sources
+    passages: List[Passage] = field(default_factory=list)
+    web_results: List[Dict[str, str]] = field(default_factory=list)
+    merged: int = 0  # Chunks folded into an overlapping neighbour
+    dropped: int = 0  # Sources left out for lack of room
+    prompt_tokens: int = 0  # Whole prompt, set by the agent
+
+    def summary(self) -> str:
+        """One-line description for the reasoning steps."""
+        line = (f"🧮 Prompt: {self.prompt_tokens:,} tokens; sources use {self.tokens:,} of {self.budget:,} "
+                f"({len(self.passages)} course passages, {len(self.web_results)} web results)")
+        notes = []
+        if self.merged:
+            notes.append(f"merged {self.merged} overlapping chunks")
+        if self.dropped:
+            notes.append(f"left out {self.dropped} sources over budget")
+        return f"{line}; {', '.join(notes)}" if notes else line
+
+
+def merge_overlap(first: str, second: str, min_overlap: int = MIN_OVERLAP) -> Optional[str]:
+    """
+    Join two chunks if the second continues where the first ends.
+
+    Args:
+        first: Earlier chunk text
+        second: Later chunk text
+        min_overlap: Minimum shared characters
+
+    Returns:
+        The combined text without the repeated part, or None if they don't overlap
+    """
+    if second in first:
+        return first
+    if first in second:
+        return second
+
+    probe = second[:min_overlap]
+    if len(probe) < min_overlap:
+        return None
+    start = first.find(probe)
+    while start != -1:
+        if second.startswith(first[start:]):
+            return first + second[len(first) - start:]
+        start = first.find(probe, start + 1)
+    return None
+
+
+def merge_passages(citations) -> tuple[List[Passage], int]:
+    """
+    Turn citations into passages, merging chunks that overlap.
+
+    Chunk overlap repeats text between neighbouring chunks of a page, so
+    neighbours retrieved together would otherwise put it in the prompt twice.
+    Each passage keeps the number of its best citation, so [Source N] in
+    the prompt is the Nth citation returned to the user.
+
+    Args:
+        citations: Citations (source, page, text, relevance), best first
+
+    Returns:
+        (passages best first, number of citations merged into another)
+    """
+    passages: List[Passage] = []
+    merged = 0
+    for number, citation in enumerate(citations, 1):
+        for passage in passages:
+            if passage.source != citation.source:
+                continue
+            if citation.page < passage.first_page - 1 or citation.page > passage.last_page + 1:
+                continue
+            joined = merge_overlap(passage.text, citation.text) or merge_overlap(citation.text, passage.text)
+            if joined is not None:
+                passage.text = joined
+                passage.first_page = min(passage.first_page, citation.page)
+                passage.last_page = max(passage.last_page, citation.page)
+                merged += 1
+                break
+        else:
+            passages.append(Passage(
+                source=citation.source,
+                first_page=citation.page,
+                last_page=citation.page,
+                text=citation.text,
+                relevance=citation.relevance,
+                number=number
+            ))
+    return passages, merged
+
+
+def passage_block(passage: Passage, number: int, text: Optional[str] = None) -> str:
+    """Prompt text for one numbered course passage."""
+    return f"[Source {number}: {passage.source}, Page {passage.pages}]\n{passage.text if text is None else text}\n"
+
+
+def truncate_to_tokens(text: str, max_tokens: int, count_tokens: Callable[[str], int]) -> str:
+    """Shorten text at a word boundary until it fits in max_tokens."""
+    if max_tokens <= 0:
+        return ""
+    while text and count_tokens(text) > max_tokens:
+        keep = int(len(text) * max_tokens / count_tokens(text) * 0.95)
+        text = text[:keep].rsplit(" ", 1)[0] if keep > 0 else ""
+    return text
+
+
+def build_context(
+        citations,
+        web_results: List[Dict[str, str]],
+        budget: int,
+        count_tokens: Callable[[str], int]
+) -> PromptContext:
+    """
+    Pack course passages, then web results, into a token budget.
+
+    Course passages go in ranking order (the retriever's, which for hybrid
+    search is the fused rank) and come before any web result.
+    Sources that do not fit are skipped so that smaller, less relevant ones
+    can still be used; if not even the best passage fits, it is truncated.
+    Sources are numbered by their position in the lists passed in (which
+    are what the user is shown), not by what made it into the prompt.
+
+    Args:
+        citations: Course citations (source, page, text, relevance), best first
+        web_results: Web search results with title and snippet
+        budget: Maximum tokens for the assembled sources
+        count_tokens: Token counter for the target model
+
+    Returns:
+        PromptContext
+    """
+    passages, merged = merge_passages(citations)
+    context = PromptContext(text="", tokens=0, budget=budget, merged=merged)
+    parts: List[str] = []
+
+    if passages:
+        overhead = count_tokens(COURSE_HEADER) + count_tokens(passage_block(passages[0], passages[0].number, text=""))
+        passages[0].text = truncate_to_tokens(passages[0].text, budget - overhead, count_tokens)
+
+    for passage in passages:
+        block = passage_block(passage, passage.number)
+        cost = count_tokens(block) + (0 if context.passages else count_tokens(COURSE_HEADER))
+        if not passage.text or context.tokens + cost > budget:
+            context.dropped += 1
+            continue
+        if not context.passages:
+            parts.append(COURSE_HEADER)
+        parts.append(block)
+        context.passages.append(passage)
+        context.tokens += cost
+
+    for number, result in enumerate(web_results, 1):
+        block = f"[Web Source {number}: {result['title']}]\n{result['snippet']}\n"
+        cost = count_tokens(block) + (0 if context.web_results else count_tokens(WEB_HEADER))
+        if context.tokens + cost > budget:
+            context.dropped += 1
+            continue
+        if not context.web_results:
+            parts.append(WEB_HEADER)
+        parts.append(block)
+        context.web_results.append(result)
+        context.tokens += cost
+
+    context.text = "\n".join(parts)
+    return context
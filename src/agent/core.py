@@ -1,20 +1,118 @@
 """Core agent with RAG, reasoning, and web search."""
 import sys
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, AsyncIterator, Union
+from dataclasses import dataclass, asdict, replace
+import numpy as np
 
 # Add project root to path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from src import config
-from src.vector_store import VectorStore
+from src.vector_store import VectorStore, select_results
 from src.embeddings import EmbeddingGenerator
+from src.agent.cache import LRUCache, AnswerCache, normalize_query
+from src.agent.context import PromptContext, build_context
+from src.agent.rerank import CrossEncoderReranker
+from src.token_counter import load_token_counter
 from langchain_ollama import OllamaLLM
 from duckduckgo_search import DDGS
 
 
+PROMPT_TEMPLATE = """You are a helpful course assistant. Answer the question using the provided sources.
+
+IMPORTANT INSTRUCTIONS:
+- Base your answer primarily on the COURSE MATERIALS
+- Use WEB SEARCH RESULTS only for additional context or current information
+- ALWAYS cite your sources using [Source X, Page Y] format for course materials
+- Be clear when information comes from web vs course materials
+- If the course materials don't contain the answer, say so explicitly
+- Explain concepts clearly and thoroughly
+
+CONTEXT:
+{context}
+
+QUESTION: {query}
+
+ANSWER (with citations):"""
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[str]:
+    """
+    Merge ranked ID lists with reciprocal rank fusion.
+
+    Each ID scores sum(1 / (k + rank)) over the lists it appears in.
+
+    Args:
+        rankings: Ranked lists of IDs, best first
+        k: Damping constant; larger values flatten the rank weighting
+
+    Returns:
+        IDs ordered by fused score
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def maximal_marginal_relevance(
+        query_embedding: np.ndarray,
+        embeddings: np.ndarray,
+        k: int,
+        lambda_mult: float = 0.7,
+        relevance: Optional[np.ndarray] = None
+) -> List[int]:
+    """
+    Pick k relevant but mutually different candidates.
+
+    Each step takes the candidate with the highest
+    ``lambda_mult * relevance - (1 - lambda_mult) * max similarity to those already picked``.
+    Similarities are computed once as one matrix product.
+
+    Args:
+        query_embedding: Query vector
+        embeddings: Candidate vectors, shape (n, dimension)
+        k: Number of candidates to pick
+        lambda_mult: 1.0 ranks by relevance only, 0.0 by diversity only
+        relevance: Relevance per candidate on any scale, e.g. re-ranking
+            scores; min-max scaled to [0, 1] so it weighs against the cosine
+            redundancy term (default: cosine similarity to the query)
+
+    Returns:
+        Indices of the picked candidates, in pick order
+    """
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    if len(vectors) == 0 or k <= 0:
+        return []
+    vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+    if relevance is None:
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        relevance = vectors @ (query / max(float(np.linalg.norm(query)), 1e-12))
+    else:
+        relevance = np.asarray(relevance, dtype=np.float32)
+        spread = float(relevance.max() - relevance.min())
+        relevance = (relevance - relevance.min()) / spread if spread > 0 else np.ones_like(relevance)
+    relevance = np.asarray(relevance, dtype=np.float32)
+    similarity = vectors @ vectors.T
+
+    picked: List[int] = []
+    redundancy = np.zeros(len(vectors), dtype=np.float32)
+    available = np.ones(len(vectors), dtype=bool)
+    for _ in range(min(k, len(vectors))):
+        scores = np.where(available, lambda_mult * relevance - (1 - lambda_mult) * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        redundancy = similarity[best] if not picked else np.maximum(redundancy, similarity[best])
+        picked.append(best)
+        available[best] = False
+    return picked
+
+
 @dataclass
 class Citation:
     """Represents a citation from a source."""
@@ -46,8 +144,34 @@ class CourseAgent:
         self.embedding_gen = EmbeddingGenerator()
         self.llm = OllamaLLM(
             model=config.MODEL_NAME,
-            temperature=config.TEMPERATURE
+            temperature=config.TEMPERATURE,
+            num_ctx=config.MAX_TOKENS
+        )
+        self.count_tokens = load_token_counter(config.LLM_TOKENIZER)
+
+        # Dedicated pool for CPU-bound query embedding in the async path
+        self.embed_pool = ThreadPoolExecutor(
+            max_workers=config.EMBEDDING_WORKERS,
+            thread_name_prefix="embed"
+        )
+
+        # Caches for repeated questions; retrieval and answers depend on the index version
+        cache_size = config.QUERY_CACHE_SIZE if config.CACHE_ENABLED else 0
+        self.query_embedding_cache = LRUCache(cache_size)
+        self.retrieval_cache = LRUCache(cache_size)
+        self.answer_cache = AnswerCache(
+            config.ANSWER_CACHE_SIZE if config.CACHE_ENABLED else 0,
+            similarity=config.ANSWER_CACHE_SIMILARITY,
+            ttl=config.ANSWER_CACHE_TTL
         )
+        self._index_version = self.vector_store.get_version()
+
+        # Optional cross-encoder pass over a wider candidate set
+        self.reranker = None
+        if config.RERANK_ENABLED:
+            self.reranker = CrossEncoderReranker()
+            self.reranker.model  # Load now so the first request's budget isn't spent on it
+            print(f"✓ Re-ranking top {config.RERANK_CANDIDATES} with {self.reranker.model_name}")
 
         # Check database
         stats = self.vector_store.get_stats()
@@ -70,25 +194,277 @@ class CourseAgent:
         Returns:
             List of citations (filtered by relevance threshold)
         """
-        # Build metadata filter if subject is specified
-        filter_metadata = None
-        if subject and subject != "all":
-            filter_metadata = {"subject": subject}
+        return self._retrieve(query, self.embed_query(query), n_results, subject)
+
+    async def aretrieve_from_course(self, query: str, n_results: int = 5, subject: Optional[str] = None) -> List[Citation]:
+        """
+        Async version of retrieve_from_course that keeps the event loop free.
+
+        Embedding runs on the dedicated embedding pool, the Chroma query on
+        the default executor.
+
+        Args:
+            query: User's question
+            n_results: Number of results to retrieve
+            subject: Optional subject filter
+
+        Returns:
+            List of citations (filtered by relevance threshold)
+        """
+        loop = asyncio.get_running_loop()
+        query_embedding = await loop.run_in_executor(self.embed_pool, self.embed_query, query)
+        return await asyncio.to_thread(self._retrieve, query, query_embedding, n_results, subject)
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embed a query, reusing the embedding of an identical earlier query."""
+        key = normalize_query(query)
+        embedding = self.query_embedding_cache.get(key)
+        if embedding is None:
+            embedding = self.embedding_gen.embed_text_array(query)
+            self.query_embedding_cache.put(key, embedding)
+        return embedding
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Embed several queries, encoding all uncached ones in a single call.
+
+        Args:
+            queries: Queries to embed
+
+        Returns:
+            float32 array of shape (len(queries), dimension)
+        """
+        keys = [normalize_query(q) for q in queries]
+        embeddings = np.empty((len(queries), self.embedding_gen.dimension), dtype=np.float32)
+
+        missing = {}  # normalized query -> first original query
+        for i, key in enumerate(keys):
+            cached = self.query_embedding_cache.get(key)
+            if cached is None:
+                missing.setdefault(key, queries[i])
+            else:
+                embeddings[i] = cached
+
+        if missing:
+            encoded = self.embedding_gen.embed_batch_array(list(missing.values()), show_progress=False)
+            rows = dict(zip(missing, encoded))
+            for key, row in rows.items():
+                self.query_embedding_cache.put(key, row)
+            for i, key in enumerate(keys):
+                if key in rows:
+                    embeddings[i] = rows[key]
+
+        return embeddings
+
+    def retrieve_batch(
+            self,
+            queries: List[str],
+            n_results: int = 5,
+            subject: Optional[str] = None,
+            embeddings: Optional[np.ndarray] = None
+    ) -> List[List[Citation]]:
+        """
+        Retrieve citations for several queries with one embedding call and one Chroma query.
 
-        results = self.vector_store.search(
-            query=query,
-            embedding_generator=self.embedding_gen,
-            n_results=n_results,
-            filter_metadata=filter_metadata
+        Args:
+            queries: User questions
+            n_results: Number of results per question
+            subject: Optional subject filter shared by all questions
+            embeddings: Query embeddings already computed by the caller, one
+                row per query (default: embed the queries)
+
+        Returns:
+            Citations for each query, in order
+        """
+        if embeddings is None:
+            embeddings = self.embed_queries(queries)
+        version = self.current_index_version()
+        keys = [(normalize_query(q), n_results, subject or "all", version) for q in queries]
+        citations = [self.retrieval_cache.get(key) for key in keys]
+
+        missing = [i for i, c in enumerate(citations) if c is None]
+        if missing:
+            store = self.vector_store.pin()  # Finish on this generation even if a new one is published
+            width = self._candidate_count(n_results)
+            dense_results = store.search_batch(
+                embeddings[missing],
+                max(width, config.HYBRID_CANDIDATES) if config.HYBRID_SEARCH else width,
+                self._subject_filter(subject),
+                include_embeddings=config.MMR_ENABLED
+            )
+
+            for i, dense in zip(missing, dense_results):
+                results, complete = self._search(queries[i], embeddings[i], n_results, subject, store, dense=dense)
+                citations[i] = self._citations_from_results(results, store)
+                if complete:
+                    self.retrieval_cache.put(keys[i], citations[i])
+
+        return [list(c) for c in citations]
+
+    def current_index_version(self) -> int:
+        """Return the index version, dropping version-dependent caches if it changed."""
+        version = self.vector_store.get_version()
+        if version != self._index_version:
+            self._index_version = version
+            self.retrieval_cache.clear()
+            self.answer_cache.clear()
+            if self.reranker is not None:
+                self.reranker.clear()
+        return version
+
+    def _retrieve(
+            self,
+            query: str,
+            query_embedding: np.ndarray,
+            n_results: int,
+            subject: Optional[str]
+    ) -> List[Citation]:
+        """Search the vector store, reusing results for repeated queries."""
+        key = (normalize_query(query), n_results, subject or "all", self.current_index_version())
+        citations = self.retrieval_cache.get(key)
+
+        if citations is None:
+            store = self.vector_store.pin()  # Finish on this generation even if a new one is published
+            results, complete = self._search(query, query_embedding, n_results, subject, store)
+            citations = self._citations_from_results(results, store)
+            if complete:
+                self.retrieval_cache.put(key, citations)
+
+        return list(citations)
+
+    def _candidate_count(self, n_results: int) -> int:
+        """Results to retrieve before re-ranking and diversification cut them down to n_results."""
+        width = n_results
+        if self.reranker is not None:
+            width = max(width, config.RERANK_CANDIDATES)
+        if config.MMR_ENABLED:
+            width = max(width, config.MMR_CANDIDATES)
+        return width
+
+    def _search(
+            self,
+            query: str,
+            query_embedding: np.ndarray,
+            n_results: int,
+            subject: Optional[str],
+            store: VectorStore,
+            dense: Optional[Dict[str, Any]] = None
+    ) -> tuple[Dict[str, Any], bool]:
+        """
+        Dense or hybrid search, then re-ranking and diversification if enabled.
+
+        ``dense`` may carry dense results that were already fetched (batch path).
+
+        Returns:
+            (results, complete); complete is False when re-ranking ran out of
+            time and the results are in retrieval order, so they aren't cached
+        """
+        width = self._candidate_count(n_results)
+        if config.HYBRID_SEARCH:
+            results = self._hybrid_search(query, query_embedding, width, subject, store, dense=dense)
+        elif dense is not None:
+            results = dense
+        else:
+            results = store.search_by_embedding(
+                query_embedding, width, self._subject_filter(subject), include_embeddings=config.MMR_ENABLED
+            )
+
+        complete = True
+        if self.reranker is not None:
+            # Keep every candidate for MMR to choose from
+            results, complete = self.reranker.rerank(query, results, width if config.MMR_ENABLED else n_results)
+
+        if config.MMR_ENABLED and 'embeddings' in results:
+            picked = maximal_marginal_relevance(
+                query_embedding,
+                results['embeddings'],
+                n_results,
+                lambda_mult=config.MMR_LAMBDA,
+                relevance=results.get('rerank_scores')
+            )
+            results = select_results(results, picked)
+
+        return results, complete
+
+    def _hybrid_search(
+            self,
+            query: str,
+            query_embedding: np.ndarray,
+            n_results: int,
+            subject: Optional[str],
+            store: VectorStore,
+            dense: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Fuse dense and BM25 keyword results; returns the same shape as a vector search.
+
+        ``store`` is the pinned view the whole query runs against; ``dense``
+        may carry dense results that were already fetched (batch path).
+        """
+        candidates = max(n_results, config.HYBRID_CANDIDATES)
+        subject_filter = self._subject_filter(subject)
+
+        if dense is None:
+            dense = store.search_by_embedding(
+                query_embedding, candidates, subject_filter, include_embeddings=config.MMR_ENABLED
+            )
+        keyword_ids = store.keyword_search(
+            query,
+            candidates,
+            subject_filter['subject'] if subject_filter else None
         )
+        fused_ids = reciprocal_rank_fusion([dense['ids'], keyword_ids], k=config.RRF_K)[:n_results]
+
+        # Keyword-only hits need their text, metadata and distance from the store
+        rows = {chunk_id: (dense, i) for i, chunk_id in enumerate(dense['ids'])}
+        extra = store.get_chunks([i for i in fused_ids if i not in rows], query_embedding)
+        rows.update((chunk_id, (extra, i)) for i, chunk_id in enumerate(extra['ids']))
+
+        fused_ids = [i for i in fused_ids if i in rows]
+        fused = {
+            field: [rows[i][0][field][rows[i][1]] for i in fused_ids]
+            for field in ('ids', 'documents', 'metadatas', 'distances')
+        }
+        if 'embeddings' in dense:
+            fused['embeddings'] = np.array(
+                [rows[i][0]['embeddings'][rows[i][1]] for i in fused_ids], dtype=np.float32
+            ).reshape(len(fused_ids), -1)
+        return fused
+
+    def _cached_answer(
+            self,
+            query: str,
+            query_embedding: np.ndarray,
+            use_web: bool,
+            subject: Optional[str]
+    ) -> tuple[tuple, Optional[AgentResponse]]:
+        """Look up a cached answer; returns the cache scope and the answer if found."""
+        scope = (subject or "all", use_web, self.current_index_version())
+        cached = self.answer_cache.get(scope, query, query_embedding)
+        if cached is not None:
+            cached = replace(
+                cached,
+                reasoning_steps=cached.reasoning_steps + ["♻️ Reused the answer to an earlier, matching question"]
+            )
+        return scope, cached
+
+    @staticmethod
+    def _subject_filter(subject: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Build metadata filter if subject is specified."""
+        if subject and subject != "all":
+            return {"subject": subject}
+        return None
 
+    @staticmethod
+    def _citations_from_results(results: Dict[str, Any], store: VectorStore) -> List[Citation]:
+        """Convert raw search results into citations above the relevance threshold."""
         citations = []
         for doc, metadata, distance in zip(
                 results['documents'],
                 results['metadatas'],
                 results['distances']
         ):
-            relevance = 1 - distance  # Convert distance to similarity
+            relevance = store.relevance(distance)  # Cosine similarity, whatever the index metric
 
             # Only include results above relevance threshold
             if relevance >= config.RELEVANCE_THRESHOLD:
@@ -127,6 +503,15 @@ class CourseAgent:
             print(f"⚠️  Web search failed: {e}")
             return []
 
+    async def asearch_web(self, query: str, max_results: int = 3) -> List[Dict[str, str]]:
+        """
+        Async version of search_web.
+
+        duckduckgo_search only ships a blocking client, so the request runs
+        in a worker thread.
+        """
+        return await asyncio.to_thread(self.search_web, query, max_results)
+
     def should_use_web_search(self, query: str, course_citations: List[Citation]) -> bool:
         """
         Decide if web search is needed.
@@ -159,7 +544,8 @@ class CourseAgent:
             self,
             query: str,
             course_citations: List[Citation],
-            web_results: List[Dict[str, str]]
+            web_results: List[Dict[str, str]],
+            context: Optional[PromptContext] = None
     ) -> List[str]:
         """
         Generate step-by-step reasoning process.
@@ -168,6 +554,7 @@ class CourseAgent:
             query: User's question
             course_citations: Course material citations
             web_results: Web search results
+            context: Sources as packed into the prompt, if already built
 
         Returns:
             List of reasoning steps
@@ -185,6 +572,9 @@ class CourseAgent:
         if web_results:
             steps.append(f"🌐 Searched web and found {len(web_results)} additional sources")
 
+        if context is not None:
+            steps.append(context.summary())
+
         steps.append("🧠 Synthesizing answer from available sources")
 
         return steps
@@ -207,6 +597,12 @@ class CourseAgent:
             print(f"Subject: {subject}")
         print("=" * 60)
 
+        query_embedding = self.embed_query(query)
+        scope, cached = self._cached_answer(query, query_embedding, use_web, subject)
+        if cached is not None:
+            print("♻️  Answer served from cache")
+            return cached
+
         # Step 1: Retrieve from course materials
         print("📚 Searching course materials...")
         course_citations = self.retrieve_from_course(query, n_results=5, subject=subject)
@@ -220,59 +616,289 @@ class CourseAgent:
             web_results = self.search_web(query)
             used_web = len(web_results) > 0
 
-        # Step 3: Generate reasoning
-        reasoning_steps = self.generate_reasoning(query, course_citations, web_results)
+        # Step 3: Build prompt for LLM
+        prompt, context = self.prepare_prompt(query, course_citations, web_results)
 
-        # Step 4: Build context for LLM
-        context_parts = []
+        # Step 4: Generate reasoning
+        reasoning_steps = self.generate_reasoning(query, course_citations, web_results, context)
 
-        if course_citations:
-            context_parts.append("COURSE MATERIALS:\n")
-            for i, citation in enumerate(course_citations[:3], 1):
-                context_parts.append(
-                    f"[Source {i}: {citation.source}, Page {citation.page}]\n"
-                    f"{citation.text}\n"
-                )
+        # Step 5: Generate answer
+        print("🤖 Generating answer...")
+        answer = self.llm.invoke(prompt)
 
-        if web_results:
-            context_parts.append("\nWEB SEARCH RESULTS:\n")
-            for i, result in enumerate(web_results, 1):
-                context_parts.append(
-                    f"[Web Source {i}: {result['title']}]\n"
-                    f"{result['snippet']}\n"
-                )
+        response = AgentResponse(
+            answer=answer,
+            reasoning_steps=reasoning_steps,
+            course_citations=course_citations,
+            web_sources=[r['url'] for r in web_results],
+            used_web_search=used_web
+        )
+        self.answer_cache.put(scope, query, query_embedding, response)
+        return response
 
-        context = "\n".join(context_parts)
+    def build_prompt(
+            self,
+            query: str,
+            course_citations: List[Citation],
+            web_results: List[Dict[str, str]]
+    ) -> str:
+        """
+        Build the LLM prompt from course citations and web results.
 
-        # Step 5: Create prompt with instructions
-        prompt = f"""You are a helpful course assistant. Answer the question using the provided sources.
+        Args:
+            query: User's question
+            course_citations: Course material citations
+            web_results: Web search results
 
-IMPORTANT INSTRUCTIONS:
-- Base your answer primarily on the COURSE MATERIALS
-- Use WEB SEARCH RESULTS only for additional context or current information
-- ALWAYS cite your sources using [Source X, Page Y] format for course materials
-- Be clear when information comes from web vs course materials
-- If the course materials don't contain the answer, say so explicitly
-- Explain concepts clearly and thoroughly
+        Returns:
+            Prompt string
+        """
+        return self.prepare_prompt(query, course_citations, web_results)[0]
 
-CONTEXT:
-{context}
+    def prepare_prompt(
+            self,
+            query: str,
+            course_citations: List[Citation],
+            web_results: List[Dict[str, str]]
+    ) -> tuple[str, PromptContext]:
+        """
+        Build the LLM prompt, fitting the sources into the model's context window.
 
-QUESTION: {query}
+        The sources get whatever is left of config.MAX_TOKENS after the
+        instructions, the question and config.ANSWER_TOKENS reserved for the
+        answer (capped at config.CONTEXT_TOKENS if set).
 
-ANSWER (with citations):"""
+        Args:
+            query: User's question
+            course_citations: Course material citations
+            web_results: Web search results
 
-        # Step 6: Generate answer
-        print("🤖 Generating answer...")
-        answer = self.llm.invoke(prompt)
+        Returns:
+            (prompt, PromptContext describing what was included)
+        """
+        template_tokens = self.count_tokens(PROMPT_TEMPLATE.format(context="", query=query))
+        budget = config.MAX_TOKENS - config.ANSWER_TOKENS - template_tokens
+        if config.CONTEXT_TOKENS > 0:
+            budget = min(budget, config.CONTEXT_TOKENS)
+
+        context = build_context(course_citations, web_results, max(budget, 0), self.count_tokens)
+        context.prompt_tokens = template_tokens + context.tokens
+        return PROMPT_TEMPLATE.format(context=context.text, query=query), context
+
+    async def aanswer_question(self, query: str, use_web: bool = True, subject: Optional[str] = None) -> AgentResponse:
+        """
+        Async version of answer_question for the API.
+
+        Retrieval and web search run off the event loop and the LLM call uses
+        the async Ollama client, so other requests are served meanwhile.
+
+        Args:
+            query: User's question
+            use_web: Whether to use web search if needed
+            subject: Optional subject filter (e.g., "theory", "logic", or "all")
+
+        Returns:
+            AgentResponse with answer, reasoning, and citations
+        """
+        query_embedding, scope, cached = await self._acached_answer(query, use_web, subject)
+        if cached is not None:
+            return cached
+
+        course_citations, web_results = await self._agather_sources(query, use_web, subject)
 
-        return AgentResponse(
+        prompt, context = self.prepare_prompt(query, course_citations, web_results)
+        reasoning_steps = self.generate_reasoning(query, course_citations, web_results, context)
+
+        answer = await self.llm.ainvoke(prompt)
+
+        response = AgentResponse(
             answer=answer,
             reasoning_steps=reasoning_steps,
             course_citations=course_citations,
             web_sources=[r['url'] for r in web_results],
-            used_web_search=used_web
+            used_web_search=len(web_results) > 0
+        )
+        self.answer_cache.put(scope, query, query_embedding, response)
+        return response
+
+    async def astream_answer(
+            self,
+            query: str,
+            use_web: bool = True,
+            subject: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Answer a question as a stream of events.
+
+        Yields a "retrieval" event (citations and reasoning steps) as soon as
+        sources are gathered, a "token" event for every chunk produced by the
+        LLM, and a final "done" event carrying citations and web sources.
+
+        Args:
+            query: User's question
+            use_web: Whether to use web search if needed
+            subject: Optional subject filter (e.g., "theory", "logic", or "all")
+
+        Yields:
+            Event dicts with a "type" key
+        """
+        query_embedding, scope, cached = await self._acached_answer(query, use_web, subject)
+
+        if cached is not None:
+            citations = [asdict(c) for c in cached.course_citations]
+            yield {'type': 'retrieval', 'reasoning_steps': cached.reasoning_steps, 'course_citations': citations}
+            yield {'type': 'token', 'text': cached.answer}
+            yield {
+                'type': 'done',
+                'course_citations': citations,
+                'web_sources': cached.web_sources,
+                'used_web_search': cached.used_web_search
+            }
+            return
+
+        course_citations, web_results = await self._agather_sources(query, use_web, subject)
+        citations = [asdict(c) for c in course_citations]
+        prompt, context = self.prepare_prompt(query, course_citations, web_results)
+        reasoning_steps = self.generate_reasoning(query, course_citations, web_results, context)
+
+        yield {
+            'type': 'retrieval',
+            'reasoning_steps': reasoning_steps,
+            'course_citations': citations
+        }
+
+        tokens = []
+        async for token in self.llm.astream(prompt):
+            tokens.append(token)
+            yield {'type': 'token', 'text': token}
+
+        response = AgentResponse(
+            answer="".join(tokens),
+            reasoning_steps=reasoning_steps,
+            course_citations=course_citations,
+            web_sources=[r['url'] for r in web_results],
+            used_web_search=len(web_results) > 0
         )
+        self.answer_cache.put(scope, query, query_embedding, response)
+
+        yield {
+            'type': 'done',
+            'course_citations': citations,
+            'web_sources': response.web_sources,
+            'used_web_search': response.used_web_search
+        }
+
+    async def aanswer_batch(
+            self,
+            queries: List[str],
+            use_web: bool = True,
+            subject: Optional[str] = None,
+            concurrency: Optional[int] = None
+    ) -> List[Union[AgentResponse, Exception]]:
+        """
+        Answer many questions at once.
+
+        All questions are embedded in one call and retrieved with one Chroma
+        query, identical questions and web searches run once, and LLM
+        generations run with at most ``concurrency`` in flight.
+
+        Args:
+            queries: User questions
+            use_web: Whether to use web search if needed
+            subject: Optional subject filter shared by all questions
+            concurrency: Maximum simultaneous LLM calls (default: config.BATCH_CONCURRENCY)
+
+        Returns:
+            An AgentResponse, or the exception raised, for each question in order
+        """
+        loop = asyncio.get_running_loop()
+        embeddings = await loop.run_in_executor(self.embed_pool, self.embed_queries, queries)
+
+        def lookup_cached():
+            return [self._cached_answer(q, e, use_web, subject) for q, e in zip(queries, embeddings)]
+
+        cached = await asyncio.to_thread(lookup_cached)
+        results: List[Union[AgentResponse, Exception, None]] = [answer for _, answer in cached]
+        pending = [i for i, answer in enumerate(results) if answer is None]
+        if not pending:
+            return results
+
+        try:
+            citations = await asyncio.to_thread(
+                self.retrieve_batch, [queries[i] for i in pending], 5, subject, embeddings[pending]
+            )
+        except Exception as e:
+            for i in pending:
+                results[i] = e
+            return results
+        course_citations = dict(zip(pending, citations))
+
+        # Web search once per distinct question
+        web_queries = {}
+        if use_web:
+            for i in pending:
+                if self.should_use_web_search(queries[i], course_citations[i]):
+                    web_queries.setdefault(normalize_query(queries[i]), queries[i])
+        web_found = await asyncio.gather(*(self.asearch_web(q) for q in web_queries.values()))
+        web_results = dict(zip(web_queries, web_found))
+
+        semaphore = asyncio.Semaphore(concurrency or config.BATCH_CONCURRENCY)
+
+        async def generate(i: int) -> AgentResponse:
+            query = queries[i]
+            web = web_results.get(normalize_query(query), []) if use_web else []
+            prompt, context = self.prepare_prompt(query, course_citations[i], web)
+
+            async with semaphore:
+                answer = await self.llm.ainvoke(prompt)
+
+            response = AgentResponse(
+                answer=answer,
+                reasoning_steps=self.generate_reasoning(query, course_citations[i], web, context),
+                course_citations=course_citations[i],
+                web_sources=[r['url'] for r in web],
+                used_web_search=len(web) > 0
+            )
+            self.answer_cache.put(cached[i][0], query, embeddings[i], response)
+            return response
+
+        # Generate once per distinct question; duplicates share the answer
+        first = {}
+        for i in pending:
+            first.setdefault(normalize_query(queries[i]), i)
+        generated = await asyncio.gather(*(generate(i) for i in first.values()), return_exceptions=True)
+        answers = dict(zip(first, generated))
+        for i in pending:
+            results[i] = answers[normalize_query(queries[i])]
+
+        return results
+
+    async def _acached_answer(
+            self,
+            query: str,
+            use_web: bool,
+            subject: Optional[str]
+    ) -> tuple[np.ndarray, tuple, Optional[AgentResponse]]:
+        """Async answer-cache lookup; returns the query embedding, cache scope and cached answer."""
+        loop = asyncio.get_running_loop()
+        query_embedding = await loop.run_in_executor(self.embed_pool, self.embed_query, query)
+        scope, cached = await asyncio.to_thread(self._cached_answer, query, query_embedding, use_web, subject)
+        return query_embedding, scope, cached
+
+    async def _agather_sources(
+            self,
+            query: str,
+            use_web: bool,
+            subject: Optional[str]
+    ) -> tuple[List[Citation], List[Dict[str, str]]]:
+        """Retrieve course citations and, if needed, web results."""
+        course_citations = await self.aretrieve_from_course(query, n_results=5, subject=subject)
+
+        web_results = []
+        if use_web and self.should_use_web_search(query, course_citations):
+            web_results = await self.asearch_web(query)
+
+        return course_citations, web_results
 
 
 # Quick test
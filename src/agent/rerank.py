@@ -0,0 +1,110 @@
+"""Cross-encoder re-ranking of retrieved chunks."""
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src import config
+from src.agent.cache import LRUCache, normalize_query
+from src.vector_store import select_results
+
+
+class CrossEncoderReranker:
+    """
+    Re-score retrieval candidates with a cross-encoder.
+
+    A cross-encoder reads the question and a chunk together, so it ranks far
+    better than embedding distance, but it costs one model pass per pair.
+    Pairs are scored in batches, scores are cached per (question, chunk),
+    and scoring stops when the time budget runs out; the caller then keeps
+    the original order. Scores are relevance probabilities: the sigmoid of
+    the model's logit, whatever activation the model is configured with.
+    """
+
+    def __init__(
+            self,
+            model_name: Optional[str] = None,
+            batch_size: Optional[int] = None,
+            budget_ms: Optional[float] = None,
+            cache_size: Optional[int] = None,
+            model: Any = None
+    ):
+        """
+        Initialize the reranker.
+
+        Args:
+            model_name: Cross-encoder model (default: config.RERANK_MODEL)
+            batch_size: Pairs per model call (default: config.RERANK_BATCH_SIZE)
+            budget_ms: Time allowed per request (default: config.RERANK_BUDGET_MS)
+            cache_size: Cached pair scores (default: config.QUERY_CACHE_SIZE * 20)
+            model: Already loaded model with a predict(pairs, ...) method
+        """
+        self.model_name = model_name or config.RERANK_MODEL
+        self.batch_size = batch_size or config.RERANK_BATCH_SIZE
+        self.budget_ms = config.RERANK_BUDGET_MS if budget_ms is None else budget_ms
+        if cache_size is None:
+            cache_size = config.QUERY_CACHE_SIZE * 20 if config.CACHE_ENABLED else 0
+        self.scores = LRUCache(cache_size)
+        self._model = model
+
+    @property
+    def model(self):
+        """The cross-encoder, loaded on first use."""
+        if self._model is None:
+            from sentence_transformers import CrossEncoder
+            print(f"Loading re-ranking model: {self.model_name}")
+            self._model = CrossEncoder(self.model_name)
+        return self._model
+
+    def rerank(self, query: str, results: Dict[str, Any], n_results: int) -> Tuple[Dict[str, Any], bool]:
+        """
+        Reorder search results by cross-encoder score.
+
+        Args:
+            query: User's question
+            results: Search results (ids, documents, metadatas, distances), best first
+            n_results: Number of results to keep
+
+        Returns:
+            (results, completed). If the budget ran out, the first n_results
+            in their original order and False.
+        """
+        deadline = time.perf_counter() + self.budget_ms / 1000
+        key = normalize_query(query)
+
+        scores: Dict[str, float] = {}
+        missing: List[int] = []
+        for i, chunk_id in enumerate(results['ids']):
+            score = self.scores.get((key, chunk_id))
+            if score is None:
+                missing.append(i)
+            else:
+                scores[chunk_id] = score
+
+        for start in range(0, len(missing), self.batch_size):
+            if time.perf_counter() > deadline:
+                print(f"⏱️  Re-ranking exceeded {self.budget_ms:.0f} ms; keeping retrieval order")
+                return select_results(results, list(range(len(results['ids'])))[:n_results]), False
+
+            batch = missing[start:start + self.batch_size]
+            logits = self.model.predict(
+                [(query, results['documents'][i]) for i in batch],
+                batch_size=len(batch),
+                show_progress_bar=False,
+                activation_fct=lambda output: output  # Raw logits (ms-marco models already default to this)
+            )
+            predicted = 1 / (1 + np.exp(-np.asarray(logits, dtype=np.float64)))
+            for i, score in zip(batch, predicted):
+                chunk_id = results['ids'][i]
+                scores[chunk_id] = float(score)
+                self.scores.put((key, chunk_id), float(score))
+
+        order = sorted(range(len(results['ids'])), key=lambda i: scores[results['ids'][i]], reverse=True)
+        order = [i for i in order if scores[results['ids'][i]] >= config.RERANK_MIN_SCORE][:n_results]
+        reranked = select_results(results, order)
+        reranked['rerank_scores'] = [scores[chunk_id] for chunk_id in reranked['ids']]
+        return reranked, True
+
+    def clear(self) -> None:
+        """Drop cached scores (e.g. after the index changed)."""
+        self.scores.clear()
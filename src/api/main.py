@@ -1,5 +1,7 @@
 """FastAPI backend for Course AI Assistant."""
 import sys
+import json
+import asyncio
 from pathlib import Path
 from typing import Optional
 from contextlib import asynccontextmanager
@@ -10,23 +12,97 @@ sys.path.insert(0, str(project_root))
 
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import shutil
 from src.agent.core import CourseAgent, AgentResponse
+from src.ingestion import IngestJobQueue
 from src.vector_store import VectorStore
+from src import config
 
 
 # Global agent instance
 agent: Optional[CourseAgent] = None
+ingest_jobs: Optional[IngestJobQueue] = None
+
+
+class AskLimiter:
+    """Bound concurrent questions and reject new ones once the queue is full."""
+
+    def __init__(self, concurrency: int, queue_limit: int):
+        """
+        Initialize the limiter.
+
+        Args:
+            concurrency: Number of questions processed at the same time
+            queue_limit: Number of extra questions allowed to wait for a slot
+        """
+        self.capacity = concurrency + queue_limit
+        self.pending = 0  # Running + waiting
+        self._slots = asyncio.Semaphore(concurrency)
+
+    def try_acquire(self) -> bool:
+        """Reserve a place in the queue; False if saturated."""
+        if self.pending >= self.capacity:
+            return False
+        self.pending += 1
+        return True
+
+    def release(self) -> None:
+        """Give back a place reserved with try_acquire."""
+        self.pending -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold a processing slot; the reserved place is released separately with release()."""
+        async with self._slots:
+            yield
+
+    async def __aenter__(self):
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            self.release()  # Cancelled while waiting
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        self._slots.release()
+        self.release()
+
+
+class LimitedStreamingResponse(StreamingResponse):
+    """
+    Streaming response that gives back an AskLimiter place when it ends.
+
+    The place is reserved by the handler and released here however the
+    response ends, including when the client disconnects before the body
+    generator ever starts.
+    """
+
+    def __init__(self, content, limiter: AskLimiter, **kwargs):
+        super().__init__(content, **kwargs)
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.body_iterator.aclose()
+            self.limiter.release()
+
+
+ask_limiter = AskLimiter(config.ASK_CONCURRENCY, config.ASK_QUEUE_LIMIT)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize agent on startup, cleanup on shutdown."""
-    global agent
+    global agent, ingest_jobs
     print("🚀 Initializing Course AI Agent...")
     try:
         agent = CourseAgent()
+        ingest_jobs = IngestJobQueue(agent.vector_store, agent.embedding_gen)
         print("✅ Agent initialized successfully")
     except Exception as e:
         print(f"❌ Failed to initialize agent: {e}")
@@ -36,6 +112,8 @@ async def lifespan(app: FastAPI):
 
     # Cleanup (if needed)
     print("👋 Shutting down...")
+    if ingest_jobs is not None:
+        ingest_jobs.shutdown()
 
 
 # Create FastAPI app
@@ -81,6 +159,25 @@ class AnswerResponse(BaseModel):
     used_web_search: bool
 
 
+class BatchQuestionRequest(BaseModel):
+    """Request model for answering many questions at once."""
+    questions: list[str]
+    use_web_search: bool = True
+    subject: Optional[str] = None  # Optional subject filter
+
+
+class BatchAnswerItem(BaseModel):
+    """Answer or error for one question of a batch."""
+    question: str
+    answer: Optional[AnswerResponse] = None
+    error: Optional[str] = None
+
+
+class BatchAnswerResponse(BaseModel):
+    """Response model for batch answers."""
+    results: list[BatchAnswerItem]
+
+
 class StatsResponse(BaseModel):
     """Database statistics."""
     total_chunks: int
@@ -150,35 +247,144 @@ async def ask_question(request: QuestionRequest):
     if not request.question.strip():
         raise HTTPException(status_code=400, detail="Question cannot be empty")
 
+    if not ask_limiter.try_acquire():
+        raise HTTPException(status_code=429, detail="Too many questions in progress, please retry shortly")
+
     try:
-        # Get answer from agent
-        response = agent.answer_question(
-            query=request.question,
-            use_web=request.use_web_search,
-            subject=request.subject
-        )
+        # Get answer from agent without blocking the event loop
+        async with ask_limiter:
+            response = await agent.aanswer_question(
+                query=request.question,
+                use_web=request.use_web_search,
+                subject=request.subject
+            )
 
         # Convert to API response format
-        return AnswerResponse(
-            answer=response.answer,
-            reasoning_steps=response.reasoning_steps,
-            course_citations=[
-                Citation(
-                    source=c.source,
-                    page=c.page,
-                    text=c.text,
-                    relevance=c.relevance
-                )
-                for c in response.course_citations
-            ],
-            web_sources=response.web_sources,
-            used_web_search=response.used_web_search
-        )
+        return to_answer_response(response)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing question: {str(e)}")
 
 
+@app.post("/api/ask/batch", response_model=BatchAnswerResponse)
+async def ask_batch(request: BatchQuestionRequest):
+    """
+    Answer many questions in one request.
+
+    Questions share one embedding call and one vector search, and their LLM
+    generations run with bounded concurrency. A failing question gets an
+    error entry instead of failing the whole batch.
+
+    Args:
+        request: Questions and shared settings
+
+    Returns:
+        One result per question, in order
+    """
+    if agent is None:
+        raise HTTPException(status_code=503, detail="Agent not initialized")
+
+    questions = [q for q in request.questions if q.strip()]
+    if not questions:
+        raise HTTPException(status_code=400, detail="Questions cannot be empty")
+
+    if len(questions) > config.BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many questions: {len(questions)} (max {config.BATCH_MAX_QUESTIONS})"
+        )
+
+    if not ask_limiter.try_acquire():
+        raise HTTPException(status_code=429, detail="Too many questions in progress, please retry shortly")
+
+    try:
+        async with ask_limiter:
+            responses = await agent.aanswer_batch(
+                questions,
+                use_web=request.use_web_search,
+                subject=request.subject
+            )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing questions: {str(e)}")
+
+    results = []
+    for question, response in zip(questions, responses):
+        if isinstance(response, Exception):
+            results.append(BatchAnswerItem(question=question, error=str(response)))
+        else:
+            results.append(BatchAnswerItem(question=question, answer=to_answer_response(response)))
+
+    return BatchAnswerResponse(results=results)
+
+
+def to_answer_response(response: AgentResponse) -> AnswerResponse:
+    """Convert an agent response to the API response model."""
+    return AnswerResponse(
+        answer=response.answer,
+        reasoning_steps=response.reasoning_steps,
+        course_citations=[
+            Citation(
+                source=c.source,
+                page=c.page,
+                text=c.text,
+                relevance=c.relevance
+            )
+            for c in response.course_citations
+        ],
+        web_sources=response.web_sources,
+        used_web_search=response.used_web_search
+    )
+
+
+@app.post("/api/ask/stream")
+async def ask_question_stream(request: QuestionRequest):
+    """
+    Ask a question and stream the answer as Server-Sent Events.
+
+    Events: "retrieval" (citations and reasoning steps), "token" (answer
+    text as the LLM produces it), "done" (final citations and web sources)
+    and "error".
+
+    Args:
+        request: Question and settings
+
+    Returns:
+        text/event-stream response
+    """
+    if agent is None:
+        raise HTTPException(status_code=503, detail="Agent not initialized")
+
+    if not request.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+
+    if not ask_limiter.try_acquire():
+        raise HTTPException(status_code=429, detail="Too many questions in progress, please retry shortly")
+
+    async def event_stream():
+        async with ask_limiter.slot():
+            try:
+                async for event in agent.astream_answer(
+                    query=request.question,
+                    use_web=request.use_web_search,
+                    subject=request.subject
+                ):
+                    yield format_sse(event)
+            except Exception as e:
+                yield format_sse({'type': 'error', 'detail': f"Error processing question: {str(e)}"})
+
+    return LimitedStreamingResponse(
+        event_stream(),
+        ask_limiter,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def format_sse(event: dict) -> str:
+    """Encode an event dict as a Server-Sent Events message."""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
 @app.get("/api/sources")
 async def get_sources():
     """Get list of all processed sources."""
@@ -252,7 +458,7 @@ async def upload_pdf(
             "filename": file.filename,
             "subject": subject,
             "path": str(file_path),
-            "note": "Run ingestion to add to database: python scripts/ingest_documents.py"
+            "note": "Call POST /api/ingest to add it to the database"
         }
 
     except HTTPException:
@@ -261,67 +467,57 @@ async def upload_pdf(
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
-@app.post("/api/ingest")
+@app.post("/api/ingest", status_code=202)
 async def trigger_ingestion():
     """
-    Trigger document ingestion for newly uploaded files.
+    Queue ingestion of new, changed and removed PDFs.
 
-    This will automatically restart the API after ingestion to load new documents.
+    Ingestion runs on a background thread inside this process, reusing the
+    loaded embedding model and vector store; new chunks are searchable as
+    soon as they are stored, without restarting the server.
 
     Returns:
-        Ingestion status
+        The queued job; poll /api/ingest/{job_id} for progress
     """
-    try:
-        import subprocess
-        import signal
-        import os
-        from src import config
+    if ingest_jobs is None:
+        raise HTTPException(status_code=503, detail="Agent not initialized")
 
-        # Run ingestion script
-        result = subprocess.run(
-            ["python", "scripts/ingest_documents.py"],
-            cwd=str(config.PROJECT_ROOT),
-            capture_output=True,
-            text=True,
-            input="y\n",  # Auto-confirm
-            timeout=600  # 10 minute timeout
-        )
+    job = ingest_jobs.submit()
+    return {
+        "status": "queued",
+        "job_id": job.id,
+        "message": "Ingestion queued",
+        "job": job.to_dict()
+    }
 
-        if result.returncode == 0:
-            # Schedule restart after response is sent
-            import asyncio
-            asyncio.create_task(restart_server())
-
-            return {
-                "status": "success",
-                "message": "Ingestion completed successfully",
-                "note": "Server will restart automatically in 2 seconds",
-                "output": result.stdout
-            }
-        else:
-            return {
-                "status": "error",
-                "message": "Ingestion failed",
-                "error": result.stderr
-            }
-
-    except subprocess.TimeoutExpired:
-        raise HTTPException(status_code=500, detail="Ingestion timed out (>10 minutes)")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Ingestion failed: {str(e)}")
 
+@app.get("/api/ingest")
+async def list_ingestion_jobs():
+    """List recent ingestion jobs, newest first."""
+    if ingest_jobs is None:
+        raise HTTPException(status_code=503, detail="Agent not initialized")
+
+    return {"jobs": [job.to_dict() for job in ingest_jobs.jobs()]}
 
-async def restart_server():
-    """Restart the server after a delay."""
-    import asyncio
-    import os
-    import signal
 
-    # Wait a bit for response to be sent
-    await asyncio.sleep(2)
+@app.get("/api/ingest/{job_id}")
+async def get_ingestion_job(job_id: str):
+    """
+    Get the status and progress of an ingestion job.
+
+    Args:
+        job_id: ID returned by POST /api/ingest
+
+    Returns:
+        Job status, file and chunk counts
+    """
+    if ingest_jobs is None:
+        raise HTTPException(status_code=503, detail="Agent not initialized")
 
-    # Send SIGHUP to reload (uvicorn will restart with --reload flag)
-    os.kill(os.getpid(), signal.SIGHUP)
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown ingestion job '{job_id}'")
+    return job.to_dict()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,277 @@
+"""Persistent BM25 keyword index over document chunks."""
+import math
+import re
+import sqlite3
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for",
+    "from", "how", "i", "in", "is", "it", "of", "on", "or", "that", "the", "this",
+    "to", "was", "what", "when", "where", "which", "who", "why", "with"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms.
+
+    Hyphenated terms such as "np-complete" are kept whole and also split
+    into their parts, so both the exact notation and the words match.
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token not in STOPWORDS:
+            terms.append(token)
+        if "-" in token:
+            terms.extend(part for part in token.split("-") if part and part not in STOPWORDS)
+    return terms
+
+
+class BM25Index:
+    """
+    BM25 index stored in SQLite next to the vector database.
+
+    Postings, document lengths and document frequencies are updated
+    incrementally as chunks are added or removed, so queries only read the
+    postings of their own terms.
+    """
+
+    def __init__(self, db_path: Path, collection_name: str, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize the index.
+
+        Args:
+            db_path: Path to the SQLite database file
+            collection_name: Collection this index belongs to
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+        """
+        self.db_path = Path(db_path)
+        self.collection_name = collection_name
+        self.k1 = k1
+        self.b = b
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS docs (
+                    collection TEXT NOT NULL,
+                    chunk_id TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    length INTEGER NOT NULL,
+                    PRIMARY KEY (collection, chunk_id)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS docs_source ON docs (collection, source, subject)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS postings (
+                    collection TEXT NOT NULL,
+                    term TEXT NOT NULL,
+                    chunk_id TEXT NOT NULL,
+                    tf INTEGER NOT NULL,
+                    PRIMARY KEY (collection, term, chunk_id)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS postings_chunk ON postings (collection, chunk_id)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS terms (
+                    collection TEXT NOT NULL,
+                    term TEXT NOT NULL,
+                    df INTEGER NOT NULL,
+                    PRIMARY KEY (collection, term)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS totals (
+                    collection TEXT PRIMARY KEY,
+                    docs INTEGER NOT NULL,
+                    length INTEGER NOT NULL
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection; use as a context manager for one transaction."""
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _update_totals(self, conn: sqlite3.Connection, docs: int, length: int) -> None:
+        """Adjust the document count and total length used for BM25 normalization."""
+        conn.execute("""
+            INSERT INTO totals (collection, docs, length) VALUES (?, ?, ?)
+            ON CONFLICT (collection) DO UPDATE SET docs = docs + excluded.docs, length = length + excluded.length
+        """, (self.collection_name, docs, length))
+
+    def add(self, chunk_ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        """
+        Index chunks, replacing any earlier version of the same IDs.
+
+        Args:
+            chunk_ids: Chunk IDs
+            texts: Chunk texts
+            metadatas: Chunk metadata (source and subject are stored)
+        """
+        with self._connect() as conn:
+            self._delete(conn, chunk_ids)
+
+            total_length = 0
+            for chunk_id, text, meta in zip(chunk_ids, texts, metadatas):
+                counts = Counter(tokenize(text))
+                length = sum(counts.values())
+                total_length += length
+                conn.execute(
+                    "INSERT INTO docs (collection, chunk_id, source, subject, length) VALUES (?, ?, ?, ?, ?)",
+                    (self.collection_name, chunk_id, meta['source'], meta.get('subject', 'general'), length)
+                )
+                conn.executemany(
+                    "INSERT INTO postings (collection, term, chunk_id, tf) VALUES (?, ?, ?, ?)",
+                    [(self.collection_name, term, chunk_id, tf) for term, tf in counts.items()]
+                )
+                conn.executemany("""
+                    INSERT INTO terms (collection, term, df) VALUES (?, ?, 1)
+                    ON CONFLICT (collection, term) DO UPDATE SET df = df + 1
+                """, [(self.collection_name, term) for term in counts])
+
+            self._update_totals(conn, len(chunk_ids), total_length)
+
+    def _delete(self, conn: sqlite3.Connection, chunk_ids: Iterable[str]) -> None:
+        """Remove chunks and their postings."""
+        for chunk_id in chunk_ids:
+            doc = conn.execute(
+                "SELECT length FROM docs WHERE collection = ? AND chunk_id = ?",
+                (self.collection_name, chunk_id)
+            ).fetchone()
+            if doc is None:
+                continue
+
+            terms = conn.execute(
+                "SELECT term FROM postings WHERE collection = ? AND chunk_id = ?",
+                (self.collection_name, chunk_id)
+            ).fetchall()
+
+            conn.executemany(
+                "UPDATE terms SET df = df - 1 WHERE collection = ? AND term = ?",
+                [(self.collection_name, term) for (term,) in terms]
+            )
+            conn.execute(
+                "DELETE FROM postings WHERE collection = ? AND chunk_id = ?",
+                (self.collection_name, chunk_id)
+            )
+            conn.execute(
+                "DELETE FROM docs WHERE collection = ? AND chunk_id = ?",
+                (self.collection_name, chunk_id)
+            )
+            self._update_totals(conn, -1, -doc[0])
+        conn.execute("DELETE FROM terms WHERE collection = ? AND df <= 0", (self.collection_name,))
+
+    def delete(self, chunk_ids: List[str]) -> None:
+        """Remove chunks from the index."""
+        with self._connect() as conn:
+            self._delete(conn, chunk_ids)
+
+    def chunk_ids_for_source(self, source: str, subject: str) -> List[str]:
+        """IDs of all indexed chunks of one source."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT chunk_id FROM docs WHERE collection = ? AND source = ? AND subject = ?",
+                (self.collection_name, source, subject)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def copy_from(self, source_collection: str) -> None:
+        """
+        Replace this collection's index with a copy of another collection's.
+
+        Args:
+            source_collection: Collection to copy from
+        """
+        with self._connect() as conn:
+            for table in ("docs", "postings", "terms", "totals"):
+                conn.execute(f"DELETE FROM {table} WHERE collection = ?", (self.collection_name,))
+
+            params = (self.collection_name, source_collection)
+            conn.execute("""
+                INSERT INTO docs (collection, chunk_id, source, subject, length)
+                SELECT ?, chunk_id, source, subject, length FROM docs WHERE collection = ?
+            """, params)
+            conn.execute("""
+                INSERT INTO postings (collection, term, chunk_id, tf)
+                SELECT ?, term, chunk_id, tf FROM postings WHERE collection = ?
+            """, params)
+            conn.execute("""
+                INSERT INTO terms (collection, term, df)
+                SELECT ?, term, df FROM terms WHERE collection = ?
+            """, params)
+            conn.execute("""
+                INSERT INTO totals (collection, docs, length)
+                SELECT ?, docs, length FROM totals WHERE collection = ?
+            """, params)
+
+    def clear(self) -> None:
+        """Remove every chunk of this collection."""
+        with self._connect() as conn:
+            for table in ("docs", "postings", "terms", "totals"):
+                conn.execute(f"DELETE FROM {table} WHERE collection = ?", (self.collection_name,))
+
+    def count(self) -> int:
+        """Number of indexed chunks."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT docs FROM totals WHERE collection = ?", (self.collection_name,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def search(self, query: str, n_results: int = 5, subject: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        Rank chunks by BM25 score.
+
+        Args:
+            query: Search query
+            n_results: Number of results to return
+            subject: Optional subject filter
+
+        Returns:
+            List of (chunk_id, score), best first
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        placeholders = ",".join("?" * len(terms))
+        with self._connect() as conn:
+            totals = conn.execute(
+                "SELECT docs, length FROM totals WHERE collection = ?", (self.collection_name,)
+            ).fetchone()
+            if not totals or totals[0] <= 0:
+                return []
+            total_docs, total_length = totals
+
+            dfs = dict(conn.execute(
+                f"SELECT term, df FROM terms WHERE collection = ? AND term IN ({placeholders})",
+                [self.collection_name, *terms]
+            ).fetchall())
+
+            sql = f"""
+                SELECT p.term, p.chunk_id, p.tf, d.length
+                FROM postings p JOIN docs d
+                  ON d.collection = p.collection AND d.chunk_id = p.chunk_id
+                WHERE p.collection = ? AND p.term IN ({placeholders})
+            """
+            params = [self.collection_name, *terms]
+            if subject:
+                sql += " AND d.subject = ?"
+                params.append(subject)
+            rows = conn.execute(sql, params).fetchall()
+
+        avg_length = total_length / total_docs
+        scores: Dict[str, float] = {}
+        for term, chunk_id, tf, length in rows:
+            df = dfs.get(term, 0)
+            idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+            norm = tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n_results]
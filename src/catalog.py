@@ -0,0 +1,325 @@
+"""Source catalog: a small SQLite sidecar that summarizes the vector store."""
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Optional
+
+
+class SourceCatalog:
+    """
+    Per-source summary of a ChromaDB collection.
+
+    Keeps chunk counts, subject membership, page ranges and ingest
+    timestamps for every source so stats/sources/subjects lookups never
+    have to pull the whole collection into memory.
+    """
+
+    def __init__(self, db_path: Path, collection_name: str):
+        """
+        Initialize the catalog.
+
+        Args:
+            db_path: Path to the SQLite database file
+            collection_name: Collection this catalog describes
+        """
+        self.db_path = Path(db_path)
+        self.collection_name = collection_name
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sources (
+                    collection TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    chunk_count INTEGER NOT NULL,
+                    min_page INTEGER,
+                    max_page INTEGER,
+                    total_pages INTEGER,
+                    ingested_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (collection, source, subject)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS versions (
+                    collection TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection; use as a context manager for one transaction."""
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _bump_version(self, conn: sqlite3.Connection) -> None:
+        """Mark the collection as changed."""
+        conn.execute("""
+            INSERT INTO versions (collection, version) VALUES (?, 1)
+            ON CONFLICT (collection) DO UPDATE SET version = version + 1
+        """, (self.collection_name,))
+
+    def version(self) -> int:
+        """
+        Counter that changes whenever the collection's contents change.
+
+        Shared through the database file, so processes serving queries see
+        changes made by a separate ingestion process.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT version FROM versions WHERE collection = ?", (self.collection_name,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def _upsert(
+            self,
+            conn: sqlite3.Connection,
+            metadatas: Iterable[Dict[str, Any]],
+            replaced: Iterable[Dict[str, Any]] = ()
+    ) -> None:
+        """
+        Aggregate chunk metadata per source and merge it into the table.
+
+        Chunks in ``replaced`` were overwritten by the new ones, so each is
+        subtracted from its old source's count; page ranges only widen.
+        """
+        summary: Dict[tuple, Dict[str, Any]] = {}
+        for meta in replaced:
+            key = (meta['source'], meta.get('subject', 'general'))
+            summary.setdefault(key, {
+                'chunk_count': 0, 'min_page': None, 'max_page': None, 'total_pages': None
+            })['chunk_count'] -= 1
+
+        for meta in metadatas:
+            key = (meta['source'], meta.get('subject', 'general'))
+            entry = summary.setdefault(key, {
+                'chunk_count': 0,
+                'min_page': None,
+                'max_page': None,
+                'total_pages': None
+            })
+            entry['chunk_count'] += 1
+            if entry['total_pages'] is None:
+                entry['total_pages'] = meta.get('total_pages')
+
+            page = meta.get('page_number')
+            if page is not None:
+                entry['min_page'] = page if entry['min_page'] is None else min(entry['min_page'], page)
+                entry['max_page'] = page if entry['max_page'] is None else max(entry['max_page'], page)
+
+        now = datetime.now().isoformat(timespec="seconds")
+        for (source, subject), entry in summary.items():
+            conn.execute("""
+                INSERT INTO sources (
+                    collection, source, subject, chunk_count,
+                    min_page, max_page, total_pages, ingested_at, updated_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (collection, source, subject) DO UPDATE SET
+                    chunk_count = chunk_count + excluded.chunk_count,
+                    min_page = MIN(COALESCE(min_page, excluded.min_page), COALESCE(excluded.min_page, min_page)),
+                    max_page = MAX(COALESCE(max_page, excluded.max_page), COALESCE(excluded.max_page, max_page)),
+                    total_pages = COALESCE(excluded.total_pages, total_pages),
+                    updated_at = excluded.updated_at
+            """, (
+                self.collection_name, source, subject, entry['chunk_count'],
+                entry['min_page'], entry['max_page'], entry['total_pages'], now, now
+            ))
+        if replaced:
+            conn.execute(
+                "DELETE FROM sources WHERE collection = ? AND chunk_count <= 0", (self.collection_name,)
+            )
+
+    def record_chunks(self, metadatas: List[Dict[str, Any]], replaced: Iterable[Dict[str, Any]] = ()) -> None:
+        """
+        Record newly stored chunks.
+
+        Args:
+            metadatas: Metadata dicts of the chunks that were added
+            replaced: Previous metadata of chunks among them whose IDs were
+                already stored (upserted again), so they are not counted twice
+        """
+        with self._connect() as conn:
+            self._upsert(conn, metadatas, replaced)
+            self._bump_version(conn)
+
+    def remove_source(self, source: str, subject: str) -> None:
+        """
+        Remove one source's entry.
+
+        Args:
+            source: Source file name
+            subject: Subject the source belongs to
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM sources WHERE collection = ? AND source = ? AND subject = ?",
+                (self.collection_name, source, subject)
+            )
+            self._bump_version(conn)
+
+    def replace_source(self, source: str, subject: str, metadatas: Iterable[Dict[str, Any]]) -> None:
+        """
+        Replace one source's entry with a summary of its current chunks.
+
+        Args:
+            source: Source file name
+            subject: Subject the source belongs to
+            metadatas: Metadata of every chunk the source now has
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM sources WHERE collection = ? AND source = ? AND subject = ?",
+                (self.collection_name, source, subject)
+            )
+            self._upsert(conn, metadatas)
+            self._bump_version(conn)
+
+    def clear(self) -> None:
+        """Remove every entry for this collection."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sources WHERE collection = ?", (self.collection_name,))
+            self._bump_version(conn)
+
+    def rebuild(self, metadatas: Iterable[Dict[str, Any]]) -> None:
+        """
+        Replace the catalog contents from a full scan of the collection.
+
+        Args:
+            metadatas: Metadata of every chunk currently in the collection
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sources WHERE collection = ?", (self.collection_name,))
+            self._upsert(conn, metadatas)
+            self._bump_version(conn)
+
+    def set_version(self, version: int) -> None:
+        """Set the version counter, e.g. so a new generation continues from the old one."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO versions (collection, version) VALUES (?, ?)",
+                (self.collection_name, version)
+            )
+
+    def copy_from(self, source_collection: str) -> None:
+        """
+        Replace this collection's entries with those of another collection.
+
+        Args:
+            source_collection: Collection to copy from
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sources WHERE collection = ?", (self.collection_name,))
+            conn.execute("""
+                INSERT INTO sources (
+                    collection, source, subject, chunk_count,
+                    min_page, max_page, total_pages, ingested_at, updated_at
+                )
+                SELECT ?, source, subject, chunk_count, min_page, max_page, total_pages, ingested_at, updated_at
+                FROM sources WHERE collection = ?
+            """, (self.collection_name, source_collection))
+            self._bump_version(conn)
+
+    def drop(self) -> None:
+        """Remove every entry and the version counter of this collection."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sources WHERE collection = ?", (self.collection_name,))
+            conn.execute("DELETE FROM versions WHERE collection = ?", (self.collection_name,))
+
+    def total_chunks(self) -> int:
+        """Total number of chunks recorded for this collection."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COALESCE(SUM(chunk_count), 0) FROM sources WHERE collection = ?",
+                (self.collection_name,)
+            ).fetchone()
+        return row[0]
+
+    def sources(self) -> set:
+        """Names of all recorded sources."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT source FROM sources WHERE collection = ?",
+                (self.collection_name,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def subjects(self) -> list[str]:
+        """Sorted names of all recorded subjects."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT subject FROM sources WHERE collection = ? ORDER BY subject",
+                (self.collection_name,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def has_source(self, source_name: str, subject: Optional[str] = None) -> bool:
+        """Check if a source is recorded, optionally within one subject."""
+        query = "SELECT 1 FROM sources WHERE collection = ? AND source = ?"
+        params = [self.collection_name, source_name]
+        if subject is not None:
+            query += " AND subject = ?"
+            params.append(subject)
+
+        with self._connect() as conn:
+            row = conn.execute(query + " LIMIT 1", params).fetchone()
+        return row is not None
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Per-source details, ordered by subject and source."""
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute("""
+                SELECT source, subject, chunk_count, min_page, max_page,
+                       total_pages, ingested_at, updated_at
+                FROM sources WHERE collection = ?
+                ORDER BY subject, source
+            """, (self.collection_name,)).fetchall()
+        return [dict(row) for row in rows]
+
+
+class CollectionAliases:
+    """
+    Maps a logical collection name to the physical collection serving it.
+
+    Stored in the catalog database, so every process sharing the vector
+    store sees a swap as soon as it is published.
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        Initialize the alias table.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS aliases (
+                    alias TEXT PRIMARY KEY,
+                    collection TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection; use as a context manager for one transaction."""
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def resolve(self, alias: str) -> Optional[str]:
+        """Physical collection for an alias, or None if it was never swapped."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT collection FROM aliases WHERE alias = ?", (alias,)).fetchone()
+        return row[0] if row else None
+
+    def point(self, alias: str, collection: str) -> None:
+        """Atomically make an alias refer to another collection."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO aliases (alias, collection, updated_at) VALUES (?, ?, ?)",
+                (alias, collection, datetime.now().isoformat(timespec="seconds"))
+            )
@@ -0,0 +1,379 @@
+"""Chunking strategies: turn a document's extracted pages into chunks for RAG."""
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src import config
+from src.token_counter import load_token_counter
+
+
+@dataclass
+class DocumentChunk:
+    """Represents a chunk of text from a document."""
+    text: str
+    metadata: Dict[str, Any]
+    chunk_id: str
+
+
+def document_key(metadata: Dict[str, Any]) -> str:
+    """
+    Identify the document a chunk came from.
+
+    Files at the top of the PDF directory keep their plain name; files in a
+    subject folder are prefixed with it so equal names in different folders
+    don't collide.
+    """
+    subject = metadata.get('subject', 'general')
+    if subject == "general":
+        return metadata['source']
+    return f"{subject}/{metadata['source']}"
+
+
+def page_metadata(page_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Metadata every chunk inherits from the page it starts on."""
+    return {
+        'source': page_data['source'],
+        'page_number': page_data['page_number'],
+        'total_pages': page_data['total_pages'],
+        'subject': page_data['subject']
+    }
+
+
+# Words after which a period does not end a sentence
+ABBREVIATIONS = {
+    "al", "cf", "ch", "def", "dr", "e.g", "eq", "eqs", "etc", "fig", "i.e", "lem", "mr", "mrs",
+    "no", "prof", "prop", "resp", "sec", "thm", "vol", "vs"
+}
+SENTENCE_BREAK = re.compile(r"[.!?][\"')\]]*\s+|\n\s*\n")
+# Keywords match in any case but must start with a capital; a numbered heading needs a capitalized
+# title, and a labelled block needs punctuation or a title after its number ("Example 3 shows" is prose)
+HEADING = re.compile(
+    r"^(?:(?=[A-Z])(?i:chapter|section|part|lecture|appendix)\s+(?:\d+(?:\.\d+)*|[IVXLC]+)\b(?!\s+[a-z])"
+    r"|\d+(?:\.\d+)*\.?\s+[A-Z]"
+    r"|(?=[A-Z])(?i:definition|theorem|lemma|corollary|proposition|example|exercise|algorithm)\b"
+    r"(?:\s+\d+(?:\.\d+)*)?\.?\s*(?:[(:]|[A-Z]|$))"
+)
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences and paragraphs.
+
+    A period only ends a sentence when it is followed by whitespace and an
+    uppercase letter, digit or opening bracket, and does not close a known
+    abbreviation or a single-letter initial, so "e.g. x", "3.14" and
+    "A. Turing" stay intact.
+    """
+    sentences = []
+    start = 0
+    for match in SENTENCE_BREAK.finditer(text):
+        end = match.end()
+        if match.group()[0] in ".!?":
+            following = text[end:end + 1]
+            if not (following.isupper() or following.isdigit() or following in "\"'(["):
+                continue
+            words = text[start:match.start()].split()
+            last_word = words[-1].lower().lstrip("([") if words else ""
+            if last_word in ABBREVIATIONS or (len(last_word) == 1 and last_word.isalpha()):
+                continue
+
+        sentence = text[start:end].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = end
+
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+class Chunker(ABC):
+    """Base class for chunking strategies."""
+
+    name = ""
+
+    def __init__(self, chunk_size: int, chunk_overlap: int):
+        """
+        Initialize the chunker.
+
+        Args:
+            chunk_size: Target chunk size (characters, or tokens for TokenChunker)
+            chunk_overlap: Amount of text repeated at the start of the next chunk
+        """
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    @abstractmethod
+    def chunk_pages(self, pages: Iterable[Dict[str, Any]]) -> Iterator[DocumentChunk]:
+        """
+        Chunk one document's pages.
+
+        Args:
+            pages: Page dicts from iter_pages, in page order
+
+        Yields:
+            DocumentChunk objects
+        """
+
+
+class CharacterChunker(Chunker):
+    """Fixed-size character window within each page (simple & fast)."""
+
+    name = "character"
+
+    def chunk_text(self, text: str, metadata: Dict[str, Any]) -> List[DocumentChunk]:
+        """
+        Split text into overlapping chunks.
+
+        Args:
+            text: The text to chunk
+            metadata: Metadata to attach to each chunk
+
+        Returns:
+            List of DocumentChunk objects
+        """
+        chunks = []
+        text_length = len(text)
+        chunk_num = 0
+
+        # Simple sliding window - much faster than sentence detection
+        start = 0
+        while start < text_length:
+            end = min(start + self.chunk_size, text_length)
+            chunk_text = text[start:end].strip()
+
+            if chunk_text and len(chunk_text) > 50:  # Skip tiny chunks
+                chunk_id = f"{document_key(metadata)}_page{metadata['page_number']}_chunk{chunk_num}"
+
+                chunk_metadata = {
+                    **metadata,
+                    'chunk_id': chunk_id,
+                    'chunk_index': chunk_num,
+                    'char_start': start,
+                    'char_end': end
+                }
+
+                chunks.append(DocumentChunk(
+                    text=chunk_text,
+                    metadata=chunk_metadata,
+                    chunk_id=chunk_id
+                ))
+
+                chunk_num += 1
+
+            # Move to next chunk with overlap
+            start = end - self.chunk_overlap if end < text_length else text_length
+
+        return chunks
+
+    def chunk_pages(self, pages: Iterable[Dict[str, Any]]) -> Iterator[DocumentChunk]:
+        """Chunk each page on its own."""
+        for page_data in pages:
+            yield from self.chunk_text(page_data['text'], page_metadata(page_data))
+
+
+class SentenceChunker(Chunker):
+    """
+    Pack whole sentences into chunks of up to chunk_size.
+
+    Chunks carry on across page breaks, so a definition that starts at the
+    bottom of one page and ends on the next stays in one chunk. Sentences
+    longer than a chunk are split between words. The overlap is made of
+    whole sentences from the end of the previous chunk.
+    """
+
+    name = "sentence"
+
+    def size(self, text: str) -> int:
+        """Size of a piece of text in this chunker's unit."""
+        return len(text) + 1  # Plus the joining space
+
+    def units(self, text: str) -> List[Tuple[str, bool]]:
+        """Split page text into (unit, starts_section) pieces."""
+        return [(sentence, False) for sentence in split_sentences(text)]
+
+    def _fit(self, unit: str) -> List[str]:
+        """Split a unit that is larger than a chunk between words."""
+        if self.size(unit) <= self.chunk_size:
+            return [unit]
+
+        pieces, words, size = [], [], 0
+        for word in unit.split():
+            word_size = self.size(word)
+            if words and size + word_size > self.chunk_size:
+                pieces.append(" ".join(words))
+                words, size = [], 0
+            words.append(word)
+            size += word_size
+        if words:
+            pieces.append(" ".join(words))
+        return pieces
+
+    def _overlap(self, buffer: List[Tuple[str, int, Dict[str, Any], str]]) -> List[Tuple[str, int, Dict[str, Any], str]]:
+        """Trailing units of a chunk that fit in the overlap."""
+        carried, size = [], 0
+        for item in reversed(buffer[1:]):
+            if size + item[1] > self.chunk_overlap:
+                break
+            carried.insert(0, item)
+            size += item[1]
+        return carried
+
+    def _make_chunk(self, buffer, counters: Dict[int, int]) -> Optional[DocumentChunk]:
+        """Build a chunk from buffered units, numbered per starting page."""
+        text = " ".join(item[0] for item in buffer)
+        if len(text) <= 50:  # Skip tiny chunks
+            return None
+
+        first_meta, last_meta, section = buffer[0][2], buffer[-1][2], buffer[0][3]
+        page = first_meta['page_number']
+        chunk_num = counters.get(page, 0)
+        counters[page] = chunk_num + 1
+
+        chunk_id = f"{document_key(first_meta)}_page{page}_chunk{chunk_num}"
+        metadata = {
+            **first_meta,
+            'chunk_id': chunk_id,
+            'chunk_index': chunk_num,
+            'page_end': last_meta['page_number'],
+            'strategy': self.name
+        }
+        if section:
+            metadata['section'] = section
+        return DocumentChunk(text=text, metadata=metadata, chunk_id=chunk_id)
+
+    def chunk_pages(self, pages: Iterable[Dict[str, Any]]) -> Iterator[DocumentChunk]:
+        """Pack sentences into chunks, continuing across pages."""
+        buffer: List[Tuple[str, int, Dict[str, Any], str]] = []  # (unit, size, page metadata, section)
+        size = 0
+        fresh = 0  # Buffered units not yet part of an emitted chunk
+        counters: Dict[int, int] = {}
+        section = ""
+
+        for page_data in pages:
+            meta = page_metadata(page_data)
+            for unit, starts_section in self.units(page_data['text']):
+                if starts_section:
+                    # Close the previous section unless it is only a stray line
+                    if fresh and len(" ".join(item[0] for item in buffer)) > 50:
+                        chunk = self._make_chunk(buffer, counters)
+                        if chunk:
+                            yield chunk
+                        buffer, size, fresh = [], 0, 0
+                    elif not fresh:
+                        buffer, size = [], 0  # No overlap from the previous section
+                    section = unit[:80]
+
+                for piece in self._fit(unit):
+                    piece_size = self.size(piece)
+                    if fresh and size + piece_size > self.chunk_size:
+                        chunk = self._make_chunk(buffer, counters)
+                        if chunk:
+                            yield chunk
+                        buffer, fresh = self._overlap(buffer), 0
+                        size = sum(item[1] for item in buffer)
+
+                    # Drop overlap that would leave no room for new text
+                    while buffer and size + piece_size > self.chunk_size:
+                        size -= buffer.pop(0)[1]
+
+                    buffer.append((piece, piece_size, meta, section))
+                    size += piece_size
+                    fresh += 1
+
+        if fresh:
+            chunk = self._make_chunk(buffer, counters)
+            if chunk:
+                yield chunk
+
+
+class SectionChunker(SentenceChunker):
+    """
+    Sentence packing that starts a new chunk at every heading.
+
+    Numbered headings ("2.3 Reductions"), chapter/lecture titles and
+    Definition/Theorem/Lemma blocks begin a section; chunks never span two
+    sections and record the heading in their "section" metadata.
+    """
+
+    name = "section"
+
+    def units(self, text: str) -> List[Tuple[str, bool]]:
+        """Split page text into sentences, flagging the first one of each heading line."""
+        units = []
+        block: List[str] = []
+
+        def flush():
+            units.extend((sentence, False) for sentence in split_sentences("\n".join(block)))
+            block.clear()
+
+        for line in text.splitlines():
+            if HEADING.match(line.strip()):
+                flush()
+                sentences = split_sentences(line)
+                units.extend((sentence, i == 0) for i, sentence in enumerate(sentences))
+            else:
+                block.append(line)
+        flush()
+        return units
+
+
+class TokenChunker(SentenceChunker):
+    """
+    Sentence packing measured in embedding-model tokens.
+
+    chunk_size is a token count, so every chunk fits the model's input
+    window exactly instead of being truncated or underfilled.
+    """
+
+    name = "token"
+
+    def __init__(self, chunk_size: int, chunk_overlap: int, count_tokens: Optional[Callable[[str], int]] = None):
+        """
+        Initialize the chunker.
+
+        Args:
+            chunk_size: Maximum tokens per chunk (excluding special tokens)
+            chunk_overlap: Tokens repeated at the start of the next chunk
+            count_tokens: Token counter (default: the embedding model's tokenizer)
+        """
+        super().__init__(chunk_size, chunk_overlap)
+        self._count_tokens = count_tokens
+
+    def size(self, text: str) -> int:
+        """Number of tokens in text."""
+        if self._count_tokens is None:
+            self._count_tokens = load_token_counter(config.EMBEDDING_MODEL)
+        return self._count_tokens(text)
+
+
+CHUNKERS = {
+    "character": CharacterChunker,
+    "sentence": SentenceChunker,
+    "section": SectionChunker,
+    "token": TokenChunker,
+}
+
+
+def make_chunker(strategy: str, chunk_size: int, chunk_overlap: int) -> Chunker:
+    """
+    Create a chunker by name.
+
+    The token strategy is sized by CHUNK_TOKENS / CHUNK_TOKEN_OVERLAP
+    instead of the character settings.
+
+    Args:
+        strategy: One of CHUNKERS
+        chunk_size: Chunk size in characters
+        chunk_overlap: Overlap in characters
+
+    Returns:
+        Chunker
+    """
+    if strategy not in CHUNKERS:
+        raise ValueError(f"Unknown chunking strategy: {strategy} (expected one of {', '.join(CHUNKERS)})")
+    if strategy == "token":
+        return TokenChunker(config.CHUNK_TOKENS, config.CHUNK_TOKEN_OVERLAP)
+    return CHUNKERS[strategy](chunk_size, chunk_overlap)
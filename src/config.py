@@ -12,6 +12,7 @@ DATA_DIR = PROJECT_ROOT / "data"
 PDF_DIR = DATA_DIR / "pdfs"
 VECTORDB_DIR = DATA_DIR / "vectordb"
 CACHE_DIR = DATA_DIR / "cache"
+MODELS_DIR = DATA_DIR / "models"
 
 # API Keys (not needed for free local stack, but kept for compatibility)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -26,22 +27,77 @@ OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 
 # LLM Parameters
 TEMPERATURE = float(os.getenv("TEMPERATURE", "0.1"))
-MAX_TOKENS = int(os.getenv("MAX_TOKENS", "4096"))
+MAX_TOKENS = int(os.getenv("MAX_TOKENS", "4096"))  # LLM context window (prompt + answer)
+ANSWER_TOKENS = int(os.getenv("ANSWER_TOKENS", "1024"))  # Part of the window kept free for the answer
+CONTEXT_TOKENS = int(os.getenv("CONTEXT_TOKENS", "0"))  # Cap on source tokens in the prompt (0 = what fits)
+LLM_TOKENIZER = os.getenv("LLM_TOKENIZER", "")  # Hugging Face repo with the LLM's tokenizer (empty = estimate)
 
 # Vector DB Settings
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")  # "torch" (sentence-transformers) or "onnx"
+EMBEDDING_QUANTIZE = os.getenv("EMBEDDING_QUANTIZE", "false").lower() == "true"  # int8 weights (ONNX backend)
+EMBEDDING_TOKEN_BUDGET = int(os.getenv("EMBEDDING_TOKEN_BUDGET", "8192"))  # Padded tokens per encoder batch
+EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "256"))  # Texts per encoder batch
+EMBEDDING_AUTOTUNE = os.getenv("EMBEDDING_AUTOTUNE", "true").lower() == "true"  # Tune the budget when ingesting
+EMBEDDING_AUTOTUNE_SAMPLE = int(os.getenv("EMBEDDING_AUTOTUNE_SAMPLE", "256"))  # Chunks timed by autotune
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
 CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
+CHUNK_STRATEGY = os.getenv("CHUNK_STRATEGY", "sentence")  # character, sentence, section or token
+CHUNK_STRATEGY_BY_SUBJECT = dict(  # e.g. "math:section,logic:token"
+    item.split(":", 1) for item in os.getenv("CHUNK_STRATEGY_BY_SUBJECT", "").replace(" ", "").split(",") if ":" in item
+)
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "250"))  # Token strategy chunk size (model limit is 256)
+CHUNK_TOKEN_OVERLAP = int(os.getenv("CHUNK_TOKEN_OVERLAP", "32"))
+
+# Ingestion Settings
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(min(4, os.cpu_count() or 1))))  # PDF extraction processes
+PAGES_PER_SHARD = int(os.getenv("PAGES_PER_SHARD", "50"))  # Large PDFs are split into page ranges
+INGEST_STAGED = os.getenv("INGEST_STAGED", "false").lower() == "true"  # Build updates in a full index copy
+
+# Vector Store Settings
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")  # chroma (HNSW) or numpy (exact, memory-mapped)
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none")  # none or int8 (numpy backend; 4x smaller scan)
+QUANTIZATION_RESCORE = int(os.getenv("QUANTIZATION_RESCORE", "4"))  # Candidates re-scored in float32 per result
+SHARD_BY_SUBJECT = os.getenv("SHARD_BY_SUBJECT", "true").lower() == "true"  # One index per subject
+SHARD_SEARCH_WORKERS = int(os.getenv("SHARD_SEARCH_WORKERS", "4"))  # Shards searched in parallel
+DISTANCE_METRIC = os.getenv("DISTANCE_METRIC", "cosine")  # cosine, ip or l2 (embeddings are unit length)
+HNSW_M = int(os.getenv("HNSW_M", "16"))  # Graph links per vector (higher = better recall, more memory)
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))  # Candidate list size while building
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))  # Candidate list size per query (recall vs latency)
 
 # Retrieval Settings
 RELEVANCE_THRESHOLD = float(os.getenv("RELEVANCE_THRESHOLD", "0.3"))  # Minimum relevance score (0-1)
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"  # Fuse BM25 keyword and dense results
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))  # Results taken from each retriever before fusion
+RRF_K = int(os.getenv("RRF_K", "60"))  # Reciprocal rank fusion constant
+MMR_ENABLED = os.getenv("MMR_ENABLED", "true").lower() == "true"  # Diversify results (maximal marginal relevance)
+MMR_CANDIDATES = int(os.getenv("MMR_CANDIDATES", "20"))  # Results to choose the diverse set from
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))  # 1.0 = relevance only, 0.0 = diversity only
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"  # Cross-encoder re-ranking
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))  # Results re-scored per question
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))  # Pairs per cross-encoder call
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "300"))  # Keep retrieval order if exceeded
+RERANK_MIN_SCORE = float(os.getenv("RERANK_MIN_SCORE", "0.0"))  # Drop chunks below this relevance probability (0-1)
 
 # Search Settings
 SEARCH_ENGINE = os.getenv("SEARCH_ENGINE", "duckduckgo")
 
+# API Concurrency Settings
+ASK_CONCURRENCY = int(os.getenv("ASK_CONCURRENCY", "2"))  # Questions answered at the same time
+ASK_QUEUE_LIMIT = int(os.getenv("ASK_QUEUE_LIMIT", "8"))  # Extra questions allowed to wait (429 beyond)
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "2"))  # Threads for query embedding
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))  # LLM calls in flight per batch
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "1000"))  # Largest /api/ask/batch request
+
 # Application Settings
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "512"))  # On-disk embedding cache limit
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))  # Cached query embeddings / retrievals
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))  # Cached answers
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))  # Near-duplicate threshold
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))  # Seconds
 
 
 def validate_config():
@@ -78,4 +134,5 @@ if __name__ == "__main__":
     print(f"\n📊 Vector DB Settings:")
     print(f"  Embedding model: {EMBEDDING_MODEL}")
     print(f"  Chunk size: {CHUNK_SIZE}")
-    print(f"  Chunk overlap: {CHUNK_OVERLAP}")
\ No newline at end of file
+    print(f"  Chunk overlap: {CHUNK_OVERLAP}")
+    print(f"  Chunk strategy: {CHUNK_STRATEGY}")
\ No newline at end of file
@@ -1,31 +1,127 @@
 """Document processing: Extract and chunk PDFs for RAG."""
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Iterator, Optional
 import pdfplumber
-from dataclasses import dataclass
 from tqdm import tqdm
+from src import config
+from src.chunking import Chunker, CharacterChunker, DocumentChunk, document_key, make_chunker
+
+
+def detect_subject(pdf_path: Path) -> str:
+    """
+    Detect subject from folder structure.
+
+    If PDF is in data/pdfs/subject_name/file.pdf, subject = subject_name.
+    If PDF is in data/pdfs/file.pdf, subject = "general".
+    """
+    parent_folder = pdf_path.parent.name
+    return "general" if parent_folder == "pdfs" else parent_folder
+
+
+def count_pages(pdf_path: Path) -> int:
+    """Return the number of pages in a PDF (0 if it cannot be opened)."""
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            return len(pdf.pages)
+    except Exception as e:
+        print(f"Error opening {pdf_path.name}: {e}")
+        return 0
+
+
+def iter_pages(pdf_path: Path, first_page: int = 1, last_page: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield page dicts one at a time.
+
+    Each page's parsed layout objects are released after its text is read,
+    so memory stays flat however long the document is. Errors propagate.
+
+    Args:
+        pdf_path: Path to the PDF file
+        first_page: First page number (1-based, inclusive)
+        last_page: Last page number (1-based, inclusive); default: last page
+
+    Yields:
+        Page dicts with text and metadata, skipping pages without text
+    """
+    subject = detect_subject(pdf_path)
+
+    with pdfplumber.open(pdf_path) as pdf:
+        total_pages = len(pdf.pages)
+        last_page = total_pages if last_page is None else min(last_page, total_pages)
+
+        for page_num in range(first_page, last_page + 1):
+            page = pdf.pages[page_num - 1]
+            text = page.extract_text()
+            page.close()  # Drop cached layout objects
+
+            if text and text.strip():  # Only include pages with text
+                yield {
+                    'text': text,
+                    'page_number': page_num,
+                    'source': pdf_path.name,
+                    'total_pages': total_pages,
+                    'subject': subject
+                }
+
+
+def extract_page_range(pdf_path: Path, first_page: int, last_page: int) -> List[Dict[str, Any]]:
+    """
+    Extract text from a range of pages.
+
+    Module-level so it can run in a process pool worker.
+
+    Args:
+        pdf_path: Path to the PDF file
+        first_page: First page number (1-based, inclusive)
+        last_page: Last page number (1-based, inclusive)
 
-@dataclass
-class DocumentChunk:
-    """Represents a chunk of text from a document."""
-    text: str
-    metadata: Dict[str, Any]
-    chunk_id: str
+    Returns:
+        List of page dicts, same format as PDFProcessor.extract_text_from_pdf
+
+    Raises:
+        RuntimeError: If the pages cannot be read, so the file is not
+            recorded as ingested with pages missing
+    """
+    try:
+        return list(iter_pages(pdf_path, first_page, last_page))
+    except Exception as e:
+        raise RuntimeError(f"Error processing {pdf_path.name} (pages {first_page}-{last_page}): {e}") from e
 
 
 class PDFProcessor:
     """Process PDF documents into chunks suitable for RAG."""
 
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, strategy: Optional[str] = None,
+                 subject_strategies: Optional[Dict[str, str]] = None):
         """
         Initialize PDF processor.
 
         Args:
             chunk_size: Target size for each chunk in characters
             chunk_overlap: Number of characters to overlap between chunks
+            strategy: Chunking strategy (default: config.CHUNK_STRATEGY)
+            subject_strategies: Subject -> strategy overrides (default: config.CHUNK_STRATEGY_BY_SUBJECT)
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.strategy = strategy or config.CHUNK_STRATEGY
+        self.subject_strategies = config.CHUNK_STRATEGY_BY_SUBJECT if subject_strategies is None else subject_strategies
+        self._chunkers: Dict[str, Chunker] = {}
+
+    def chunker_for(self, subject: str) -> Chunker:
+        """
+        Chunker used for documents of a subject.
+
+        Args:
+            subject: Subject name
+
+        Returns:
+            Chunker for the subject's strategy
+        """
+        strategy = self.subject_strategies.get(subject, self.strategy)
+        if strategy not in self._chunkers:
+            self._chunkers[strategy] = make_chunker(strategy, self.chunk_size, self.chunk_overlap)
+        return self._chunkers[strategy]
 
     def extract_text_from_pdf(self, pdf_path: Path) -> List[Dict[str, Any]]:
         """
@@ -37,42 +133,16 @@ class PDFProcessor:
         Returns:
             List of dicts with text and metadata for each page
         """
-        pages_data = []
-
-        # Detect subject from folder structure
-        # If PDF is in data/pdfs/subject_name/file.pdf, subject = subject_name
-        # If PDF is in data/pdfs/file.pdf, subject = "general"
-        parent_folder = pdf_path.parent.name
-        if parent_folder == "pdfs":
-            subject = "general"
-        else:
-            subject = parent_folder
-
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                total_pages = len(pdf.pages)
-
-                # ADD PROGRESS BAR HERE
-                for page_num, page in enumerate(tqdm(pdf.pages, desc="Extracting pages", unit="page"), start=1):
-                    text = page.extract_text()
-
-                    if text and text.strip():  # Only include pages with text
-                        pages_data.append({
-                            'text': text,
-                            'page_number': page_num,
-                            'source': pdf_path.name,
-                            'total_pages': total_pages,
-                            'subject': subject
-                        })
+            total_pages = count_pages(pdf_path)
+            return list(tqdm(iter_pages(pdf_path), total=total_pages, desc="Extracting pages", unit="page"))
         except Exception as e:
             print(f"Error processing {pdf_path.name}: {e}")
             return []
 
-        return pages_data
-
     def chunk_text(self, text: str, metadata: Dict[str, Any]) -> List[DocumentChunk]:
         """
-        Split text into overlapping chunks (simple & fast).
+        Split text into overlapping fixed-size character chunks.
 
         Args:
             text: The text to chunk
@@ -81,39 +151,7 @@ class PDFProcessor:
         Returns:
             List of DocumentChunk objects
         """
-        chunks = []
-        text_length = len(text)
-        chunk_num = 0
-
-        # Simple sliding window - much faster than sentence detection
-        start = 0
-        while start < text_length:
-            end = min(start + self.chunk_size, text_length)
-            chunk_text = text[start:end].strip()
-
-            if chunk_text and len(chunk_text) > 50:  # Skip tiny chunks
-                chunk_id = f"{metadata['source']}_page{metadata['page_number']}_chunk{chunk_num}"
-
-                chunk_metadata = {
-                    **metadata,
-                    'chunk_id': chunk_id,
-                    'chunk_index': chunk_num,
-                    'char_start': start,
-                    'char_end': end
-                }
-
-                chunks.append(DocumentChunk(
-                    text=chunk_text,
-                    metadata=chunk_metadata,
-                    chunk_id=chunk_id
-                ))
-
-                chunk_num += 1
-
-            # Move to next chunk with overlap
-            start = end - self.chunk_overlap if end < text_length else text_length
-
-        return chunks
+        return CharacterChunker(self.chunk_size, self.chunk_overlap).chunk_text(text, metadata)
 
     def process_pdf(self, pdf_path: Path) -> List[DocumentChunk]:
         """
@@ -136,47 +174,114 @@ class PDFProcessor:
 
         print(f"  Extracted {len(pages)} pages")
 
-        # Chunk each page
-        all_chunks = []
-        for page_data in tqdm(pages, desc="Chunking pages", unit="page"):
-            page_text = page_data['text']
-            page_metadata = {
-                'source': page_data['source'],
-                'page_number': page_data['page_number'],
-                'total_pages': page_data['total_pages'],
-                'subject': page_data['subject']
-            }
-
-            chunks = self.chunk_text(page_text, page_metadata)
-            all_chunks.extend(chunks)
+        all_chunks = self.chunk_pages(pages)
 
         print(f"  Created {len(all_chunks)} chunks")
         return all_chunks
 
-    def process_directory(self, directory: Path) -> List[DocumentChunk]:
+    def plan_shards(self, pdf_path: Path, pages_per_shard: int = 50) -> List[Tuple[Path, int, int]]:
         """
-        Process all PDFs in a directory.
+        Split a PDF into page ranges for parallel extraction.
 
         Args:
-            directory: Path to directory containing PDFs
+            pdf_path: Path to PDF file
+            pages_per_shard: Maximum pages per range
 
         Returns:
-            List of all DocumentChunk objects
+            List of (pdf_path, first_page, last_page) tuples, 1-based inclusive
+        """
+        total_pages = count_pages(pdf_path)
+        return [
+            (pdf_path, first, min(first + pages_per_shard - 1, total_pages))
+            for first in range(1, total_pages + 1, pages_per_shard)
+        ]
+
+    def chunk_pages(self, pages: List[Dict[str, Any]]) -> List[DocumentChunk]:
+        """
+        Chunk one document's extracted pages.
+
+        Pages are chunked in page-number order, so chunk IDs are the same no
+        matter in which order the pages were extracted, and chunks can
+        continue across page breaks.
+
+        Args:
+            pages: Page dicts from extract_text_from_pdf / extract_page_range
+
+        Returns:
+            List of DocumentChunk objects
+        """
+        if not pages:
+            return []
+
+        chunker = self.chunker_for(pages[0]['subject'])
+        ordered = sorted(pages, key=lambda p: p['page_number'])
+        return list(chunker.chunk_pages(tqdm(ordered, desc="Chunking pages", unit="page")))
+
+    def iter_chunks(self, pdf_path: Path) -> Iterator[DocumentChunk]:
+        """
+        Stream a PDF's chunks page by page.
+
+        Only the current page and the chunk being filled are held in memory,
+        so a consumer that embeds and stores chunks as they arrive uses the
+        same memory for a 1,500-page book as for a 10-page handout. Chunk IDs
+        match process_pdf.
+
+        Args:
+            pdf_path: Path to PDF file
+
+        Yields:
+            DocumentChunk objects in page order
+
+        Raises:
+            RuntimeError: If a page cannot be read; the chunks already yielded
+                are an incomplete document
+        """
+        total_pages = count_pages(pdf_path)
+        chunker = self.chunker_for(detect_subject(pdf_path))
+        try:
+            pages = tqdm(iter_pages(pdf_path), total=total_pages, desc="Extracting pages", unit="page")
+            yield from chunker.chunk_pages(pages)
+        except Exception as e:
+            raise RuntimeError(f"Error processing {pdf_path.name}: {e}") from e
+
+    def iter_directory(self, directory: Path) -> Iterator[DocumentChunk]:
+        """
+        Stream the chunks of all PDFs in a directory, one PDF after another.
+
+        Args:
+            directory: Path to directory containing PDFs
+
+        Yields:
+            DocumentChunk objects
         """
         pdf_files = list(directory.glob("*.pdf"))
 
         if not pdf_files:
             print(f"No PDF files found in {directory}")
-            return []
+            return
 
         print(f"\nProcessing {len(pdf_files)} PDF files...\n")
 
-        all_chunks = []
-        for pdf_path in tqdm(pdf_files, desc="Processing PDFs", unit="file"):
-            chunks = self.process_pdf(pdf_path)
-            all_chunks.extend(chunks)
+        for pdf_path in pdf_files:
+            print(f"Processing: {pdf_path.name}")
+            yield from self.iter_chunks(pdf_path)
+
+    def process_directory(self, directory: Path) -> List[DocumentChunk]:
+        """
+        Process all PDFs in a directory.
+
+        Holds every chunk in memory; use iter_directory to stream instead.
+
+        Args:
+            directory: Path to directory containing PDFs
+
+        Returns:
+            List of all DocumentChunk objects
+        """
+        all_chunks = list(self.iter_directory(directory))
 
-        print(f"\n✅ Total chunks created: {len(all_chunks)}")
+        if all_chunks:
+            print(f"\n✅ Total chunks created: {len(all_chunks)}")
         return all_chunks
 
 
@@ -0,0 +1,211 @@
+"""Persistent on-disk cache of text embeddings."""
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict
+
+import numpy as np
+
+KEY_BYTES = 32  # SHA-256 of the text, stored beside each slot
+
+
+class EmbeddingCache:
+    """
+    Embedding cache for one model, keyed by a hash of the normalized text.
+
+    Vectors live in a memory-mapped float32 file (one row per slot); a
+    SQLite index maps text hashes to slots and tracks last use. When the
+    cache reaches its size limit the least recently used entries are evicted
+    and their slots reused. Each slot's key hash is also stored beside it,
+    so a reader whose slot was reused by another process meanwhile sees a
+    miss instead of the wrong vector.
+    """
+
+    def __init__(self, cache_dir: Path, model_name: str, dimension: int, max_bytes: int):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Base cache directory
+            model_name: Embedding model; each model gets its own cache
+            dimension: Embedding dimension
+            max_bytes: Size limit for the vector file
+        """
+        self.dimension = dimension
+        self.max_entries = max(1, max_bytes // (dimension * 4))
+        self.dir = Path(cache_dir) / "embeddings" / re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.dir / "vectors.f32"
+        self.keys_path = self.dir / "keys.bin"
+        self.index_path = self.dir / "index.sqlite3"
+
+        self._lock = threading.Lock()
+        self._vectors = None
+        self._keys = None
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    slot INTEGER NOT NULL UNIQUE,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+            conn.execute("CREATE TABLE IF NOT EXISTS free_slots (slot INTEGER PRIMARY KEY)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('next_slot', 0)")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection; use as a context manager for one transaction."""
+        return sqlite3.connect(self.index_path, timeout=30)
+
+    @staticmethod
+    def text_key(text: str) -> str:
+        """Hash of the text with whitespace normalized."""
+        normalized = " ".join(text.split())
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def _ensure_capacity(self, rows: int) -> np.memmap:
+        """Map the vector and key files, growing them so that they hold at least ``rows`` rows."""
+        row_bytes = self.dimension * 4
+        mapped = 0 if self._vectors is None else self._vectors.shape[0]
+        if rows <= mapped:
+            return self._vectors
+
+        on_disk = self.vectors_path.stat().st_size // row_bytes if self.vectors_path.exists() else 0
+        capacity = on_disk
+        if capacity < rows:
+            capacity = min(self.max_entries, max(rows, 2 * capacity, 1024))
+            with self.vectors_path.open("ab") as f:
+                f.truncate(capacity * row_bytes)
+        with self.keys_path.open("ab") as f:
+            if f.tell() < capacity * KEY_BYTES:
+                f.truncate(capacity * KEY_BYTES)
+
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+        self._keys = np.memmap(self.keys_path, dtype=np.uint8, mode="r+", shape=(capacity, KEY_BYTES))
+        return self._vectors
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up cached embeddings.
+
+        Args:
+            keys: Text keys from text_key
+
+        Returns:
+            Dict of key -> embedding for the keys that were found
+        """
+        slots = {}
+        unique_keys = list(dict.fromkeys(keys))
+        # Looked up and read under one lock, so put_many in this process can't reuse a slot in between
+        with self._lock, self._connect() as conn:
+            for i in range(0, len(unique_keys), 500):
+                batch = unique_keys[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT key, slot FROM entries WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                slots.update(rows)
+
+            if not slots:
+                return {}
+
+            now = time.time()
+            conn.executemany("UPDATE entries SET last_used = ? WHERE key = ?", [(now, k) for k in slots])
+
+            vectors = self._ensure_capacity(max(slots.values()) + 1)
+            found = {}
+            for key, slot in slots.items():
+                vector = np.array(vectors[slot])
+                # Another process may have reused the slot since the lookup
+                if np.array_equal(self._keys[slot], np.frombuffer(bytes.fromhex(key), dtype=np.uint8)):
+                    found[key] = vector
+            return found
+
+    def put_many(self, keys: List[str], embeddings: np.ndarray) -> None:
+        """
+        Store embeddings, evicting least recently used entries if full.
+
+        Args:
+            keys: Text keys from text_key
+            embeddings: Array of shape (len(keys), dimension)
+        """
+        new = {}
+        for key, embedding in zip(keys, embeddings):
+            new.setdefault(key, embedding)
+
+        with self._lock, self._connect() as conn:
+            existing = set()
+            pending = list(new)
+            for i in range(0, len(pending), 500):
+                batch = pending[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT key FROM entries WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                existing.update(row[0] for row in rows)
+
+            new_keys = [key for key in pending if key not in existing][-self.max_entries:]
+            if not new_keys:
+                return
+
+            slots = self._allocate_slots(conn, len(new_keys))
+
+            vectors = self._ensure_capacity(max(slots) + 1)
+            # Readers accept a slot only if its key matches after reading the vector,
+            # so the key is cleared while the vector is being replaced
+            for key, slot in zip(new_keys, slots):
+                self._keys[slot] = 0
+                vectors[slot] = new[key]
+                self._keys[slot] = np.frombuffer(bytes.fromhex(key), dtype=np.uint8)
+            vectors.flush()
+            self._keys.flush()
+
+            now = time.time()
+            conn.executemany(
+                "INSERT INTO entries (key, slot, last_used) VALUES (?, ?, ?)",
+                [(key, slot, now) for key, slot in zip(new_keys, slots)]
+            )
+
+    def _allocate_slots(self, conn: sqlite3.Connection, count: int) -> List[int]:
+        """Take free slots, then unused ones, then evict the least recently used."""
+        slots = [row[0] for row in conn.execute("SELECT slot FROM free_slots LIMIT ?", (count,))]
+        conn.executemany("DELETE FROM free_slots WHERE slot = ?", [(s,) for s in slots])
+
+        next_slot = conn.execute("SELECT value FROM meta WHERE name = 'next_slot'").fetchone()[0]
+        take = min(count - len(slots), self.max_entries - next_slot)
+        if take > 0:
+            slots.extend(range(next_slot, next_slot + take))
+            conn.execute("UPDATE meta SET value = ? WHERE name = 'next_slot'", (next_slot + take,))
+
+        missing = count - len(slots)
+        if missing > 0:
+            # Evict a little more than needed so the next inserts don't evict again
+            evict = max(missing, self.max_entries // 10)
+            rows = conn.execute(
+                "SELECT key, slot FROM entries ORDER BY last_used LIMIT ?", (evict,)
+            ).fetchall()
+            conn.executemany("DELETE FROM entries WHERE key = ?", [(row[0],) for row in rows])
+
+            freed = [row[1] for row in rows]
+            slots.extend(freed[:missing])
+            conn.executemany("INSERT INTO free_slots (slot) VALUES (?)", [(s,) for s in freed[missing:]])
+
+        return slots
+
+    def __len__(self) -> int:
+        """Number of cached embeddings."""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def clear(self) -> None:
+        """Remove all cached embeddings."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM free_slots")
+            conn.execute("UPDATE meta SET value = 0 WHERE name = 'next_slot'")
@@ -1,41 +1,445 @@
-"""Local embedding generation using sentence-transformers."""
-from typing import List
-from sentence_transformers import SentenceTransformer
+"""Local embedding generation using sentence-transformers or ONNX Runtime."""
+import re
+import json
+import time
+from pathlib import Path
+from typing import List, Dict, Sequence, Optional
+import numpy as np
+from tqdm import tqdm
 from src import config
+from src.embedding_cache import EmbeddingCache
+
+
+def onnx_model_dir(model_name: str) -> Path:
+    """Directory holding the ONNX export of a sentence-transformer model."""
+    return config.MODELS_DIR / "onnx" / re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+
+
+def export_onnx(model_name: str, output_dir: Path, quantize: bool = True) -> Path:
+    """
+    Export a sentence-transformer model to ONNX.
+
+    Only the transformer is exported; pooling and normalization are done in
+    numpy by OnnxEncoder, using the settings saved in encoder.json. This is
+    the only step that needs PyTorch.
+
+    Args:
+        model_name: Name of the sentence-transformer model
+        output_dir: Directory to write model.onnx, tokenizer.json and encoder.json to
+        quantize: Also write model.int8.onnx with dynamically quantized int8 weights
+
+    Returns:
+        The output directory
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    st_model.eval()
+    transformer = st_model[0].auto_model
+    tokenizer = st_model.tokenizer
+
+    pooling = next((m for m in st_model if isinstance(m, Pooling)), None)
+    if pooling is None:
+        raise ValueError(f"{model_name} has no pooling layer")
+    pooling_config = pooling.get_config_dict()
+    if pooling_config.get("pooling_mode_cls_token"):
+        pooling_mode = "cls"
+    elif pooling_config.get("pooling_mode_max_tokens"):
+        pooling_mode = "max"
+    elif pooling_config.get("pooling_mode_mean_tokens"):
+        pooling_mode = "mean"
+    else:
+        raise ValueError(f"Unsupported pooling for ONNX export: {pooling_config}")
+
+    sample = tokenizer(["An example sentence for tracing."], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs)))[0]
+
+    model_path = output_dir / "model.onnx"
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(transformer),
+            tuple(sample[name] for name in input_names),
+            str(model_path),
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes={
+                **{name: {0: "batch", 1: "sequence"} for name in input_names},
+                "token_embeddings": {0: "batch", 1: "sequence"}
+            },
+            opset_version=14
+        )
+
+    tokenizer.backend_tokenizer.save(str(output_dir / "tokenizer.json"))
+    (output_dir / "encoder.json").write_text(json.dumps({
+        "model_name": model_name,
+        "dimension": st_model.get_sentence_embedding_dimension(),
+        "max_seq_length": st_model.max_seq_length,
+        "pad_token_id": tokenizer.pad_token_id or 0,
+        "pooling": pooling_mode,
+        "normalize": any(isinstance(m, Normalize) for m in st_model)
+    }, indent=2))
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(str(model_path), str(output_dir / "model.int8.onnx"), weight_type=QuantType.QInt8)
+
+    return output_dir
+
+
+class OnnxEncoder:
+    """
+    Sentence encoder running an exported model with ONNX Runtime.
+
+    Provides the parts of the SentenceTransformer interface that
+    EmbeddingGenerator uses, without importing PyTorch.
+    """
+
+    def __init__(self, model_dir: Path, quantized: bool = False):
+        """
+        Load an exported model.
+
+        Args:
+            model_dir: Directory written by export_onnx
+            quantized: Use the int8 model instead of the float32 one
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_dir = Path(model_dir)
+        self.settings = json.loads((self.model_dir / "encoder.json").read_text())
+        self.max_seq_length = self.settings["max_seq_length"]
+        self.quantized = quantized
+
+        self.tokenizer = Tokenizer.from_file(str(self.model_dir / "tokenizer.json"))
+        self.tokenizer.no_padding()
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+
+        model_file = "model.int8.onnx" if quantized else "model.onnx"
+        self.session = ort.InferenceSession(
+            str(self.model_dir / model_file), providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    @classmethod
+    def load(cls, model_name: str, quantized: bool = False) -> "OnnxEncoder":
+        """Load a model's ONNX export, exporting it first if needed."""
+        model_dir = onnx_model_dir(model_name)
+        model_file = model_dir / ("model.int8.onnx" if quantized else "model.onnx")
+        if not model_file.exists():
+            print(f"📦 Exporting {model_name} to ONNX (one-time, needs PyTorch)...")
+            export_onnx(model_name, model_dir, quantize=quantized)
+        return cls(model_dir, quantized=quantized)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        """Get the embedding dimension."""
+        return self.settings["dimension"]
+
+    def token_lengths(self, texts: Sequence[str]) -> np.ndarray:
+        """Token count of each text after truncation."""
+        return np.array([len(e.ids) for e in self.tokenizer.encode_batch(list(texts))])
+
+    def _run(self, texts: List[str]) -> np.ndarray:
+        """Embed one batch."""
+        encodings = self.tokenizer.encode_batch(texts)
+        width = max(len(e.ids) for e in encodings)
+
+        inputs = {
+            "input_ids": np.full((len(texts), width), self.settings["pad_token_id"], dtype=np.int64),
+            "attention_mask": np.zeros((len(texts), width), dtype=np.int64),
+            "token_type_ids": np.zeros((len(texts), width), dtype=np.int64)
+        }
+        for row, encoding in enumerate(encodings):
+            n = len(encoding.ids)
+            inputs["input_ids"][row, :n] = encoding.ids
+            inputs["attention_mask"][row, :n] = 1
+            inputs["token_type_ids"][row, :n] = encoding.type_ids
+
+        tokens = self.session.run(None, {name: inputs[name] for name in self.input_names})[0]
+        mask = inputs["attention_mask"][:, :, None].astype(np.float32)
+
+        if self.settings["pooling"] == "cls":
+            pooled = tokens[:, 0]
+        elif self.settings["pooling"] == "max":
+            pooled = np.where(mask > 0, tokens, -np.inf).max(axis=1)
+        else:
+            pooled = (tokens * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.settings["normalize"]:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+    def encode(self, texts, batch_size: int = 32, convert_to_numpy: bool = True,
+               show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        """
+        Embed texts like SentenceTransformer.encode.
+
+        Args:
+            texts: A text or list of texts
+            batch_size: Texts per inference call
+
+        Returns:
+            float32 array of shape (dimension,) or (len(texts), dimension)
+        """
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+
+        embeddings = np.empty((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        starts = range(0, len(texts), batch_size)
+        for start in tqdm(starts, desc="Embedding", unit="batch", disable=not show_progress_bar):
+            embeddings[start:start + batch_size] = self._run(texts[start:start + batch_size])
+        return embeddings[0] if single else embeddings
 
 
 class EmbeddingGenerator:
-    """Generate embeddings locally using sentence-transformers."""
+    """Generate embeddings locally with sentence-transformers or ONNX Runtime."""
 
-    def __init__(self, model_name: str = None):
+    def __init__(self, model_name: str = None, backend: Optional[str] = None, quantize: Optional[bool] = None):
         """
         Initialize the embedding generator.
 
         Args:
             model_name: Name of the sentence-transformer model
+            backend: "torch" (sentence-transformers) or "onnx" (default: config.EMBEDDING_BACKEND)
+            quantize: Use int8 weights with the ONNX backend (default: config.EMBEDDING_QUANTIZE)
         """
         self.model_name = model_name or config.EMBEDDING_MODEL
-        print(f"Loading embedding model: {self.model_name}")
-        self.model = SentenceTransformer(self.model_name)
+        self.backend = (backend or config.EMBEDDING_BACKEND).lower()
+        quantize = config.EMBEDDING_QUANTIZE if quantize is None else quantize
+
+        print(f"Loading embedding model: {self.model_name} ({self.backend})")
+        if self.backend == "onnx":
+            self.model = OnnxEncoder.load(self.model_name, quantized=quantize)
+            # int8 vectors differ slightly, so they are cached separately
+            self.encoder_id = f"{self.model_name}-int8" if quantize else self.model_name
+        elif self.backend == "torch":
+            from sentence_transformers import SentenceTransformer
+            self.model = SentenceTransformer(self.model_name)
+            self.encoder_id = self.model_name
+        else:
+            raise ValueError(f"Unknown embedding backend: {self.backend} (expected 'torch' or 'onnx')")
         print(f"✓ Model loaded (dimension: {self.model.get_sentence_embedding_dimension()})")
 
+        # Batches are packed by padded token count rather than a fixed size
+        self.token_budget = config.EMBEDDING_TOKEN_BUDGET
+        self.max_batch_size = config.EMBEDDING_MAX_BATCH
+        self.tuning: Dict[int, float] = {}  # Token budget -> chunks/s from autotune()
+
+        self.cache = None
+        if config.CACHE_ENABLED:
+            self.cache = EmbeddingCache(
+                config.CACHE_DIR,
+                self.encoder_id,
+                self.dimension,
+                max_bytes=config.EMBEDDING_CACHE_MAX_MB * 1024 * 1024
+            )
+
+    def _encode(self, texts: List[str], show_progress: bool = False) -> np.ndarray:
+        """
+        Encode texts, reusing cached embeddings where available.
+
+        Args:
+            texts: Texts to embed
+            show_progress: Whether to show progress bar
+
+        Returns:
+            Contiguous float32 array of shape (len(texts), dimension)
+        """
+        if self.cache is None:
+            return self._encode_uncached(texts, show_progress)
+
+        keys = [EmbeddingCache.text_key(text) for text in texts]
+        found = self.cache.get_many(keys)
+
+        # Encode each missing text once, even if it appears several times
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+
+        if missing:
+            encoded = self._encode_uncached(list(missing.values()), show_progress)
+            self.cache.put_many(list(missing), encoded)
+            found.update(zip(missing, encoded))
+
+        embeddings = np.empty((len(keys), self.dimension), dtype=np.float32)
+        for i, key in enumerate(keys):
+            embeddings[i] = found[key]
+        return embeddings
+
+    def _token_lengths(self, texts: Sequence[str]) -> np.ndarray:
+        """Token count of each text after truncation to the model's maximum."""
+        if isinstance(self.model, OnnxEncoder):
+            return self.model.token_lengths(texts)
+
+        max_length = getattr(self.model, "max_seq_length", None) or 512
+        tokenizer = getattr(self.model, "tokenizer", None)
+        if tokenizer is None:
+            # Rough estimate: ~4 characters per token plus special tokens
+            return np.minimum(np.array([len(t) // 4 + 2 for t in texts]), max_length)
+
+        input_ids = tokenizer(
+            list(texts),
+            add_special_tokens=True,
+            truncation=True,
+            max_length=max_length,
+            return_attention_mask=False,
+            return_token_type_ids=False
+        )['input_ids']
+        return np.array([len(ids) for ids in input_ids])
+
+    def _length_batches(self, lengths: np.ndarray) -> List[np.ndarray]:
+        """
+        Group text indices into batches of similar length.
+
+        Texts are sorted longest first and packed while the padded batch
+        (size × longest text) stays within the token budget, so short texts
+        are never padded to the length of a long one.
+        """
+        batches = []
+        current: List[int] = []
+        for index in np.argsort(-lengths, kind="stable"):
+            longest = lengths[current[0]] if current else lengths[index]
+            full = (len(current) + 1) * longest > self.token_budget or len(current) >= self.max_batch_size
+            if current and full:
+                batches.append(np.array(current))
+                current = []
+            current.append(index)
+        if current:
+            batches.append(np.array(current))
+        return batches
+
+    def _encode_uncached(self, texts: List[str], show_progress: bool = False) -> np.ndarray:
+        """
+        Run the model with length-bucketed batches, returning rows in input order.
+
+        Args:
+            texts: Texts to embed
+            show_progress: Whether to show progress bar
+
+        Returns:
+            Contiguous float32 array of shape (len(texts), dimension)
+        """
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        if not texts:
+            return embeddings
+
+        batches = self._length_batches(self._token_lengths(texts))
+        for batch in tqdm(batches, desc="Embedding", unit="batch", disable=not show_progress):
+            embeddings[batch] = self.model.encode(
+                [texts[i] for i in batch],
+                convert_to_numpy=True,
+                show_progress_bar=False,
+                batch_size=len(batch)
+            )
+        return embeddings
+
+    def autotune(
+            self,
+            texts: List[str],
+            budgets: Sequence[int] = (2048, 4096, 8192, 16384, 32768),
+            repeats: int = 3
+    ) -> int:
+        """
+        Pick the token budget that embeds sample texts fastest on this machine.
+
+        Budgets that split the sample into the same batches as a smaller one
+        do the same work, so only the smallest of them is timed. Candidates
+        are timed ``repeats`` times in alternating rounds and compared by
+        their median rate, so a one-off stall doesn't decide the result. The
+        cache is bypassed so every candidate does the same work.
+
+        Args:
+            texts: Representative texts, enough to fill the largest budget
+                several times (e.g. the first few hundred chunks ingested)
+            budgets: Candidate padded-tokens-per-batch limits
+            repeats: Timings per candidate
+
+        Returns:
+            The chosen token budget (also applied to this generator)
+        """
+        if not texts:
+            return self.token_budget
+
+        lengths = self._token_lengths(texts)
+        layouts = {}
+        for budget in sorted(budgets):
+            self.token_budget = budget
+            layouts.setdefault(tuple(len(batch) for batch in self._length_batches(lengths)), budget)
+        candidates = sorted(layouts.values())
+
+        self._encode_uncached(texts[:8])  # Warm up
+        rates: Dict[int, List[float]] = {budget: [] for budget in candidates}
+        for _ in range(repeats):
+            for budget in candidates:
+                self.token_budget = budget
+                start = time.perf_counter()
+                self._encode_uncached(texts)
+                rates[budget].append(len(texts) / max(time.perf_counter() - start, 1e-9))
+
+        self.tuning = {budget: float(np.median(rates[budget])) for budget in candidates}
+        self.token_budget = max(self.tuning, key=self.tuning.get)
+        print(f"⚙️  Embedding batches auto-tuned on {len(texts)} chunks: {self.token_budget} tokens per batch "
+              f"({self.tuning[self.token_budget]:.1f} chunks/s)")
+        return self.token_budget
+
+    def embed_text_array(self, text: str) -> np.ndarray:
+        """
+        Generate embedding for a single text as a numpy array.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            float32 array of shape (dimension,)
+        """
+        return self._encode([text])[0]
+
+    def embed_batch_array(self, texts: List[str], show_progress: bool = True) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts as one numpy array.
+
+        Args:
+            texts: List of texts to embed
+            show_progress: Whether to show progress bar
+
+        Returns:
+            Contiguous float32 array of shape (len(texts), dimension)
+        """
+        return self._encode(texts, show_progress=show_progress)
+
     def embed_text(self, text: str) -> List[float]:
         """
         Generate embedding for a single text.
 
+        Compatibility wrapper around embed_text_array.
+
         Args:
             text: Text to embed
 
         Returns:
             List of floats representing the embedding
         """
-        embedding = self.model.encode(text, convert_to_numpy=True)
-        return embedding.tolist()
+        return self.embed_text_array(text).tolist()
 
     def embed_batch(self, texts: List[str], show_progress: bool = True) -> List[List[float]]:
         """
         Generate embeddings for multiple texts.
 
+        Compatibility wrapper around embed_batch_array.
+
         Args:
             texts: List of texts to embed
             show_progress: Whether to show progress bar
@@ -43,13 +447,7 @@ class EmbeddingGenerator:
         Returns:
             List of embeddings
         """
-        embeddings = self.model.encode(
-            texts,
-            convert_to_numpy=True,
-            show_progress_bar=show_progress,
-            batch_size=32
-        )
-        return embeddings.tolist()
+        return self.embed_batch_array(texts, show_progress=show_progress).tolist()
 
     @property
     def dimension(self) -> int:
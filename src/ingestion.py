@@ -0,0 +1,659 @@
+"""Document ingestion shared by the CLI script and the API's background jobs."""
+import multiprocessing
+import queue
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator, Tuple
+
+from src import config
+from src.document_processor import PDFProcessor, DocumentChunk, extract_page_range, detect_subject
+from src.manifest import IngestManifest, ManifestDiff
+
+
+def plan_sync(pdf_files: List[Path], vector_store, manifest: IngestManifest) -> ManifestDiff:
+    """
+    Work out which PDFs have to be added, re-processed or removed.
+
+    Files stored before the manifest existed are adopted as they are, and
+    files the manifest knows but the store lost (e.g. after clear()) are
+    treated as new.
+
+    Args:
+        pdf_files: All PDFs currently on disk
+        vector_store: Vector store
+        manifest: Ingestion manifest
+
+    Returns:
+        ManifestDiff
+    """
+    diff = manifest.diff(pdf_files)
+
+    for pdf in list(diff.added):
+        if vector_store.has_source(pdf.name, detect_subject(pdf)):
+            manifest.record(pdf, None)
+            diff.added.remove(pdf)
+            diff.unchanged.append(pdf)
+
+    for pdf in list(diff.unchanged):
+        entry = manifest.get(pdf)
+        if entry.chunk_ids and not vector_store.has_source(pdf.name, detect_subject(pdf)):
+            diff.unchanged.remove(pdf)
+            diff.added.append(pdf)
+
+    return diff
+
+
+class DeferredManifest:
+    """
+    Manifest updates held back until the generation they describe is published.
+
+    Has the read and write methods ingestion uses; writes are applied by
+    commit(), so a failed run leaves the manifest matching the live index.
+    """
+
+    def __init__(self, manifest: IngestManifest):
+        """
+        Initialize the wrapper.
+
+        Args:
+            manifest: Manifest to update on commit
+        """
+        self.manifest = manifest
+        self._updates = []
+
+    def key(self, pdf_path: Path) -> str:
+        """Manifest key for a PDF."""
+        return self.manifest.key(pdf_path)
+
+    def get(self, pdf_path: Path):
+        """Committed manifest entry for a PDF, if any."""
+        return self.manifest.get(pdf_path)
+
+    def record(self, pdf_path: Path, chunk_ids: Optional[List[str]]) -> None:
+        """Queue recording a PDF's chunks."""
+        self._updates.append((self.manifest.record, (pdf_path, chunk_ids)))
+
+    def forget(self, key: str) -> None:
+        """Queue removing a manifest entry."""
+        self._updates.append((self.manifest.forget, (key,)))
+
+    def commit(self) -> None:
+        """Apply the queued updates."""
+        for update, args in self._updates:
+            update(*args)
+        self._updates.clear()
+
+
+@contextmanager
+def staged_update(vector_store, manifest: IngestManifest):
+    """
+    Apply changes to a staged index generation and publish it on success.
+
+    Readers keep using the live generation until the block completes; if it
+    raises, the staged generation is dropped and the manifest is untouched.
+    The staged generation starts as a full copy of the live one, so this
+    costs O(corpus); use it for rebuilds, and live_update for small changes.
+
+    Args:
+        vector_store: Live VectorStore
+        manifest: Ingestion manifest
+
+    Yields:
+        (staged store, deferred manifest) to write to
+    """
+    staged = vector_store.stage_generation()
+    deferred = DeferredManifest(manifest)
+    try:
+        yield staged, deferred
+        vector_store.publish(staged)
+    except BaseException:
+        vector_store.discard(staged)
+        raise
+    deferred.commit()
+
+
+@contextmanager
+def live_update(vector_store, manifest: IngestManifest):
+    """
+    Apply changes to the live index generation in place.
+
+    Costs time proportional to the change rather than the corpus. Every
+    write bumps the catalog version, so readers drop cached results as the
+    delta lands. Manifest entries are written as each document completes;
+    if the block raises, the manifest still matches the index and the next
+    run redoes only the unfinished files.
+
+    Args:
+        vector_store: Live VectorStore
+        manifest: Ingestion manifest
+
+    Yields:
+        (live store, manifest) to write to
+    """
+    vector_store.refresh()
+    yield vector_store, manifest
+
+
+def index_update(vector_store, manifest: IngestManifest, staged: Optional[bool] = None):
+    """Context manager for an ingestion run: staged_update if staged (default INGEST_STAGED), else live_update."""
+    staged = config.INGEST_STAGED if staged is None else staged
+    return staged_update(vector_store, manifest) if staged else live_update(vector_store, manifest)
+
+
+def remove_deleted(diff: ManifestDiff, vector_store, manifest, pdf_dir: Path) -> None:
+    """Drop the chunks and manifest entries of PDFs that no longer exist."""
+    for entry in diff.removed:
+        pdf = pdf_dir / entry.path
+        vector_store.remove_document(pdf.name, detect_subject(pdf), entry.chunk_ids)
+        manifest.forget(entry.path)
+
+
+def extract_in_parallel(pdf_paths, processor, workers, pages_per_shard, mp_context=None):
+    """
+    Extract and chunk PDFs in a process pool, streaming each file's chunks.
+
+    Each PDF is split into page ranges that are extracted concurrently.
+    Files are yielded in order as soon as they start, and their chunks are
+    produced range by range as the caller consumes them. At most
+    ``workers * 2`` ranges are submitted but not yet consumed, so memory
+    stays bounded by a few ranges however large the files are, while the
+    pool keeps extracting ahead (into the next files too).
+
+    An extraction error in a worker is raised from the chunk iterator of
+    the file it belongs to.
+
+    Args:
+        pdf_paths: PDFs to process
+        processor: PDFProcessor used for sharding and chunking
+        workers: Number of worker processes
+        pages_per_shard: Maximum pages per extraction task
+        mp_context: Multiprocessing context for the pool (default: spawn;
+            the pool starts once the pipeline's threads and the model are
+            running, and forking a process with threads can deadlock)
+
+    Yields:
+        (pdf_path, chunk iterator) per file, in input order; each iterator
+        must be consumed before the next file is requested
+    """
+    pdf_paths = list(pdf_paths)
+    shards = [shard for pdf_path in pdf_paths for shard in processor.plan_shards(pdf_path, pages_per_shard)]
+    shard_numbers: Dict[Path, List[int]] = {pdf_path: [] for pdf_path in pdf_paths}
+    for number, (pdf_path, _, _) in enumerate(shards):
+        shard_numbers[pdf_path].append(number)
+
+    max_in_flight = workers * 2
+    in_flight = {}  # shard number -> future
+    next_shard = 0
+
+    mp_context = mp_context or multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as pool:
+        def top_up():
+            nonlocal next_shard
+            while next_shard < len(shards) and len(in_flight) < max_in_flight:
+                in_flight[next_shard] = pool.submit(extract_page_range, *shards[next_shard])
+                next_shard += 1
+
+        def pages(numbers):
+            # Shards are consumed in submission order, so each one is already in flight
+            for number in numbers:
+                top_up()
+                extracted = in_flight.pop(number).result()
+                top_up()
+                yield from extracted
+
+        for pdf_path in pdf_paths:
+            numbers = shard_numbers[pdf_path]
+            yield pdf_path, processor.chunker_for(detect_subject(pdf_path)).chunk_pages(pages(numbers))
+            for number in numbers:
+                in_flight.pop(number, None)  # Shards of a file the caller did not finish
+
+
+@dataclass
+class StageMetrics:
+    """Work done by one pipeline stage."""
+    name: str
+    batches: int = 0
+    chunks: int = 0
+    busy_seconds: float = 0.0  # Time spent working
+    wait_seconds: float = 0.0  # Time blocked on the neighbouring queues
+
+    @property
+    def chunks_per_second(self) -> float:
+        """Throughput while busy."""
+        return self.chunks / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+    def summary(self) -> str:
+        """One-line report."""
+        return (f"{self.name:<8} {self.chunks:>7} chunks  {self.busy_seconds:7.1f}s busy  "
+                f"{self.wait_seconds:7.1f}s waiting  {self.chunks_per_second:8.1f} chunks/s")
+
+
+class IngestPipeline:
+    """
+    Extract → embed → store pipeline with bounded queues between stages.
+
+    The caller's thread pulls chunks from the document iterators (PDF
+    extraction and chunking) and groups them into batches of about one
+    encoder batch (``batch_size`` chunks or the encoder's token budget,
+    whichever fills first); one thread
+    embeds batches and another writes them to the vector store. Queues of
+    ``queue_size`` batches keep memory bounded while letting encoding and
+    Chroma writes overlap, so total time approaches the slowest stage.
+    """
+
+    _DONE = object()
+
+    def __init__(
+            self,
+            embedding_gen,
+            vector_store,
+            batch_size: int = config.EMBEDDING_MAX_BATCH,
+            queue_size: int = 4,
+            autotune: bool = config.EMBEDDING_AUTOTUNE
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            embedding_gen: Embedding generator
+            vector_store: Vector store to write to (live or staged generation)
+            batch_size: Maximum chunks per embedding batch
+            queue_size: Batches buffered between stages
+            autotune: Tune the encoder's batch token budget once the first
+                EMBEDDING_AUTOTUNE_SAMPLE chunks are embedded (once per
+                embedding generator)
+        """
+        self.embedding_gen = embedding_gen
+        self.vector_store = vector_store
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.autotune = autotune
+        self.metrics = {name: StageMetrics(name) for name in ("extract", "embed", "store")}
+
+    def _next_batch(self, chunks: Iterator[DocumentChunk]) -> List[DocumentChunk]:
+        """
+        Take the next batch from a chunk iterator.
+
+        A batch ends at ``batch_size`` chunks or once its estimated tokens
+        (~4 characters each) reach the encoder's token budget, so each one
+        fills about one encoder batch whatever the chunk lengths.
+        """
+        budget = getattr(self.embedding_gen, "token_budget", None)
+        batch: List[DocumentChunk] = []
+        tokens = 0
+        for chunk in chunks:
+            batch.append(chunk)
+            tokens += len(chunk.text) // 4 + 2
+            if len(batch) >= self.batch_size or (budget and tokens >= budget):
+                break
+        return batch
+
+    def run(
+            self,
+            documents: Iterable[Tuple[Path, Iterable[DocumentChunk], Optional[List[str]]]],
+            on_document: Optional[Callable[[Path, List[str]], None]] = None,
+            on_batch: Optional[Callable[[int], None]] = None
+    ) -> Dict[str, StageMetrics]:
+        """
+        Replace the chunks of each document with newly extracted ones.
+
+        A document's previous chunks are removed only after all of its new
+        chunks are stored, so readers of the live generation never see the
+        document missing.
+
+        Args:
+            documents: (pdf_path, chunks, old_chunk_ids) per document; chunks
+                may be a generator. old_chunk_ids is [] for new files and
+                None if unknown (every chunk of the source is removed)
+            on_document: Called from the store thread with (pdf_path, new chunk IDs)
+                once all of a document's chunks are stored
+            on_batch: Called from the store thread with the size of each stored batch
+
+        Returns:
+            Metrics per stage
+        """
+        embed_queue: queue.Queue = queue.Queue(self.queue_size)
+        store_queue: queue.Queue = queue.Queue(self.queue_size)
+        failed = threading.Event()
+        errors: List[BaseException] = []
+
+        def put(q: queue.Queue, item, metrics: StageMetrics) -> None:
+            start = time.perf_counter()
+            while not failed.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            metrics.wait_seconds += time.perf_counter() - start
+
+        def get(q: queue.Queue, metrics: StageMetrics):
+            start = time.perf_counter()
+            item = self._DONE
+            while not failed.is_set():
+                try:
+                    item = q.get(timeout=0.1)
+                    break
+                except queue.Empty:
+                    continue
+            metrics.wait_seconds += time.perf_counter() - start
+            return item
+
+        def stage(target):
+            def runner():
+                try:
+                    target()
+                except BaseException as e:
+                    errors.append(e)
+                    failed.set()
+            thread = threading.Thread(target=runner, name=f"ingest-{target.__name__}", daemon=True)
+            thread.start()
+            return thread
+
+        def embed():
+            metrics = self.metrics["embed"]
+            sample: List[str] = []  # Texts for autotune, gathered over the first batches
+            while True:
+                item = get(embed_queue, metrics)
+                if item is self._DONE:
+                    put(store_queue, self._DONE, metrics)
+                    return
+                if item[0] == "batch":
+                    batch = item[2]
+                    texts = [chunk.text for chunk in batch]
+                    start = time.perf_counter()
+                    embeddings = self.embedding_gen.embed_batch_array(texts, show_progress=False)
+                    metrics.busy_seconds += time.perf_counter() - start
+                    metrics.batches += 1
+                    metrics.chunks += len(batch)
+                    item = ("batch", item[1], batch, embeddings)
+
+                    if self.autotune and not self.embedding_gen.tuning:
+                        sample.extend(texts)
+                        if len(sample) >= config.EMBEDDING_AUTOTUNE_SAMPLE:
+                            self.embedding_gen.autotune(sample[:config.EMBEDDING_AUTOTUNE_SAMPLE])
+                            sample = []
+                put(store_queue, item, metrics)
+
+        def store():
+            metrics = self.metrics["store"]
+            new_ids: Dict[Path, List[str]] = {}
+            old_ids: Dict[Path, Optional[List[str]]] = {}
+            while True:
+                item = get(store_queue, metrics)
+                if item is self._DONE:
+                    return
+
+                kind, pdf_path = item[0], item[1]
+                start = time.perf_counter()
+                if kind == "start":
+                    old_ids[pdf_path] = item[2]
+                    new_ids[pdf_path] = []
+                elif kind == "batch":
+                    batch, embeddings = item[2], item[3]
+                    self.vector_store.add_chunks(batch, embeddings)
+                    new_ids[pdf_path].extend(chunk.chunk_id for chunk in batch)
+                    metrics.batches += 1
+                    metrics.chunks += len(batch)
+                else:
+                    old_chunk_ids = old_ids.pop(pdf_path)
+                    if old_chunk_ids is None or old_chunk_ids:
+                        self.vector_store.remove_document(
+                            pdf_path.name, detect_subject(pdf_path), old_chunk_ids, keep=new_ids[pdf_path]
+                        )
+                metrics.busy_seconds += time.perf_counter() - start
+
+                if kind == "batch" and on_batch is not None:
+                    on_batch(len(item[2]))
+                if kind == "end" and on_document is not None:
+                    on_document(pdf_path, new_ids.pop(pdf_path))
+
+        threads = [stage(embed), stage(store)]
+
+        # Extraction and chunking run in the caller's thread, pulling from the generators
+        metrics = self.metrics["extract"]
+        try:
+            documents = iter(documents)
+            while not failed.is_set():
+                start = time.perf_counter()
+                document = next(documents, None)
+                metrics.busy_seconds += time.perf_counter() - start
+                if document is None:
+                    break
+
+                pdf_path, chunks, old_chunk_ids = document
+                put(embed_queue, ("start", pdf_path, old_chunk_ids), metrics)
+                chunks = iter(chunks)
+                while not failed.is_set():
+                    start = time.perf_counter()
+                    batch = self._next_batch(chunks)
+                    metrics.busy_seconds += time.perf_counter() - start
+                    if not batch:
+                        break
+                    metrics.batches += 1
+                    metrics.chunks += len(batch)
+                    put(embed_queue, ("batch", pdf_path, batch), metrics)
+                put(embed_queue, ("end", pdf_path), metrics)
+        except BaseException as e:
+            errors.append(e)
+            failed.set()
+        finally:
+            # On failure the stages stop by themselves
+            put(embed_queue, self._DONE, metrics)
+            for thread in threads:
+                thread.join()
+
+        if errors:
+            raise errors[0]
+        return self.metrics
+
+    def report(self) -> str:
+        """Per-stage throughput, slowest stage marked."""
+        slowest = max(self.metrics.values(), key=lambda m: m.busy_seconds)
+        lines = [
+            m.summary() + ("  ← slowest" if m is slowest and m.busy_seconds > 0 else "")
+            for m in self.metrics.values()
+        ]
+        tuning = getattr(self.embedding_gen, "tuning", None)
+        if tuning:
+            lines.append("encoder batch token budgets: " + ", ".join(
+                f"{budget}{'*' if budget == self.embedding_gen.token_budget else ''}={rate:.1f}/s"
+                for budget, rate in tuning.items()
+            ))
+        return "\n".join(lines)
+
+
+@dataclass
+class IngestJob:
+    """State and progress of one background ingestion run."""
+    id: str
+    status: str = "queued"  # queued, running, completed, failed
+    created_at: str = ""
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    total_files: int = 0
+    processed_files: int = 0
+    current_file: Optional[str] = None
+    chunks_added: int = 0
+    files_removed: int = 0
+    metrics: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # Per-stage throughput
+    message: str = ""
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Job as a JSON-serializable dict."""
+        return asdict(self)
+
+
+class IngestJobQueue:
+    """
+    Runs ingestion jobs one at a time on a background thread.
+
+    Jobs reuse the caller's EmbeddingGenerator and VectorStore, so the model
+    is loaded once. Jobs apply changes to the live index as each document
+    completes (or, with INGEST_STAGED, to a staged generation published when
+    the job finishes). Submitting while a job is still queued returns that
+    job, since it will sync everything on disk anyway.
+    """
+
+    def __init__(
+            self,
+            vector_store,
+            embedding_gen,
+            pdf_dir: Path = config.PDF_DIR,
+            manifest_path: Optional[Path] = None,
+            workers: int = config.INGEST_WORKERS,
+            pages_per_shard: int = config.PAGES_PER_SHARD,
+            max_history: int = 50
+    ):
+        """
+        Initialize the queue.
+
+        Args:
+            vector_store: VectorStore to write to
+            embedding_gen: Loaded EmbeddingGenerator
+            pdf_dir: Directory scanned for PDFs
+            manifest_path: Ingestion manifest (default: manifest.sqlite3 next to the store's data)
+            workers: Number of processes for PDF extraction (1 = in the worker thread)
+            pages_per_shard: Split large PDFs into page ranges of this size
+            max_history: Number of finished jobs kept for status queries
+        """
+        self.vector_store = vector_store
+        self.embedding_gen = embedding_gen
+        self.pdf_dir = Path(pdf_dir)
+        self.manifest = IngestManifest(manifest_path or vector_store.data_dir / "manifest.sqlite3", self.pdf_dir)
+        self.workers = workers
+        self.pages_per_shard = pages_per_shard
+        self.max_history = max_history
+
+        self._jobs: OrderedDict = OrderedDict()
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self) -> IngestJob:
+        """Queue a sync of the PDF directory and return its job."""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.status == "queued":
+                    return job
+
+            job = IngestJob(id=uuid.uuid4().hex, created_at=self._now(), message="Waiting to start")
+            self._jobs[job.id] = job
+            self._trim_history()
+            self._queue.put(job)
+
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="ingest-worker", daemon=True)
+                self._thread.start()
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        """Job by ID, if it is still known."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[IngestJob]:
+        """Known jobs, newest first."""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the worker after the job it is running."""
+        self._queue.put(None)
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now().isoformat(timespec="seconds")
+
+    def _trim_history(self) -> None:
+        """Forget the oldest finished jobs beyond max_history."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in ("completed", "failed")]
+        for job_id in finished[:max(0, len(finished) - self.max_history)]:
+            del self._jobs[job_id]
+
+    def _worker(self) -> None:
+        """Run queued jobs until shutdown."""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+
+            job.status = "running"
+            job.started_at = self._now()
+            try:
+                self._run(job)
+                job.status = "completed"
+            except Exception as e:
+                traceback.print_exc()
+                job.status = "failed"
+                job.error = str(e)
+                job.message = "Ingestion failed"
+            finally:
+                job.current_file = None
+                job.finished_at = self._now()
+
+    def _run(self, job: IngestJob) -> None:
+        """Sync the PDF directory into the vector store, updating job progress."""
+        job.message = "Checking for changes"
+        pdf_files = sorted(self.pdf_dir.glob("**/*.pdf"))
+        diff = plan_sync(pdf_files, self.vector_store, self.manifest)
+
+        new_pdfs = diff.added + diff.changed
+        old_chunk_ids = {pdf: (self.manifest.get(pdf).chunk_ids if pdf in diff.changed else []) for pdf in new_pdfs}
+        job.total_files = len(new_pdfs)
+
+        if not new_pdfs and not diff.removed:
+            job.message = "All PDFs up to date"
+            return
+
+        # With INGEST_STAGED the update is built in a new generation that queries don't see until it is published
+        job.message = "Preparing a new index generation" if config.INGEST_STAGED else "Updating the index"
+        with index_update(self.vector_store, self.manifest) as (target, manifest):
+            remove_deleted(diff, target, manifest, self.pdf_dir)
+            job.files_removed = len(diff.removed)
+
+            job.message = f"Processing {len(new_pdfs)} PDF(s)"
+            print(f"📥 Ingestion job {job.id}: {len(new_pdfs)} PDF(s) to process")
+
+            processor = PDFProcessor(chunk_size=config.CHUNK_SIZE, chunk_overlap=config.CHUNK_OVERLAP)
+            if self.workers > 1 and new_pdfs:
+                extracted = extract_in_parallel(new_pdfs, processor, self.workers, self.pages_per_shard)
+            else:
+                extracted = ((pdf_path, processor.iter_chunks(pdf_path)) for pdf_path in new_pdfs)
+
+            def documents():
+                for pdf_path, chunks in extracted:
+                    job.current_file = self.manifest.key(pdf_path)
+                    yield pdf_path, chunks, old_chunk_ids[pdf_path]
+
+            def document_stored(pdf_path, new_ids):
+                manifest.record(pdf_path, new_ids)
+                job.processed_files += 1
+
+            pipeline = IngestPipeline(self.embedding_gen, target)
+            pipeline.run(
+                documents(),
+                on_document=document_stored,
+                on_batch=lambda n: setattr(job, "chunks_added", job.chunks_added + n)
+            )
+            job.metrics = {name: asdict(m) for name, m in pipeline.metrics.items()}
+            print(pipeline.report())
+
+            job.current_file = None
+            if config.INGEST_STAGED:
+                job.message = "Publishing the new index generation"
+
+        job.message = f"Processed {job.processed_files} PDF(s), {job.chunks_added} chunks, removed {job.files_removed}"
+        print(f"✅ Ingestion job {job.id}: {job.message}")
+
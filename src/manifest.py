@@ -0,0 +1,183 @@
+"""Ingestion manifest: tracks which PDF contents are in the vector store."""
+import hashlib
+import json
+import sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    """Hash a file's contents."""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class ManifestEntry:
+    """What was ingested for one PDF."""
+    path: str
+    sha256: str
+    size: int
+    mtime: float
+    chunk_ids: Optional[List[str]]  # None for files adopted from a pre-manifest database
+
+
+@dataclass
+class ManifestDiff:
+    """Difference between the PDFs on disk and the manifest."""
+    added: List[Path] = field(default_factory=list)
+    changed: List[Path] = field(default_factory=list)
+    unchanged: List[Path] = field(default_factory=list)
+    removed: List[ManifestEntry] = field(default_factory=list)
+
+
+class IngestManifest:
+    """
+    Manifest of ingested PDFs keyed by path relative to the PDF directory.
+
+    Size and mtime are checked first; the content hash is only computed when
+    they differ, so re-syncing a large unchanged library costs a stat per file.
+    """
+
+    def __init__(self, db_path: Path, root: Path):
+        """
+        Initialize the manifest.
+
+        Args:
+            db_path: Path to the SQLite database file
+            root: Directory that manifest paths are relative to
+        """
+        self.db_path = Path(db_path)
+        self.root = Path(root)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    sha256 TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    chunk_ids TEXT
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection; use as a context manager for one transaction."""
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def key(self, pdf_path: Path) -> str:
+        """Manifest key for a PDF."""
+        return Path(pdf_path).resolve().relative_to(self.root.resolve()).as_posix()
+
+    def entries(self) -> Dict[str, ManifestEntry]:
+        """All manifest entries by key."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT path, sha256, size, mtime, chunk_ids FROM files").fetchall()
+        return {row[0]: self._entry(row) for row in rows}
+
+    def get(self, pdf_path: Path) -> Optional[ManifestEntry]:
+        """Manifest entry for a PDF, if any."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT path, sha256, size, mtime, chunk_ids FROM files WHERE path = ?",
+                (self.key(pdf_path),)
+            ).fetchone()
+        return self._entry(row) if row else None
+
+    @staticmethod
+    def _entry(row: tuple) -> ManifestEntry:
+        """Build an entry from a table row."""
+        return ManifestEntry(
+            path=row[0],
+            sha256=row[1],
+            size=row[2],
+            mtime=row[3],
+            chunk_ids=json.loads(row[4]) if row[4] is not None else None
+        )
+
+    def diff(self, pdf_paths: Iterable[Path]) -> ManifestDiff:
+        """
+        Compare PDFs on disk with the manifest.
+
+        Files whose size/mtime changed but whose content did not are marked
+        unchanged and their stat info is refreshed.
+
+        Args:
+            pdf_paths: All PDFs currently on disk
+
+        Returns:
+            ManifestDiff
+        """
+        entries = self.entries()
+        result = ManifestDiff()
+        seen = set()
+
+        for pdf_path in pdf_paths:
+            key = self.key(pdf_path)
+            seen.add(key)
+            entry = entries.get(key)
+            stat = pdf_path.stat()
+
+            if entry is None:
+                result.added.append(pdf_path)
+            elif entry.size == stat.st_size and entry.mtime == stat.st_mtime:
+                result.unchanged.append(pdf_path)
+            elif file_sha256(pdf_path) == entry.sha256:
+                self._touch(key, stat.st_size, stat.st_mtime)
+                result.unchanged.append(pdf_path)
+            else:
+                result.changed.append(pdf_path)
+
+        result.removed = [entry for key, entry in entries.items() if key not in seen]
+        return result
+
+    def _touch(self, key: str, size: int, mtime: float) -> None:
+        """Refresh stat info for content that did not change."""
+        with self._connect() as conn:
+            conn.execute("UPDATE files SET size = ?, mtime = ? WHERE path = ?", (size, mtime, key))
+
+    def record(self, pdf_path: Path, chunk_ids: Optional[List[str]]) -> None:
+        """
+        Record that a PDF's current contents are stored.
+
+        Args:
+            pdf_path: The PDF that was ingested
+            chunk_ids: IDs of its chunks in the vector store
+        """
+        stat = pdf_path.stat()
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO files (path, sha256, size, mtime, chunk_ids)
+                VALUES (?, ?, ?, ?, ?)
+            """, (
+                self.key(pdf_path), file_sha256(pdf_path), stat.st_size, stat.st_mtime,
+                json.dumps(chunk_ids) if chunk_ids is not None else None
+            ))
+
+    def forget(self, key: str) -> None:
+        """Remove a manifest entry."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM files WHERE path = ?", (key,))
+
+    def clear(self) -> None:
+        """Remove every manifest entry."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM files")
+
+    def replace(self, entries: Iterable[ManifestEntry]) -> None:
+        """Replace every manifest entry in one transaction (e.g. when loading a snapshot)."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM files")
+            conn.executemany("""
+                INSERT INTO files (path, sha256, size, mtime, chunk_ids)
+                VALUES (?, ?, ?, ?, ?)
+            """, [
+                (entry.path, entry.sha256, entry.size, entry.mtime,
+                 json.dumps(entry.chunk_ids) if entry.chunk_ids is not None else None)
+                for entry in entries
+            ])
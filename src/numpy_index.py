@@ -0,0 +1,603 @@
+"""Exact-search vector index on a memory-mapped numpy matrix."""
+import json
+import re
+import shutil
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+FILTER_FIELDS = ("source", "subject")  # Metadata fields that where filters can use
+BLOCK_ROWS = 65536  # Matrix rows scored per step, to bound temporary memory
+QUANTIZED_BLOCK_ROWS = 8192  # Rows dequantized per step
+QUANTIZATIONS = ("none", "int8")
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-row int8 quantization.
+
+    Args:
+        vectors: Array of shape (rows, dimension)
+
+    Returns:
+        (codes, scales) with vectors ~= codes * scales[:, None]
+    """
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def distances_to(vectors: np.ndarray, norms: np.ndarray, queries: np.ndarray, metric: str) -> np.ndarray:
+    """
+    Distances between rows and queries, as Chroma computes them.
+
+    Args:
+        vectors: Array of shape (rows, dimension)
+        norms: Squared length of each row
+        queries: Array of shape (num_queries, dimension)
+        metric: "l2" (squared), "ip" (1 - dot product) or "cosine" (1 - cosine)
+
+    Returns:
+        Array of shape (rows, num_queries)
+    """
+    return distances_from_dots(vectors @ queries.T, norms, queries, metric)
+
+
+def distances_from_dots(dots: np.ndarray, norms: np.ndarray, queries: np.ndarray, metric: str) -> np.ndarray:
+    """distances_to, given the row-query dot products."""
+    if metric == "ip":
+        return 1 - dots
+    query_norms = np.einsum("ij,ij->i", queries, queries)
+    if metric == "cosine":
+        return 1 - dots / np.maximum(np.sqrt(norms[:, None] * query_norms[None, :]), 1e-12)
+    # ||x - q||^2 = ||x||^2 + ||q||^2 - 2 x.q, with the dot products in one product
+    return np.maximum(norms[:, None] + query_norms[None, :] - 2 * dots, 0)
+
+
+def where_clause(where: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+    """
+    Translate a Chroma-style where filter into SQL.
+
+    Supports equality ({"subject": "x"} or {"subject": {"$eq": "x"}}) on
+    FILTER_FIELDS, combined with $and.
+
+    Args:
+        where: Filter dict, or None
+
+    Returns:
+        (SQL condition, parameters)
+    """
+    if not where:
+        return "1", []
+
+    conditions, params = [], []
+    for key, value in where.items():
+        if key == "$and":
+            for part in value:
+                sql, part_params = where_clause(part)
+                conditions.append(f"({sql})")
+                params.extend(part_params)
+            continue
+        if key not in FILTER_FIELDS:
+            raise ValueError(f"numpy index can only filter on {', '.join(FILTER_FIELDS)}, not {key}")
+        if isinstance(value, dict):
+            if set(value) != {"$eq"}:
+                raise ValueError(f"Unsupported filter on {key}: {value}")
+            value = value["$eq"]
+        conditions.append(f"{key} = ?")
+        params.append(value)
+    return " AND ".join(conditions), params
+
+
+class NumpyCollection:
+    """
+    A vector collection searched by brute force.
+
+    Embeddings live in a float32 file mapped into memory (one row per
+    chunk), so every process on the machine shares the same pages from the
+    OS page cache. IDs, documents and metadata sit in a SQLite table keyed
+    by row, and the IDs and subjects are also held in memory as arrays
+    parallel to the matrix. Search is one matrix product plus argpartition,
+    so results are exact. Subject filters are boolean row masks computed
+    once per index version.
+
+    With "quantization": "int8" in the metadata, an int8 copy of the matrix
+    (a quarter of the size) is what gets scanned; the ``rescore`` times k
+    best candidates are then re-ranked with their float32 rows, so the
+    float file is only read a few rows at a time and can stay out of memory.
+
+    Implements the part of the Chroma collection API that VectorStore uses
+    (count, get, upsert, delete, query), with distances in the collection's
+    "hnsw:space" as Chroma computes them (squared L2 by default). HNSW
+    parameters in the metadata are ignored. One process writes at a time;
+    readers pick up changes on their next call.
+    """
+
+    def __init__(self, path: Path, name: str, metadata: Optional[Dict[str, Any]] = None, rescore: int = 4):
+        """
+        Open or create a collection.
+
+        Args:
+            path: Directory for this collection's files
+            name: Collection name
+            metadata: Collection metadata, stored when the collection is created
+            rescore: With quantization, candidates re-ranked at full precision per result
+        """
+        self.name = name
+        self.rescore = rescore
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.path / "embeddings.f32"
+        self.codes_path = self.path / "embeddings.i8"
+        self.scales_path = self.path / "scales.f32"
+        self.index_path = self.path / "rows.sqlite3"
+
+        self._lock = threading.Lock()
+        self._version = -1
+        self._dimension = 0
+        self._rows = 0
+        self._vectors: Optional[np.memmap] = None
+        self._codes: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._norms = np.empty(0, dtype=np.float32)
+        self._ids: List[Optional[str]] = []
+        self._positions: Dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._subjects = np.empty(0, dtype=object)
+        self._masks: Dict[str, np.ndarray] = {}
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rows (
+                    row INTEGER PRIMARY KEY,
+                    chunk_id TEXT NOT NULL UNIQUE,
+                    source TEXT,
+                    subject TEXT,
+                    document TEXT,
+                    metadata TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS rows_source ON rows (source, subject)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('metadata', ?)",
+                         (json.dumps(metadata or {}),))
+            conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('version', '0')")
+            conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('dimension', '0')")
+            conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('rows', '0')")
+            self.metadata = json.loads(
+                conn.execute("SELECT value FROM meta WHERE name = 'metadata'").fetchone()[0]
+            )
+        self.quantization = self.metadata.get("quantization", "none")
+        if self.quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {self.quantization} (expected one of {', '.join(QUANTIZATIONS)})")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection; use as a context manager for one transaction."""
+        return sqlite3.connect(self.index_path, timeout=30)
+
+    @staticmethod
+    def _meta(conn: sqlite3.Connection) -> Dict[str, int]:
+        """Version, dimension and row high-water mark."""
+        rows = conn.execute("SELECT name, value FROM meta WHERE name != 'metadata'").fetchall()
+        return {name: int(value) for name, value in rows}
+
+    def _bump_version(self, conn: sqlite3.Connection) -> None:
+        """Mark the collection as changed; this process's arrays are already up to date."""
+        conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE name = 'version'")
+        self._version += 1
+
+    @staticmethod
+    def _grown_memmap(path: Path, dtype, shape: Tuple[int, ...], current: Optional[np.memmap]) -> np.memmap:
+        """Map a file with the given shape, extending the file if it is smaller."""
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if not path.exists() or path.stat().st_size < size:
+            with path.open("ab") as f:
+                f.truncate(size)
+        if current is None or current.shape != shape:
+            current = np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+        return current
+
+    def _map(self, rows: int) -> None:
+        """Map the vector files, growing them so that they hold at least ``rows`` rows."""
+        row_bytes = self._dimension * 4
+        capacity = self.vectors_path.stat().st_size // row_bytes if self.vectors_path.exists() else 0
+        if capacity < rows:
+            capacity = max(rows, 2 * capacity, 1024)
+        self._vectors = self._grown_memmap(self.vectors_path, np.float32, (capacity, self._dimension), self._vectors)
+        if self.quantization == "int8":
+            self._codes = self._grown_memmap(self.codes_path, np.int8, (capacity, self._dimension), self._codes)
+            self._scales = self._grown_memmap(self.scales_path, np.float32, (capacity,), self._scales)
+
+    @property
+    def _block_rows(self) -> int:
+        """Rows scanned per step."""
+        return BLOCK_ROWS if self._codes is None else QUANTIZED_BLOCK_ROWS
+
+    def _block(self, start: int, end: int) -> np.ndarray:
+        """Rows start..end as scanned by search: dequantized codes, or the float rows."""
+        if self._codes is None:
+            return self._vectors[start:end]
+        return self._codes[start:end].astype(np.float32) * self._scales[start:end, None]
+
+    def _block_dots(self, start: int, end: int, queries: np.ndarray) -> np.ndarray:
+        """Dot products of rows start..end with the queries (scaling int8 results, not the rows)."""
+        if self._codes is None:
+            return self._vectors[start:end] @ queries.T
+        return (self._codes[start:end].astype(np.float32) @ queries.T) * self._scales[start:end, None]
+
+    def _load(self) -> None:
+        """Reload the in-memory arrays if another writer changed the collection."""
+        with self._connect() as conn:
+            meta = self._meta(conn)
+            if meta['version'] == self._version:
+                return
+            stored = conn.execute("SELECT row, chunk_id, subject FROM rows").fetchall()
+
+        self._dimension, self._rows = meta['dimension'], 0
+        self._ids, self._positions = [], {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._subjects = np.empty(0, dtype=object)
+        self._norms = np.empty(0, dtype=np.float32)
+        self._resize(meta['rows'])
+        for start in range(0, self._rows, self._block_rows):
+            block = self._block(start, min(start + self._block_rows, self._rows))
+            self._norms[start:start + len(block)] = np.einsum("ij,ij->i", block, block)
+
+        for row, chunk_id, subject in stored:
+            self._set_row(row, chunk_id, subject)
+        self._version = meta['version']
+
+    def _resize(self, rows: int) -> None:
+        """Grow the matrix and the parallel arrays so that they hold ``rows`` rows."""
+        if rows > self._rows:
+            self._map(rows)
+            extra = self._vectors.shape[0] - len(self._ids)
+            if extra > 0:
+                # Arrays follow the file's capacity, so they grow geometrically too
+                self._ids.extend([None] * extra)
+                self._alive = np.concatenate([self._alive, np.zeros(extra, dtype=bool)])
+                self._subjects = np.concatenate([self._subjects, np.empty(extra, dtype=object)])
+                self._norms = np.concatenate([self._norms, np.zeros(extra, dtype=np.float32)])
+            self._rows = rows
+        self._masks = {}
+
+    def _set_row(self, row: int, chunk_id: Optional[str], subject: Optional[str] = None) -> None:
+        """Record which chunk a row holds (None for a free row)."""
+        previous = self._ids[row]
+        if previous is not None:
+            self._positions.pop(previous, None)
+        self._ids[row] = chunk_id
+        self._alive[row] = chunk_id is not None
+        self._subjects[row] = subject
+        if chunk_id is not None:
+            self._positions[chunk_id] = row
+
+    def _mask(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        """Rows that are in use and match the filter; cached until the next change."""
+        key = json.dumps(where, sort_keys=True) if where else ""
+        mask = self._masks.get(key)
+        if mask is not None:
+            return mask
+
+        if not where:
+            mask = self._alive
+        elif set(where) == {"subject"} and not isinstance(where["subject"], dict):
+            mask = self._alive & (self._subjects == where["subject"])
+        else:
+            sql, params = where_clause(where)
+            with self._connect() as conn:
+                rows = [row for (row,) in conn.execute(f"SELECT row FROM rows WHERE {sql}", params)]
+            mask = np.zeros(len(self._alive), dtype=bool)
+            mask[rows] = True
+        self._masks[key] = mask
+        return mask
+
+    def count(self) -> int:
+        """Number of chunks in the collection."""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+    def upsert(
+            self,
+            ids: List[str],
+            embeddings,
+            documents: List[str],
+            metadatas: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Insert chunks, replacing any with the same ID.
+
+        Args:
+            ids: Chunk IDs
+            embeddings: Array of shape (len(ids), dimension)
+            documents: Chunk texts
+            metadatas: Chunk metadata
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+        with self._lock, self._connect() as conn:
+            self._load()
+            meta = self._meta(conn)
+            if not meta['dimension']:
+                self._dimension = embeddings.shape[1]
+                conn.execute("UPDATE meta SET value = ? WHERE name = 'dimension'", (str(self._dimension),))
+            elif embeddings.shape[1] != meta['dimension']:
+                raise ValueError(f"Embedding dimension {embeddings.shape[1]} does not match "
+                                 f"the collection's {meta['dimension']}")
+
+            # Reuse rows of deleted chunks before growing the matrix
+            free = iter(np.flatnonzero(~self._alive[:self._rows]).tolist())
+            rows, assigned, next_row = [], {}, self._rows
+            for chunk_id in ids:
+                row = assigned.get(chunk_id, self._positions.get(chunk_id))
+                if row is None:
+                    row = next(free, None)
+                    if row is None:
+                        row, next_row = next_row, next_row + 1
+                assigned[chunk_id] = row
+                rows.append(row)
+
+            self._resize(next_row)
+            self._vectors[rows] = embeddings
+            self._vectors.flush()
+            scanned = embeddings
+            if self._codes is not None:
+                codes, scales = quantize_int8(embeddings)
+                self._codes[rows], self._scales[rows] = codes, scales
+                self._codes.flush()
+                self._scales.flush()
+                scanned = codes.astype(np.float32) * scales[:, None]
+            self._norms[rows] = np.einsum("ij,ij->i", scanned, scanned)
+
+            conn.executemany(
+                "INSERT OR REPLACE INTO rows (row, chunk_id, source, subject, document, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (row, chunk_id, meta_.get('source'), meta_.get('subject'), document, json.dumps(meta_))
+                    for row, chunk_id, document, meta_ in zip(rows, ids, documents, metadatas)
+                ]
+            )
+            conn.execute("UPDATE meta SET value = ? WHERE name = 'rows'", (str(next_row),))
+            self._bump_version(conn)
+            for row, chunk_id, meta_ in zip(rows, ids, metadatas):
+                self._set_row(row, chunk_id, meta_.get('subject'))
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Delete chunks by ID or filter. Their rows are reused by later inserts.
+
+        Args:
+            ids: Chunk IDs to delete
+            where: Filter selecting chunks to delete
+        """
+        with self._lock, self._connect() as conn:
+            self._load()
+            rows = {self._positions[chunk_id] for chunk_id in ids or [] if chunk_id in self._positions}
+            if where is not None:
+                sql, params = where_clause(where)
+                rows.update(row for (row,) in conn.execute(f"SELECT row FROM rows WHERE {sql}", params))
+            if not rows:
+                return
+
+            conn.executemany("DELETE FROM rows WHERE row = ?", [(row,) for row in rows])
+            self._bump_version(conn)
+            for row in rows:
+                self._set_row(row, None)
+            self._masks = {}
+
+    def _fetch(self, rows: List[int], include: List[str]) -> Dict[str, Any]:
+        """IDs and the requested fields for matrix rows, in the given order."""
+        stored = {}
+        if "documents" in include or "metadatas" in include:
+            with self._connect() as conn:
+                for i in range(0, len(rows), 500):
+                    batch = rows[i:i + 500]
+                    stored.update(
+                        (row, (document, metadata)) for row, document, metadata in conn.execute(
+                            f"SELECT row, document, metadata FROM rows WHERE row IN ({','.join('?' * len(batch))})",
+                            batch
+                        )
+                    )
+
+        result: Dict[str, Any] = {'ids': [self._ids[row] for row in rows]}
+        result['documents'] = [stored[row][0] for row in rows] if "documents" in include else None
+        result['metadatas'] = [json.loads(stored[row][1]) for row in rows] if "metadatas" in include else None
+        result['embeddings'] = np.array(self._vectors[rows]) if "embeddings" in include and rows else (
+            np.empty((0, self._dimension), dtype=np.float32) if "embeddings" in include else None)
+        return result
+
+    def get(
+            self,
+            ids: Optional[List[str]] = None,
+            where: Optional[Dict[str, Any]] = None,
+            limit: Optional[int] = None,
+            offset: Optional[int] = None,
+            include: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Fetch chunks by ID and/or filter, in row order.
+
+        Args:
+            ids: Chunk IDs to fetch (missing ones are skipped)
+            where: Optional filter
+            limit: Maximum number of chunks
+            offset: Chunks to skip
+            include: Fields to return ("documents", "metadatas", "embeddings")
+
+        Returns:
+            Dict with ids and the included fields
+        """
+        include = ["documents", "metadatas"] if include is None else include
+        with self._lock:
+            self._load()
+            mask = self._mask(where)
+            if ids is not None:
+                rows = sorted(row for row in (self._positions.get(chunk_id) for chunk_id in ids)
+                              if row is not None and mask[row])
+            else:
+                rows = np.flatnonzero(mask).tolist()
+            start = offset or 0
+            rows = rows[start:start + limit] if limit is not None else rows[start:]
+            return self._fetch(rows, include)
+
+    def query(
+            self,
+            query_embeddings,
+            n_results: int = 10,
+            where: Optional[Dict[str, Any]] = None,
+            include: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Exact nearest neighbours in the collection's distance metric.
+
+        Args:
+            query_embeddings: Array of shape (num_queries, dimension)
+            n_results: Neighbours per query
+            where: Optional filter shared by all queries
+            include: Fields to return ("documents", "metadatas", "distances", "embeddings")
+
+        Returns:
+            Dict of lists with one entry per query
+        """
+        include = ["documents", "metadatas", "distances"] if include is None else include
+        queries = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+        queries = queries.reshape(1, -1) if queries.ndim == 1 else queries
+
+        with self._lock:
+            self._load()
+            mask = self._mask(where)
+            available = int(mask.sum())
+            k = min(n_results, available)
+            if k == 0:
+                rows_per_query = [np.empty(0, dtype=np.int64)] * len(queries)
+                distances_per_query = [np.empty(0, dtype=np.float32)] * len(queries)
+            else:
+                width = min(k * self.rescore, available) if self._codes is not None else k
+                rows_per_query, distances_per_query = self._nearest(queries, width, mask)
+                if self._codes is not None:
+                    rows_per_query, distances_per_query = self._rescore(queries, rows_per_query, k)
+
+            fields = {'ids': [], 'documents': [], 'metadatas': [], 'distances': [], 'embeddings': []}
+            for rows, distances in zip(rows_per_query, distances_per_query):
+                fetched = self._fetch(rows.tolist(), include)
+                fetched['distances'] = distances.tolist()
+                for field in fields:
+                    fields[field].append(fetched[field])
+
+        return {
+            field: values if field == 'ids' or field in include else None
+            for field, values in fields.items()
+        }
+
+    def _nearest(self, queries: np.ndarray, k: int, mask: np.ndarray) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """Top-k rows per query among the masked rows, scanning the matrix in blocks."""
+        metric = self.metadata.get("hnsw:space", "l2")
+        best_rows = np.empty((0, len(queries)), dtype=np.int64)
+        best = np.empty((0, len(queries)), dtype=np.float32)
+
+        for start in range(0, self._rows, self._block_rows):
+            end = min(start + self._block_rows, self._rows)
+            block_mask = mask[start:end]
+            if not block_mask.any():
+                continue
+            dots = self._block_dots(start, end, queries)
+            distances = distances_from_dots(dots, self._norms[start:end], queries, metric)
+            distances[~block_mask] = np.inf
+
+            candidates = min(k, end - start)
+            top = np.argpartition(distances, candidates - 1, axis=0)[:candidates]
+            best_rows = np.concatenate([best_rows, top + start])
+            best = np.concatenate([best, np.take_along_axis(distances, top, axis=0)])
+            if len(best) > k:
+                keep = np.argpartition(best, k - 1, axis=0)[:k]
+                best_rows = np.take_along_axis(best_rows, keep, axis=0)
+                best = np.take_along_axis(best, keep, axis=0)
+
+        order = np.argsort(best, axis=0, kind="stable")
+        best_rows = np.take_along_axis(best_rows, order, axis=0)
+        best = np.take_along_axis(best, order, axis=0)
+        rows, distances = [], []
+        for i in range(len(queries)):
+            found = np.isfinite(best[:, i])
+            rows.append(best_rows[found, i])
+            distances.append(best[found, i])
+        return rows, distances
+
+    def _read_rows(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Float32 rows read from the file rather than through the memory map.
+
+        Touching scattered rows of the map would also map their neighbours
+        into this process (readahead and fault-around), which soon makes
+        most of the float file resident; reads leave it in the OS page cache.
+        """
+        vectors = np.empty((len(rows), self._dimension), dtype=np.float32)
+        row_bytes = self._dimension * 4
+        with self.vectors_path.open("rb", buffering=0) as f:
+            for i, row in enumerate(rows):
+                f.seek(int(row) * row_bytes)
+                f.readinto(memoryview(vectors[i]).cast("B"))
+        return vectors
+
+    def _rescore(self, queries: np.ndarray, candidates: List[np.ndarray], k: int) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """Re-rank quantized search candidates with their float32 rows; keep the best k."""
+        metric = self.metadata.get("hnsw:space", "l2")
+        rows, distances = [], []
+        for query, found in zip(queries, candidates):
+            found = np.sort(found)  # Read the float file in row order
+            vectors = self._read_rows(found)
+            exact = distances_to(vectors, np.einsum("ij,ij->i", vectors, vectors), query[None, :], metric)[:, 0]
+            order = np.argsort(exact, kind="stable")[:k]
+            rows.append(found[order])
+            distances.append(exact[order])
+        return rows, distances
+
+
+class NumpyClient:
+    """Directory of NumpyCollections with the Chroma client calls VectorStore uses."""
+
+    def __init__(self, path: Path, rescore: int = 4):
+        """
+        Initialize the client.
+
+        Args:
+            path: Directory holding one subdirectory per collection
+            rescore: Full-precision candidates per result for quantized collections
+        """
+        self.path = Path(path)
+        self.rescore = rescore
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._collections: Dict[str, NumpyCollection] = {}
+
+    def _dir(self, name: str) -> Path:
+        """Directory of a collection."""
+        return self.path / re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> NumpyCollection:
+        """Open a collection, creating it if needed; open collections are shared."""
+        collection = self._collections.get(name)
+        if collection is None or not collection.index_path.exists():
+            collection = NumpyCollection(self._dir(name), name, metadata, rescore=self.rescore)
+            self._collections[name] = collection
+        return collection
+
+    def get_collection(self, name: str) -> NumpyCollection:
+        """Open an existing collection."""
+        if not (self._dir(name) / "rows.sqlite3").exists():
+            raise ValueError(f"Collection {name} does not exist")
+        return self.get_or_create_collection(name)
+
+    def list_collections(self) -> List[str]:
+        """Names of all collections."""
+        return sorted(path.name for path in self.path.iterdir() if (path / "rows.sqlite3").exists())
+
+    def delete_collection(self, name: str) -> None:
+        """Delete a collection and its files."""
+        path = self._dir(name)
+        self._collections.pop(name, None)
+        if not path.exists():
+            raise ValueError(f"Collection {name} does not exist")
+        shutil.rmtree(path)
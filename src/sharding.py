@@ -0,0 +1,272 @@
+"""Per-subject sharding: one physical collection per subject, searched in parallel."""
+import hashlib
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+SHARD_MARKER = "__s_"
+SHARD_LIST_TTL = 5.0  # Seconds before shards created by other processes are looked up again
+
+
+def shard_name(collection: str, subject: str) -> str:
+    """
+    Physical collection name for one subject of a collection.
+
+    Subjects are slugged and suffixed with a short hash so different
+    subjects never share a shard, within Chroma's 63-character limit.
+    """
+    slug = re.sub(r"[^A-Za-z0-9_-]", "_", subject)[:24].strip("_-") or "x"
+    digest = hashlib.sha1(subject.encode("utf-8")).hexdigest()[:8]
+    return f"{collection}{SHARD_MARKER}{slug}_{digest}"
+
+
+def _names(client) -> List[str]:
+    """Collection names of a Chroma-like client (objects or plain names)."""
+    return [getattr(c, "name", c) for c in client.list_collections()]
+
+
+class ShardedCollection:
+    """
+    A logical collection stored as one physical collection per subject.
+
+    Implements the same collection calls as a Chroma collection. Writes are
+    routed by each chunk's subject; a query filtered on one subject only
+    touches that subject's shard, and an unfiltered query runs on every
+    shard in parallel and merges the nearest results by distance.
+    """
+
+    def __init__(
+            self,
+            client,
+            name: str,
+            metadata: Dict[str, Any],
+            executor: ThreadPoolExecutor,
+            to_client: Callable[[np.ndarray], Any]
+    ):
+        """
+        Initialize the collection.
+
+        Args:
+            client: Underlying Chroma (or numpy) client
+            name: Logical collection name
+            metadata: Metadata for new shards (metric and HNSW settings)
+            executor: Thread pool for parallel shard searches
+            to_client: Converts float32 arrays to what the client accepts
+        """
+        self.client = client
+        self.name = name
+        self.metadata = metadata
+        self._executor = executor
+        self._to_client = to_client
+        self._shards: Dict[str, Any] = {}
+        self._listed = 0.0
+
+    def _shard(self, subject: str):
+        """Open (or create) the shard of a subject."""
+        name = shard_name(self.name, subject)
+        shard = self._shards.get(name)
+        if shard is None:
+            shard = self.client.get_or_create_collection(name=name, metadata={**self.metadata, "subject": subject})
+            self._shards[name] = shard
+        return shard
+
+    def shards(self) -> List[Any]:
+        """Every shard, including ones other processes created (seen within SHARD_LIST_TTL), in name order."""
+        if time.monotonic() - self._listed > SHARD_LIST_TTL:
+            prefix = f"{self.name}{SHARD_MARKER}"
+            for name in _names(self.client):
+                if name.startswith(prefix) and name not in self._shards:
+                    self._shards[name] = self.client.get_collection(name)
+            self._listed = time.monotonic()
+        return [self._shards[name] for name in sorted(self._shards)]
+
+    def _map(self, function, shards: List[Any]) -> List[Any]:
+        """Run function on each shard, in parallel when there are several."""
+        if len(shards) <= 1:
+            return [function(shard) for shard in shards]
+        return list(self._executor.map(function, shards))
+
+    def count(self) -> int:
+        """Number of chunks across all shards."""
+        return sum(shard.count() for shard in self.shards())
+
+    def upsert(self, ids: List[str], embeddings, documents: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        """Insert chunks into their subjects' shards."""
+        groups: Dict[str, List[int]] = {}
+        for i, meta in enumerate(metadatas):
+            groups.setdefault(meta.get('subject', 'general'), []).append(i)
+
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        for subject, rows in groups.items():
+            self._shard(subject).upsert(
+                ids=[ids[i] for i in rows],
+                embeddings=self._to_client(embeddings[rows]),
+                documents=[documents[i] for i in rows],
+                metadatas=[metadatas[i] for i in rows]
+            )
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        """Delete chunks by ID or filter from every shard."""
+        self._map(lambda shard: shard.delete(ids=ids, where=where), self.shards())
+
+    def get(
+            self,
+            ids: Optional[List[str]] = None,
+            where: Optional[Dict[str, Any]] = None,
+            limit: Optional[int] = None,
+            offset: Optional[int] = None,
+            include: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Fetch chunks from every shard; limit/offset page through the shards in name order."""
+        include = ["documents", "metadatas"] if include is None else include
+        shards = self.shards()
+        if ids is not None:
+            pages = self._map(lambda shard: shard.get(ids=ids, where=where, include=include), shards)
+        else:
+            pages, skip = [], offset or 0
+            remaining = limit
+            for shard in shards:
+                if remaining is not None and remaining <= 0:
+                    break
+                if skip:
+                    size = len(shard.get(where=where, include=[])['ids']) if where else shard.count()
+                    if skip >= size:
+                        skip -= size
+                        continue
+                page = shard.get(where=where, limit=remaining, offset=skip, include=include)
+                skip = 0
+                pages.append(page)
+                if remaining is not None:
+                    remaining -= len(page['ids'])
+        return self._concat(pages, include)
+
+    @staticmethod
+    def _concat(pages: List[Dict[str, Any]], include: List[str]) -> Dict[str, Any]:
+        """Join get() results of several shards."""
+        merged: Dict[str, Any] = {'ids': [id_ for page in pages for id_ in page['ids']]}
+        for field in ('documents', 'metadatas'):
+            merged[field] = [v for page in pages for v in page[field]] if field in include else None
+        if "embeddings" in include:
+            arrays = [np.asarray(page['embeddings'], dtype=np.float32).reshape(len(page['ids']), -1)
+                      for page in pages if len(page['ids'])]
+            merged['embeddings'] = np.concatenate(arrays) if arrays else np.empty((0, 0), dtype=np.float32)
+        else:
+            merged['embeddings'] = None
+        return merged
+
+    def query(
+            self,
+            query_embeddings,
+            n_results: int = 10,
+            where: Optional[Dict[str, Any]] = None,
+            include: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Nearest neighbours across the shards selected by the filter.
+
+        A plain {"subject": ...} filter selects one shard and is not passed
+        on; other filters are applied within every shard.
+        """
+        include = ["documents", "metadatas", "distances"] if include is None else include
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        queries = queries.reshape(1, -1) if queries.ndim == 1 else queries
+
+        subject = (where or {}).get("subject")
+        if isinstance(subject, str):
+            rest = {key: value for key, value in where.items() if key != "subject"} or None
+            name = shard_name(self.name, subject)
+            shards = [shard for shard in self.shards() if shard.name == name]
+        else:
+            rest, shards = where, self.shards()
+
+        def search(shard):
+            size = shard.count()
+            if size == 0:
+                return None
+            return shard.query(query_embeddings=self._to_client(queries), n_results=min(n_results, size),
+                               where=rest, include=list(set(include) | {"distances"}))
+
+        found = [result for result in self._map(search, shards) if result is not None]
+        merged: Dict[str, Any] = {field: [] for field in ('ids', 'documents', 'metadatas', 'distances', 'embeddings')}
+        for i in range(len(queries)):
+            rows = [(result['distances'][i][j], result, j)
+                    for result in found for j in range(len(result['ids'][i]))]
+            rows.sort(key=lambda row: row[0])
+            rows = rows[:n_results]
+            merged['ids'].append([result['ids'][i][j] for _, result, j in rows])
+            merged['distances'].append([distance for distance, _, _ in rows])
+            for field in ('documents', 'metadatas'):
+                if field in include:
+                    merged[field].append([result[field][i][j] for _, result, j in rows])
+            if "embeddings" in include:
+                merged['embeddings'].append(np.array(
+                    [result['embeddings'][i][j] for _, result, j in rows], dtype=np.float32
+                ).reshape(len(rows), -1))
+
+        return {
+            field: values if field == 'ids' or field in include else None
+            for field, values in merged.items()
+        }
+
+
+class ShardedClient:
+    """
+    Client wrapper that presents per-subject shards as one collection.
+
+    Collections that already exist unsharded (built before sharding was
+    enabled) keep being served as they are; new collections are sharded
+    when ``shard`` is set. Either kind is migrated by a rebuild.
+    """
+
+    def __init__(self, client, shard: bool, workers: int, to_client: Callable[[np.ndarray], Any] = lambda a: a):
+        """
+        Initialize the client.
+
+        Args:
+            client: Underlying Chroma (or numpy) client
+            shard: Create new collections sharded by subject
+            workers: Threads for parallel shard searches
+            to_client: Converts float32 arrays to what the client accepts
+        """
+        self.client = client
+        self.shard = shard
+        self.to_client = to_client
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="shard-search")
+        self._collections: Dict[str, ShardedCollection] = {}
+
+    def _shard_names(self, name: str) -> List[str]:
+        """Physical shards of a logical collection."""
+        prefix = f"{name}{SHARD_MARKER}"
+        return [n for n in _names(self.client) if n.startswith(prefix)]
+
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None):
+        """Open a collection as it is stored, or create it sharded or not as configured."""
+        shards = self._shard_names(name)
+        if not shards and (not self.shard or name in _names(self.client)):
+            return self.client.get_or_create_collection(name=name, metadata=metadata)
+
+        collection = self._collections.get(name)
+        if collection is None:
+            if shards:
+                # Reopen with the settings the shards were built with
+                metadata = {k: v for k, v in (self.client.get_collection(shards[0]).metadata or {}).items()
+                            if k != "subject"}
+            collection = ShardedCollection(self.client, name, metadata or {}, self._executor, self.to_client)
+            self._collections[name] = collection
+        return collection
+
+    def list_collections(self) -> List[str]:
+        """Logical collection names (shards are listed under their collection)."""
+        return sorted({name.split(SHARD_MARKER, 1)[0] for name in _names(self.client)})
+
+    def delete_collection(self, name: str) -> None:
+        """Delete a collection and all of its shards."""
+        self._collections.pop(name, None)
+        names = self._shard_names(name) + [n for n in _names(self.client) if n == name]
+        if not names:
+            raise ValueError(f"Collection {name} does not exist")
+        for physical in names:
+            self.client.delete_collection(physical)
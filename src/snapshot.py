@@ -0,0 +1,167 @@
+"""Index snapshots: export the live index to a bundle and load it on another node without re-embedding."""
+import gzip
+import json
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+
+from src import config
+from src.document_processor import DocumentChunk
+from src.manifest import IngestManifest, ManifestEntry, file_sha256
+from src.vector_store import as_embedding_array
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_FILES = ("embeddings.f32", "chunks.jsonl.gz", "manifest.json")
+
+
+def export_snapshot(vector_store, manifest: IngestManifest, path: Path, page_size: int = 5000) -> Dict[str, Any]:
+    """
+    Write the served generation to a snapshot bundle.
+
+    The bundle is a directory holding the float32 embedding matrix, the
+    chunk texts and metadata (gzipped JSON lines, in the same row order),
+    the ingestion manifest, and snapshot.json with the format version,
+    embedding model and a SHA-256 per file. snapshot.json is written last,
+    so a bundle without it is incomplete.
+
+    The export reads one pinned generation; if a writer changes that
+    generation meanwhile (the catalog version moves), it fails instead of
+    writing a mixed snapshot.
+
+    Args:
+        vector_store: Live VectorStore
+        manifest: Ingestion manifest of the store
+        path: Directory to create (must not exist or be empty)
+        page_size: Chunks read per request
+
+    Returns:
+        The snapshot description (contents of snapshot.json)
+    """
+    path = Path(path)
+    if path.exists() and any(path.iterdir()):
+        raise FileExistsError(f"Snapshot directory is not empty: {path}")
+    path.mkdir(parents=True, exist_ok=True)
+
+    vector_store.refresh()
+    view = vector_store.pin()
+    version = view.catalog.version()
+
+    count, dimension = 0, None
+    with (path / "embeddings.f32").open("wb") as vectors, gzip.open(path / "chunks.jsonl.gz", "wt", encoding="utf-8") as chunks:
+        offset = 0
+        while True:
+            page = view.collection.get(
+                include=["embeddings", "documents", "metadatas"], limit=page_size, offset=offset
+            )
+            if page['ids']:
+                embeddings = as_embedding_array(page['embeddings'])
+                dimension = dimension or embeddings.shape[1]
+                vectors.write(np.ascontiguousarray(embeddings, dtype="<f4").tobytes())
+                for chunk_id, text, metadata in zip(page['ids'], page['documents'], page['metadatas']):
+                    chunks.write(json.dumps({"id": chunk_id, "text": text, "metadata": metadata}) + "\n")
+                count += len(page['ids'])
+            if len(page['ids']) < page_size:
+                break
+            offset += page_size
+
+    with (path / "manifest.json").open("w", encoding="utf-8") as f:
+        json.dump([asdict(entry) for entry in manifest.entries().values()], f)
+
+    if view.catalog.version() != version or view.collection.count() != count:
+        raise RuntimeError("Index changed during export; run the export again")
+
+    info = {
+        "format": SNAPSHOT_FORMAT,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "collection": vector_store.collection_name,
+        "generation": view.generation,
+        "version": version,
+        "chunks": count,
+        "dimension": dimension or 0,
+        "embedding_model": config.EMBEDDING_MODEL,
+        "metric": view.metric,
+        "files": {name: file_sha256(path / name) for name in SNAPSHOT_FILES}
+    }
+    with (path / "snapshot.json").open("w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+    return info
+
+
+def read_snapshot(path: Path) -> Dict[str, Any]:
+    """
+    Read and verify a snapshot bundle's description and checksums.
+
+    Args:
+        path: Snapshot directory
+
+    Returns:
+        The snapshot description
+
+    Raises:
+        ValueError: If the bundle is incomplete, corrupt, of an unknown
+            format, or made with a different embedding model
+    """
+    path = Path(path)
+    if not (path / "snapshot.json").exists():
+        raise ValueError(f"Not a complete snapshot (no snapshot.json): {path}")
+    info = json.loads((path / "snapshot.json").read_text(encoding="utf-8"))
+
+    if info.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported snapshot format {info.get('format')} (expected {SNAPSHOT_FORMAT})")
+    for name in SNAPSHOT_FILES:
+        if not (path / name).exists() or file_sha256(path / name) != info["files"].get(name):
+            raise ValueError(f"Snapshot file {name} is missing or does not match its checksum")
+    if (path / "embeddings.f32").stat().st_size != info["chunks"] * info["dimension"] * 4:
+        raise ValueError("Snapshot embeddings do not match the chunk count")
+    if info["embedding_model"] != config.EMBEDDING_MODEL:
+        raise ValueError(f"Snapshot was embedded with {info['embedding_model']}, "
+                         f"but EMBEDDING_MODEL is {config.EMBEDDING_MODEL}")
+    return info
+
+
+def import_snapshot(vector_store, manifest: IngestManifest, path: Path, page_size: int = 5000) -> Dict[str, Any]:
+    """
+    Load a snapshot bundle as a new generation and publish it.
+
+    Vectors are loaded as stored (nothing is re-embedded); the collection,
+    catalog and keyword index are built with this node's backend and index
+    settings. Readers keep the old generation until the new one is
+    published, and the manifest is replaced only after that.
+
+    Args:
+        vector_store: Live VectorStore
+        manifest: Ingestion manifest to replace with the snapshot's
+        path: Snapshot directory
+        page_size: Chunks loaded per batch
+
+    Returns:
+        The snapshot description
+    """
+    path = Path(path)
+    info = read_snapshot(path)
+    vectors = np.memmap(path / "embeddings.f32", dtype="<f4", mode="r",
+                        shape=(info["chunks"], info["dimension"])) if info["chunks"] else None
+
+    staged = vector_store.stage_generation(copy_current=False)
+    try:
+        with gzip.open(path / "chunks.jsonl.gz", "rt", encoding="utf-8") as lines:
+            start = 0
+            while start < info["chunks"]:
+                rows = [json.loads(next(lines)) for _ in range(min(page_size, info["chunks"] - start))]
+                chunks = [DocumentChunk(text=row["text"], metadata=row["metadata"], chunk_id=row["id"]) for row in rows]
+                staged.add_chunks(chunks, np.array(vectors[start:start + len(rows)], dtype=np.float32))
+                start += len(rows)
+            if next(lines, None) is not None:
+                raise ValueError("Snapshot has more chunks than snapshot.json records")
+        staged.catalog.set_version(info["version"])
+        vector_store.publish(staged)
+    except BaseException:
+        vector_store.discard(staged)
+        raise
+
+    entries = json.loads((path / "manifest.json").read_text(encoding="utf-8"))
+    manifest.replace([ManifestEntry(**entry) for entry in entries])
+    return info
@@ -0,0 +1,44 @@
+"""Token counting with Hugging Face tokenizers, without loading a model."""
+from typing import Callable, Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: about four characters per token."""
+    return len(text) // 4 + 1
+
+
+def load_token_counter(model_name: Optional[str]) -> Callable[[str], int]:
+    """
+    Token counter for a Hugging Face model, using only the tokenizers library.
+
+    A local copy (the ONNX export or the Hugging Face cache) is preferred.
+    Falls back to estimate_tokens if no model is given or the tokenizer
+    cannot be loaded (e.g. offline without a cached copy).
+
+    Args:
+        model_name: Hugging Face repo with a tokenizer.json, or None
+
+    Returns:
+        Function mapping text to its number of tokens (without special tokens)
+    """
+    if not model_name:
+        return estimate_tokens
+
+    try:
+        from huggingface_hub import try_to_load_from_cache
+        from tokenizers import Tokenizer
+        from src.embeddings import onnx_model_dir
+
+        exported = onnx_model_dir(model_name) / "tokenizer.json"
+        cached = try_to_load_from_cache(model_name, "tokenizer.json")
+        if exported.exists():
+            tokenizer = Tokenizer.from_file(str(exported))
+        elif isinstance(cached, str):
+            tokenizer = Tokenizer.from_file(cached)
+        else:
+            tokenizer = Tokenizer.from_pretrained(model_name)
+        tokenizer.no_truncation()
+        return lambda text: len(tokenizer.encode(text, add_special_tokens=False).ids)
+    except Exception as e:
+        print(f"⚠️  Could not load tokenizer for {model_name} ({e}); estimating tokens from characters")
+        return estimate_tokens
@@ -1,7 +1,8 @@
 """Streamlit UI for Course AI Assistant."""
 import streamlit as st
 import requests
-from typing import Optional
+import json
+from typing import Optional, Iterator
 import time
 
 
@@ -51,27 +52,30 @@ def get_subjects() -> list[str]:
     return []
 
 
-def ask_question(question: str, use_web_search: bool, subject: str = "all") -> Optional[dict]:
-    """Send question to API."""
+def ask_question_stream(question: str, use_web_search: bool, subject: str = "all") -> Iterator[dict]:
+    """Send question to the streaming API and yield its events as they arrive."""
     try:
-        response = requests.post(
-            f"{API_URL}/api/ask",
+        with requests.post(
+            f"{API_URL}/api/ask/stream",
             json={
                 "question": question,
                 "use_web_search": use_web_search,
                 "subject": subject if subject != "all" else None
             },
-            timeout=300  # 5 minutes for first request (model loading)
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            st.error(f"Error: {response.json().get('detail', 'Unknown error')}")
+            stream=True,
+            timeout=(5, 300)  # Connect timeout, max gap between events
+        ) as response:
+            if response.status_code != 200:
+                st.error(f"Error: {response.json().get('detail', 'Unknown error')}")
+                return
+
+            for line in response.iter_lines(decode_unicode=True):
+                if line and line.startswith("data: "):
+                    yield json.loads(line[len("data: "):])
     except requests.exceptions.Timeout:
         st.error("Request timed out. The question might be too complex.")
     except Exception as e:
         st.error(f"Connection error: {str(e)}")
-    return None
 
 
 def upload_pdf(file, subject: str) -> Optional[dict]:
@@ -98,10 +102,10 @@ def upload_pdf(file, subject: str) -> Optional[dict]:
 
 
 def trigger_ingestion() -> Optional[dict]:
-    """Trigger document ingestion."""
+    """Queue document ingestion; returns the job."""
     try:
-        response = requests.post(f"{API_URL}/api/ingest", timeout=600)
-        if response.status_code == 200:
+        response = requests.post(f"{API_URL}/api/ingest", timeout=10)
+        if response.status_code in (200, 202):
             return response.json()
         else:
             st.error(f"Ingestion failed: {response.json().get('detail', 'Unknown error')}")
@@ -111,6 +115,17 @@ def trigger_ingestion() -> Optional[dict]:
         return None
 
 
+def get_ingestion_job(job_id: str) -> Optional[dict]:
+    """Get the status of an ingestion job."""
+    try:
+        response = requests.get(f"{API_URL}/api/ingest/{job_id}", timeout=5)
+        if response.status_code == 200:
+            return response.json()
+        return None
+    except Exception:
+        return None
+
+
 def format_citation(citation: dict) -> str:
     """Format a citation nicely."""
     return f"📄 **{citation['source']}** (Page {citation['page']}) - Relevance: {citation['relevance']:.2f}"
@@ -287,18 +302,22 @@ with st.sidebar:
             # Ingestion button
             st.write("**Process New Documents:**")
             if st.button("🔄 Process New Documents", use_container_width=True):
-                with st.spinner("Processing documents... This may take several minutes"):
-                    result = trigger_ingestion()
-                    if result and result.get("status") == "success":
-                        st.success("✅ Documents processed successfully!")
-                        st.info("🔄 Server is restarting automatically...")
-                        st.info("💡 Refresh this page in 5 seconds to see new documents")
-                        # Auto-refresh after delay
-                        import time
-                        time.sleep(3)
-                        st.rerun()
-                    elif result:
-                        st.error(f"❌ {result.get('message', 'Processing failed')}")
+                result = trigger_ingestion()
+                if result:
+                    job = result["job"]
+                    progress = st.progress(0.0, text="Waiting to start...")
+                    while job["status"] in ("queued", "running"):
+                        time.sleep(1)
+                        job = get_ingestion_job(result["job_id"]) or job
+                        done = job["processed_files"] / job["total_files"] if job["total_files"] else 0.0
+                        current = f" — {job['current_file']}" if job["current_file"] else ""
+                        progress.progress(done, text=f"{job['message']}{current}")
+
+                    if job["status"] == "completed":
+                        progress.progress(1.0, text=job["message"])
+                        st.success(f"✅ {job['message']}")
+                    else:
+                        st.error(f"❌ {job.get('error') or job['message']}")
     else:
         st.info("Connect to API to upload documents")
 
@@ -378,16 +397,37 @@ if prompt := st.chat_input("Ask a question about your course materials..."):
         else:
             spinner_msg = "🤔 Thinking..."
 
+        answer_placeholder = st.empty()
+        response = None
+        answer = ""
+
         with st.spinner(spinner_msg):
-            response = ask_question(
+            events = ask_question_stream(
                 prompt,
                 st.session_state.use_web_search,
                 st.session_state.selected_subject
             )
+            # Wait for retrieval results; tokens are rendered below as they arrive
+            for event in events:
+                if event["type"] == "retrieval":
+                    response = {**event, "answer": "", "web_sources": [], "used_web_search": False}
+                    break
+                if event["type"] == "error":
+                    st.error(f"Error: {event['detail']}")
+                    break
 
         if response:
-            # Display answer
-            st.markdown(response["answer"])
+            for event in events:
+                if event["type"] == "token":
+                    answer += event["text"]
+                    answer_placeholder.markdown(answer + "▌")
+                elif event["type"] == "done":
+                    response.update(event)
+                elif event["type"] == "error":
+                    st.error(f"Error: {event['detail']}")
+
+            response["answer"] = answer
+            answer_placeholder.markdown(answer)
 
             # Store message with metadata
             st.session_state.messages.append({
@@ -1,54 +1,399 @@
 """Vector database using ChromaDB for local storage."""
-from typing import List, Dict, Any, Optional
+import copy
+import threading
+from dataclasses import dataclass
+from typing import List, Dict, Any, Iterable, Optional, Union
+import numpy as np
 import chromadb
 from chromadb.config import Settings
 from tqdm import tqdm
 from src import config
 from src.embeddings import EmbeddingGenerator
 from src.document_processor import DocumentChunk
-
+from src.catalog import SourceCatalog, CollectionAliases
+from src.bm25_index import BM25Index
+from src.numpy_index import NumpyClient, distances_to
+from src.sharding import ShardedClient
+
+# Chroma accepts numpy embeddings directly from 0.5; older versions need lists
+CHROMA_ACCEPTS_NUMPY = tuple(int(x) for x in chromadb.__version__.split(".")[:2]) >= (0, 5)
+DISTANCE_METRICS = ("cosine", "ip", "l2")
+
+
+def as_embedding_array(embeddings: Union[np.ndarray, List[List[float]]]) -> np.ndarray:
+    """View embeddings as a contiguous 2-D float32 array (no copy if already one)."""
+    array = np.ascontiguousarray(embeddings, dtype=np.float32)
+    return array.reshape(1, -1) if array.ndim == 1 else array
+
+
+def normalize_rows(embeddings: np.ndarray) -> np.ndarray:
+    """Scale each row to unit length (all-zero rows are left as they are)."""
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+def distance_to_relevance(distance: float, metric: str) -> float:
+    """
+    Cosine similarity of unit vectors from a distance in the given space.
+
+    Chroma's cosine and ip distances are 1 - similarity; its l2 distance
+    is squared, which for unit vectors is 2 - 2 * cosine.
+    """
+    if metric == "l2":
+        return 1 - distance / 2
+    return 1 - distance
+
+
+def index_metadata() -> Dict[str, Any]:
+    """Metadata for a new collection: distance metric, HNSW parameters and quantization from config."""
+    if config.DISTANCE_METRIC not in DISTANCE_METRICS:
+        raise ValueError(f"Unknown distance metric: {config.DISTANCE_METRIC} "
+                         f"(expected one of {', '.join(DISTANCE_METRICS)})")
+    metadata = {
+        "description": "Course materials for RAG",
+        "hnsw:space": config.DISTANCE_METRIC,
+        "hnsw:M": config.HNSW_M,
+        "hnsw:construction_ef": config.HNSW_EF_CONSTRUCTION,
+        "hnsw:search_ef": config.HNSW_EF_SEARCH,
+    }
+    if config.VECTOR_BACKEND == "numpy" and config.VECTOR_QUANTIZATION != "none":
+        metadata["quantization"] = config.VECTOR_QUANTIZATION
+    return metadata
+
+
+def to_chroma(embeddings: np.ndarray):
+    """Pass embeddings to Chroma in the form the installed version accepts."""
+    return embeddings if CHROMA_ACCEPTS_NUMPY else embeddings.tolist()
+
+
+def chroma_batch_size(client, default: int = 5000) -> int:
+    """Largest batch a Chroma client accepts per add (get_max_batch_size() is not in every version)."""
+    if hasattr(client, "get_max_batch_size"):
+        return client.get_max_batch_size()
+    return getattr(client, "max_batch_size", None) or default
+
+
+def select_results(results: Dict[str, Any], order: List[int]) -> Dict[str, Any]:
+    """
+    Pick and reorder rows of a search result dict.
+
+    Args:
+        results: Dict of parallel lists (ids, documents, metadatas, distances)
+            and optionally an embeddings array
+        order: Row indices to keep, in their new order
+
+    Returns:
+        Dict with the same keys
+    """
+    selected = {
+        field: [results[field][i] for i in order]
+        for field in ('ids', 'documents', 'metadatas', 'distances')
+    }
+    if 'embeddings' in results:
+        selected['embeddings'] = as_embedding_array(results['embeddings'])[order]
+    return selected
+
+
+@dataclass
+class IndexGeneration:
+    """One physical collection with its catalog and keyword index."""
+    name: str
+    collection: Any
+    catalog: SourceCatalog
+    keyword_index: BM25Index
 
 
 class VectorStore:
-    """Manage document embeddings in ChromaDB."""
-
-    def __init__(self, collection_name: str = "course_documents"):
+    """
+    Manage document embeddings in ChromaDB.
+
+    The logical collection is served by one physical "generation". Writers
+    can build a new generation off to the side (stage_generation) and
+    publish it with an atomic alias switch; readers pick the switch up on
+    their next get_version() call, while queries holding a pinned view
+    finish against the generation they started on. With SHARD_BY_SUBJECT
+    a generation is stored as one collection per subject (src/sharding.py).
+    """
+
+    def __init__(self, collection_name: str = "course_documents", generation: Optional[str] = None):
         """
         Initialize vector store.
 
         Args:
             collection_name: Name of the ChromaDB collection
+            generation: Physical collection to open and stay on; by default
+                the generation the alias currently points to is followed
         """
         self.collection_name = collection_name
 
-        # Initialize ChromaDB
-        self.client = chromadb.PersistentClient(
-            path=str(config.VECTORDB_DIR),
-            settings=Settings(anonymized_telemetry=False)
+        # Initialize ChromaDB, or the exact-search numpy index with the same interface
+        # (each backend keeps its own catalog, keyword index and aliases)
+        if config.VECTOR_BACKEND == "numpy":
+            self.data_dir = config.VECTORDB_DIR / "numpy"
+            self.client = NumpyClient(self.data_dir, rescore=config.QUANTIZATION_RESCORE)
+        elif config.VECTOR_BACKEND == "chroma":
+            self.data_dir = config.VECTORDB_DIR
+            self.client = chromadb.PersistentClient(
+                path=str(self.data_dir),
+                settings=Settings(anonymized_telemetry=False)
+            )
+        else:
+            raise ValueError(f"Unknown vector backend: {config.VECTOR_BACKEND} (expected chroma or numpy)")
+        # Per-subject shards look like one collection per generation
+        self.client = ShardedClient(
+            self.client, shard=config.SHARD_BY_SUBJECT, workers=config.SHARD_SEARCH_WORKERS, to_client=to_chroma
         )
 
-        # Get or create collection
-        self.collection = self.client.get_or_create_collection(
-            name=collection_name,
-            metadata={"description": "Course materials for RAG"}
-        )
+        self.aliases = CollectionAliases(self.data_dir / "catalog.sqlite3")
+        self._pinned = generation is not None
+        self._swap_lock = threading.Lock()
+        self._generation = self._open_generation(generation or self._published_generation())
 
         print(f"✓ Vector store initialized: {collection_name}")
-        print(f"  Location: {config.VECTORDB_DIR}")
+        print(f"  Location: {self.data_dir} ({config.VECTOR_BACKEND})")
         print(f"  Current documents: {self.collection.count()}")
+        settings = {key: value for key, value in index_metadata().items() if key.startswith("hnsw:")}
+        if config.VECTOR_BACKEND == "numpy":
+            settings["quantization"] = config.VECTOR_QUANTIZATION
+        elif config.VECTOR_QUANTIZATION != "none":
+            print("⚠️  VECTOR_QUANTIZATION only applies to the numpy backend")
+        built = {key: (self.collection.metadata or {}).get(key) for key in settings}
+        if built["hnsw:space"] is None:
+            built["hnsw:space"] = "l2"  # Chroma's default for collections created without one
+        if "quantization" in built:
+            built["quantization"] = built["quantization"] or "none"
+        if built != settings:
+            print(f"⚠️  Index was built with {built}; the configured {settings} "
+                  f"apply after a rebuild (python scripts/tune_index.py --rebuild)")
+
+    @property
+    def collection(self):
+        """Chroma (or numpy) collection of the current generation."""
+        return self._generation.collection
+
+    @property
+    def catalog(self) -> SourceCatalog:
+        """Source catalog of the current generation."""
+        return self._generation.catalog
+
+    @property
+    def keyword_index(self) -> BM25Index:
+        """Keyword index of the current generation."""
+        return self._generation.keyword_index
+
+    @property
+    def metric(self) -> str:
+        """Distance metric of the current generation (Chroma defaults to l2)."""
+        return (self.collection.metadata or {}).get("hnsw:space", "l2")
+
+    def relevance(self, distance: float) -> float:
+        """Cosine similarity for a distance returned by this store."""
+        return distance_to_relevance(distance, self.metric)
+
+    @property
+    def generation(self) -> str:
+        """Name of the physical collection currently served."""
+        return self._generation.name
+
+    def _published_generation(self) -> str:
+        """Physical collection the alias points to (the plain name before the first swap)."""
+        return self.aliases.resolve(self.collection_name) or self.collection_name
+
+    def _open_generation(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> IndexGeneration:
+        """Open (or create) a physical collection and its sidecars."""
+        generation = IndexGeneration(
+            name=name,
+            collection=self.client.get_or_create_collection(
+                name=name,
+                metadata=metadata or index_metadata()
+            ),
+            # Sidecar catalog so stats/sources/subjects don't scan the collection
+            catalog=SourceCatalog(self.data_dir / "catalog.sqlite3", name),
+            # Keyword index for hybrid retrieval, maintained alongside the collection
+            keyword_index=BM25Index(self.data_dir / "bm25.sqlite3", name)
+        )
+        self._sync_catalog(generation)
+        self._sync_keyword_index(generation)
+        return generation
+
+    def _sync_catalog(self, generation: IndexGeneration) -> None:
+        """Rebuild the catalog if it disagrees with the collection (e.g. pre-existing DB)."""
+        count = generation.collection.count()
+        if generation.catalog.total_chunks() == count:
+            return
+
+        print(f"  Rebuilding source catalog ({count} chunks)...")
+        generation.catalog.rebuild(self._iter_metadatas(generation.collection))
+
+    def _sync_keyword_index(self, generation: IndexGeneration) -> None:
+        """Rebuild the keyword index if it disagrees with the collection."""
+        count = generation.collection.count()
+        if generation.keyword_index.count() == count:
+            return
+
+        print(f"  Rebuilding keyword index ({count} chunks)...")
+        generation.keyword_index.clear()
+        offset = 0
+        page_size = 5000
+        while True:
+            page = generation.collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+            generation.keyword_index.add(page['ids'], page['documents'], page['metadatas'])
+            if len(page['ids']) < page_size:
+                break
+            offset += page_size
+
+    def refresh(self) -> bool:
+        """
+        Switch to the published generation if another writer swapped it.
+
+        Returns:
+            True if the generation changed
+        """
+        if self._pinned:
+            return False
+
+        name = self._published_generation()
+        if name == self._generation.name:
+            return False
+
+        with self._swap_lock:
+            if name != self._generation.name:
+                self._generation = self._open_generation(name)
+                print(f"🔄 Switched to index generation {name}")
+        return True
+
+    def pin(self) -> "VectorStore":
+        """View of the current generation that ignores later swaps; use one per query."""
+        view = copy.copy(self)
+        view._pinned = True
+        return view
+
+    def stage_generation(self, copy_current: bool = True) -> "VectorStore":
+        """
+        Create a new generation that readers don't see until it is published.
+
+        Args:
+            copy_current: Start from a copy of the current contents (for
+                incremental updates) instead of an empty collection
+
+        Returns:
+            A pinned VectorStore writing to the staged generation
+        """
+        self.refresh()
+        current = self._generation
+        numbers = [self._generation_number(name) for name in self._list_generations()]
+        name = f"{self.collection_name}__gen{max(numbers + [0]) + 1}"
+
+        staged = copy.copy(self)
+        staged._pinned = True
+        # New generations are built with the configured metric and HNSW parameters
+        staged._generation = self._open_generation(name)
+
+        if copy_current:
+            print(f"📋 Copying {current.collection.count()} chunks into {name}...")
+            staged._copy_from(current)
+        staged.catalog.set_version(current.catalog.version() + 1)
+        return staged
+
+    def _copy_from(self, source: IndexGeneration, page_size: int = 1000) -> None:
+        """Copy every chunk, catalog entry and keyword posting from another generation."""
+        offset = 0
+        while True:
+            page = source.collection.get(
+                include=["embeddings", "documents", "metadatas"], limit=page_size, offset=offset
+            )
+            if page['ids']:
+                self.collection.upsert(
+                    ids=page['ids'],
+                    embeddings=to_chroma(normalize_rows(as_embedding_array(page['embeddings']))),
+                    documents=page['documents'],
+                    metadatas=page['metadatas']
+                )
+            if len(page['ids']) < page_size:
+                break
+            offset += page_size
+
+        self.catalog.copy_from(source.name)
+        self.keyword_index.copy_from(source.name)
+
+    def publish(self, staged: "VectorStore") -> None:
+        """
+        Make a staged generation the live one.
+
+        The alias switch is a single SQLite write, so other processes see
+        either the old or the new generation. The previous generation is
+        kept for queries still running on it; older ones are dropped.
+
+        Args:
+            staged: Store returned by stage_generation
+        """
+        staged.catalog.set_version(max(staged.catalog.version(), self.catalog.version() + 1))
+        self.aliases.point(self.collection_name, staged.generation)
+
+        with self._swap_lock:
+            previous = self._generation
+            self._generation = staged._generation
+
+        oldest_kept = self._generation_number(previous.name)
+        for name in self._list_generations():
+            if self._generation_number(name) < oldest_kept:
+                self._drop_generation(name)
+
+        print(f"✓ Published index generation {staged.generation}")
+
+    def discard(self, staged: "VectorStore") -> None:
+        """Drop a staged generation that will not be published."""
+        self._drop_generation(staged.generation)
+
+    def _list_generations(self) -> List[str]:
+        """Physical collections that belong to this logical collection."""
+        names = [getattr(c, "name", c) for c in self.client.list_collections()]
+        return [name for name in names if self._generation_number(name) >= 0]
+
+    def _generation_number(self, name: str) -> int:
+        """Generation number of a physical collection (0 for the plain name, -1 if unrelated)."""
+        if name == self.collection_name:
+            return 0
+        prefix = f"{self.collection_name}__gen"
+        if name.startswith(prefix) and name[len(prefix):].isdigit():
+            return int(name[len(prefix):])
+        return -1
+
+    def _drop_generation(self, name: str) -> None:
+        """Delete a physical collection and its sidecar data."""
+        try:
+            self.client.delete_collection(name)
+        except ValueError:
+            pass  # Already gone
+        SourceCatalog(self.data_dir / "catalog.sqlite3", name).drop()
+        BM25Index(self.data_dir / "bm25.sqlite3", name).clear()
+
+    @staticmethod
+    def _iter_metadatas(collection, page_size: int = 5000):
+        """Yield every chunk's metadata, page by page, without loading embeddings."""
+        offset = 0
+        while True:
+            page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            metadatas = page['metadatas'] or []
+            yield from metadatas
+            if len(metadatas) < page_size:
+                break
+            offset += page_size
 
     def add_chunks(
             self,
             chunks: List[DocumentChunk],
-            embeddings: List[List[float]]
+            embeddings: Union[np.ndarray, List[List[float]]]
     ) -> None:
         """
         Add document chunks with their embeddings to the store.
 
         Args:
             chunks: List of DocumentChunk objects
-            embeddings: Corresponding embeddings
+            embeddings: Corresponding embeddings, ideally a float32 array
+                of shape (len(chunks), dimension)
         """
+        embeddings = normalize_rows(as_embedding_array(embeddings)) if len(embeddings) else embeddings
         if len(chunks) != len(embeddings):
             raise ValueError("Number of chunks must match number of embeddings")
 
@@ -69,12 +414,16 @@ class VectorStore:
             for i in range(0, len(chunks), batch_size):
                 end_idx = min(i + batch_size, len(chunks))
 
-                self.collection.add(
+                # Chunks already stored under the same ID are overwritten, not added
+                replaced = self.collection.get(ids=ids[i:end_idx], include=["metadatas"])['metadatas'] or []
+                self.collection.upsert(
                     ids=ids[i:end_idx],
-                    embeddings=embeddings[i:end_idx],
+                    embeddings=to_chroma(embeddings[i:end_idx]),
                     documents=documents[i:end_idx],
                     metadatas=metadatas[i:end_idx]
                 )
+                self.catalog.record_chunks(metadatas[i:end_idx], replaced)
+                self.keyword_index.add(ids[i:end_idx], documents[i:end_idx], metadatas[i:end_idx])
 
                 pbar.update(1)
 
@@ -98,72 +447,207 @@ class VectorStore:
             Dict with documents, metadatas, and distances
         """
         # Generate query embedding
-        query_embedding = embedding_generator.embed_text(query)
+        query_embedding = embedding_generator.embed_text_array(query)
+
+        return self.search_by_embedding(query_embedding, n_results, filter_metadata)
+
+    def search_by_embedding(
+        self,
+        query_embedding: Union[np.ndarray, List[float]],
+        n_results: int = 5,
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        include_embeddings: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Search for relevant documents using a precomputed query embedding.
+
+        Args:
+            query_embedding: Embedding of the query
+            n_results: Number of results to return
+            filter_metadata: Optional metadata filters
+            include_embeddings: Also return the chunks' embeddings
 
-        # Search
+        Returns:
+            Dict with documents, metadatas, and distances
+        """
+        return self.search_batch(query_embedding, n_results, filter_metadata, include_embeddings)[0]
+
+    def search_batch(
+        self,
+        query_embeddings: Union[np.ndarray, List[List[float]]],
+        n_results: int = 5,
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        include_embeddings: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for several queries in one Chroma request.
+
+        Args:
+            query_embeddings: Query embeddings, shape (num_queries, dimension)
+            n_results: Number of results per query
+            filter_metadata: Optional metadata filters (shared by all queries)
+            include_embeddings: Also return each result's embeddings as a
+                float32 array under "embeddings"
+
+        Returns:
+            One dict with ids, documents, metadatas, and distances per query
+        """
+        query_embeddings = normalize_rows(as_embedding_array(query_embeddings))
+        include = ["documents", "metadatas", "distances"]
+        if include_embeddings:
+            include.append("embeddings")
         results = self.collection.query(
-            query_embeddings=[query_embedding],
+            query_embeddings=to_chroma(query_embeddings),
             n_results=n_results,
-            where=filter_metadata
+            where=filter_metadata,
+            include=include
         )
 
+        batch = []
+        for i in range(len(query_embeddings)):
+            found = {
+                'ids': results['ids'][i] if results['ids'] else [],
+                'documents': results['documents'][i] if results['documents'] else [],
+                'metadatas': results['metadatas'][i] if results['metadatas'] else [],
+                'distances': results['distances'][i] if results['distances'] else []
+            }
+            if include_embeddings:
+                rows = results['embeddings'][i] if results['embeddings'] is not None else []
+                found['embeddings'] = as_embedding_array(rows).reshape(len(found['ids']), -1)
+            batch.append(found)
+        return batch
+
+    def keyword_search(self, query: str, n_results: int = 5, subject: Optional[str] = None) -> List[str]:
+        """
+        Search the BM25 keyword index.
+
+        Args:
+            query: Search query
+            n_results: Number of results to return
+            subject: Optional subject filter
+
+        Returns:
+            Chunk IDs, best match first
+        """
+        return [chunk_id for chunk_id, _ in self.keyword_index.search(query, n_results, subject)]
+
+    def get_chunks(self, chunk_ids: List[str], query_embedding: Union[np.ndarray, List[float]]) -> Dict[str, Any]:
+        """
+        Fetch chunks by ID with their distance to a query.
+
+        Distances use the same measure as search_by_embedding, so results
+        from both can be compared.
+
+        Args:
+            chunk_ids: Chunk IDs to fetch
+            query_embedding: Embedding of the query
+
+        Returns:
+            Dict with ids, documents, metadatas, distances and embeddings (in chunk_ids order)
+        """
+        if not chunk_ids:
+            return {'ids': [], 'documents': [], 'metadatas': [], 'distances': [],
+                    'embeddings': np.empty((0, 0), dtype=np.float32)}
+
+        results = self.collection.get(ids=chunk_ids, include=["documents", "metadatas", "embeddings"])
+        position = {chunk_id: i for i, chunk_id in enumerate(results['ids'])}
+        order = [position[chunk_id] for chunk_id in chunk_ids if chunk_id in position]
+
+        embeddings = as_embedding_array(results['embeddings'])[order]
+        query = normalize_rows(as_embedding_array(query_embedding))
+        norms = np.einsum("ij,ij->i", embeddings, embeddings)
+        distances = distances_to(embeddings, norms, query, self.metric)[:, 0]
+
         return {
-            'documents': results['documents'][0] if results['documents'] else [],
-            'metadatas': results['metadatas'][0] if results['metadatas'] else [],
-            'distances': results['distances'][0] if results['distances'] else []
+            'ids': [results['ids'][i] for i in order],
+            'documents': [results['documents'][i] for i in order],
+            'metadatas': [results['metadatas'][i] for i in order],
+            'distances': distances.tolist(),
+            'embeddings': embeddings
         }
 
+    def remove_document(
+            self,
+            source: str,
+            subject: str,
+            chunk_ids: Optional[List[str]] = None,
+            keep: Iterable[str] = ()
+    ) -> None:
+        """
+        Remove a document's chunks and its catalog entry.
+
+        Args:
+            source: Source file name
+            subject: Subject the source belongs to
+            chunk_ids: Chunk IDs to delete; if None, every chunk of the
+                source/subject pair is deleted
+            keep: IDs of the document's new chunks, which are not deleted;
+                the catalog entry is re-summarized from them
+        """
+        keep = set(keep)
+        if chunk_ids is None and not keep:
+            self.collection.delete(where={"$and": [{"source": source}, {"subject": subject}]})
+            self.keyword_index.delete(self.keyword_index.chunk_ids_for_source(source, subject))
+        else:
+            if chunk_ids is None:
+                chunk_ids = self.keyword_index.chunk_ids_for_source(source, subject)
+            chunk_ids = [chunk_id for chunk_id in chunk_ids if chunk_id not in keep]
+            for i in range(0, len(chunk_ids), 5000):
+                self.collection.delete(ids=chunk_ids[i:i + 5000])
+            self.keyword_index.delete(chunk_ids)
+
+        if keep:
+            kept = sorted(keep)
+            self.catalog.replace_source(source, subject, [
+                meta for i in range(0, len(kept), 5000)
+                for meta in self.collection.get(ids=kept[i:i + 5000], include=["metadatas"])['metadatas']
+            ])
+        else:
+            self.catalog.remove_source(source, subject)
+
     def clear(self) -> None:
         """Clear all documents from the collection."""
-        self.client.delete_collection(self.collection_name)
-        self.collection = self.client.create_collection(
-            name=self.collection_name,
-            metadata={"description": "Course materials for RAG"}
-        )
-        print(f"✓ Cleared collection: {self.collection_name}")
+        generation = self._generation
+        self.client.delete_collection(generation.name)
+        generation.catalog.clear()
+        generation.keyword_index.clear()
+        self._generation = self._open_generation(generation.name)  # Recreated with the configured settings
+        print(f"✓ Cleared collection: {generation.name}")
 
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector store."""
-        count = self.collection.count()
-
-        # Get ALL data to check sources (not just a sample)
-        if count > 0:
-            all_data = self.collection.get()
-            sources = set(m['source'] for m in all_data['metadatas'])
-        else:
-            sources = set()
+        sources = self.catalog.sources()
 
         return {
-            'total_chunks': count,
+            'total_chunks': self.collection.count(),
             'unique_sources': len(sources),
             'sources': list(sources)
         }
 
     def get_processed_sources(self) -> set:
         """Get list of already processed PDF sources."""
-        count = self.collection.count()
-        if count == 0:
-            return set()
-
-        # Get all metadata
-        all_data = self.collection.get()
-        sources = {m['source'] for m in all_data['metadatas']}
-        return sources
+        return self.catalog.sources()
 
-    def has_source(self, source_name: str) -> bool:
+    def has_source(self, source_name: str, subject: Optional[str] = None) -> bool:
         """Check if a source has already been processed."""
-        return source_name in self.get_processed_sources()
+        return self.catalog.has_source(source_name, subject)
 
     def get_subjects(self) -> list[str]:
         """Get list of all subjects in the database."""
-        count = self.collection.count()
-        if count == 0:
-            return []
-
-        # Get all metadata
-        all_data = self.collection.get()
-        subjects = {m.get('subject', 'general') for m in all_data['metadatas']}
-        return sorted(list(subjects))
+        return self.catalog.subjects()
+
+    def get_version(self) -> int:
+        """
+        Get a counter that changes whenever documents are added or removed.
+
+        Also picks up a newly published generation.
+        """
+        self.refresh()
+        return self.catalog.version()
+
+    def get_source_details(self) -> List[Dict[str, Any]]:
+        """Get per-source chunk counts, subjects, page ranges and ingest times."""
+        return self.catalog.entries()
 
 
 # Quick test
@@ -11,6 +11,10 @@ from src.vector_store import VectorStore
 from src.embeddings import EmbeddingGenerator
 from src.document_processor import PDFProcessor, DocumentChunk
 from src.agent.core import CourseAgent
+from src.catalog import SourceCatalog
+from src.manifest import IngestManifest
+from src.embedding_cache import EmbeddingCache
+from src.bm25_index import BM25Index, tokenize
 
 
 class TestVectorStore:
@@ -51,6 +55,375 @@ class TestVectorStore:
         assert isinstance(sources, set)
 
 
+class TestSourceCatalog:
+    """Test the source catalog sidecar."""
+
+    def test_record_and_query(self, tmp_path):
+        """Test that recorded chunks are summarized per source."""
+        catalog = SourceCatalog(tmp_path / "catalog.sqlite3", "test")
+        catalog.record_chunks([
+            {'source': 'a.pdf', 'subject': 'logic', 'page_number': 3, 'total_pages': 10},
+            {'source': 'a.pdf', 'subject': 'logic', 'page_number': 1, 'total_pages': 10},
+            {'source': 'b.pdf', 'subject': 'theory', 'page_number': 2, 'total_pages': 5},
+        ])
+        catalog.record_chunks([
+            {'source': 'a.pdf', 'subject': 'logic', 'page_number': 7, 'total_pages': 10},
+        ])
+
+        assert catalog.total_chunks() == 4
+        assert catalog.sources() == {'a.pdf', 'b.pdf'}
+        assert catalog.subjects() == ['logic', 'theory']
+        assert catalog.has_source('a.pdf')
+        assert not catalog.has_source('c.pdf')
+
+        entry = catalog.entries()[0]
+        assert entry['source'] == 'a.pdf'
+        assert entry['chunk_count'] == 3
+        assert (entry['min_page'], entry['max_page']) == (1, 7)
+
+    def test_replaced_chunks_are_not_counted_twice(self, tmp_path):
+        """Test that re-recording chunks under their old IDs keeps the counts exact."""
+        catalog = SourceCatalog(tmp_path / "catalog.sqlite3", "test")
+        first = [{'source': 'a.pdf', 'subject': 'logic', 'page_number': p} for p in (1, 2)]
+        catalog.record_chunks(first)
+        catalog.record_chunks(first, replaced=first)
+        assert catalog.total_chunks() == 2
+
+        # A chunk ID moved to another source
+        catalog.record_chunks([{'source': 'b.pdf', 'subject': 'logic', 'page_number': 1}], replaced=first[:1])
+        assert {e['source']: e['chunk_count'] for e in catalog.entries()} == {'a.pdf': 1, 'b.pdf': 1}
+
+        catalog.record_chunks([{'source': 'b.pdf', 'subject': 'logic', 'page_number': 2}], replaced=first[1:])
+        assert catalog.sources() == {'b.pdf'}
+
+    def test_clear_and_rebuild(self, tmp_path):
+        """Test clearing and rebuilding the catalog."""
+        catalog = SourceCatalog(tmp_path / "catalog.sqlite3", "test")
+        catalog.record_chunks([{'source': 'a.pdf', 'subject': 'logic', 'page_number': 1}])
+
+        catalog.rebuild([{'source': 'b.pdf', 'page_number': 1}])
+        assert catalog.sources() == {'b.pdf'}
+        assert catalog.subjects() == ['general']
+
+        catalog.clear()
+        assert catalog.total_chunks() == 0
+        assert catalog.sources() == set()
+
+
+    def test_copy_for_new_generation(self, tmp_path):
+        """Test copying a catalog to a new generation and switching the alias."""
+        from src.catalog import CollectionAliases
+
+        live = SourceCatalog(tmp_path / "catalog.sqlite3", "docs")
+        live.record_chunks([{'source': 'a.pdf', 'subject': 'logic', 'page_number': 1}])
+
+        staged = SourceCatalog(tmp_path / "catalog.sqlite3", "docs__gen1")
+        staged.copy_from("docs")
+        staged.record_chunks([{'source': 'b.pdf', 'subject': 'logic', 'page_number': 1}])
+        assert staged.sources() == {'a.pdf', 'b.pdf'}
+        assert live.sources() == {'a.pdf'}
+
+        aliases = CollectionAliases(tmp_path / "catalog.sqlite3")
+        assert aliases.resolve("docs") is None
+        aliases.point("docs", "docs__gen1")
+        assert aliases.resolve("docs") == "docs__gen1"
+
+        live.drop()
+        assert live.total_chunks() == 0
+        assert live.version() == 0
+
+
+class TestIngestManifest:
+    """Test content-hash based change detection."""
+
+    def test_diff_detects_added_changed_removed(self, tmp_path):
+        """Test that the manifest classifies files by content."""
+        pdf_dir = tmp_path / "pdfs"
+        (pdf_dir / "logic").mkdir(parents=True)
+        kept = pdf_dir / "logic" / "lecture1.pdf"
+        edited = pdf_dir / "lecture1.pdf"
+        gone = pdf_dir / "old.pdf"
+        for path in (kept, edited, gone):
+            path.write_bytes(path.name.encode())
+
+        manifest = IngestManifest(tmp_path / "manifest.sqlite3", pdf_dir)
+        diff = manifest.diff([kept, edited, gone])
+        assert set(diff.added) == {kept, edited, gone}
+
+        for path in (kept, edited, gone):
+            manifest.record(path, [f"{path.name}_page1_chunk0"])
+
+        edited.write_bytes(b"new contents")
+        gone.unlink()
+        new = pdf_dir / "logic" / "lecture2.pdf"
+        new.write_bytes(b"lecture2")
+
+        diff = manifest.diff([kept, edited, new])
+        assert diff.unchanged == [kept]
+        assert diff.changed == [edited]
+        assert diff.added == [new]
+        assert [e.path for e in diff.removed] == ["old.pdf"]
+        assert diff.removed[0].chunk_ids == ["old.pdf_page1_chunk0"]
+
+
+class TestKeywordIndex:
+    """Test the BM25 keyword index."""
+
+    def test_tokenize_keeps_notation(self):
+        """Test that hyphenated terms are kept whole and split."""
+        assert tokenize("Is SAT NP-complete?") == ["sat", "np-complete", "np", "complete"]
+
+    def test_search_ranks_exact_terms(self, tmp_path):
+        """Test ranking, subject filtering and deletion."""
+        index = BM25Index(tmp_path / "bm25.sqlite3", "test")
+        index.add(
+            ["c1", "c2", "c3"],
+            [
+                "The pumping lemma proves a language is not regular.",
+                "Regular languages are closed under union.",
+                "The pumping lemma for context-free languages."
+            ],
+            [
+                {'source': 'a.pdf', 'subject': 'theory'},
+                {'source': 'a.pdf', 'subject': 'theory'},
+                {'source': 'b.pdf', 'subject': 'cfg'}
+            ]
+        )
+
+        assert [cid for cid, _ in index.search("pumping lemma regular", 3)][:2] == ["c1", "c3"]
+        assert [cid for cid, _ in index.search("pumping lemma", 3, subject="cfg")] == ["c3"]
+
+        index.delete(["c1"])
+        assert index.count() == 2
+        assert [cid for cid, _ in index.search("pumping lemma regular", 3)][0] == "c3"
+        assert index.chunk_ids_for_source("a.pdf", "theory") == ["c2"]
+
+
+class TestNumpyIndex:
+    """Test the memory-mapped exact-search backend."""
+
+    def test_query_is_exact(self, tmp_path):
+        """Test that search, subject masks and deletes match brute force."""
+        import numpy as np
+        from src.numpy_index import NumpyCollection
+
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(300, 8)).astype(np.float32)
+        subjects = ["a" if i % 3 else "b" for i in range(300)]
+        collection = NumpyCollection(tmp_path, "test")
+        collection.upsert(
+            ids=[f"c{i}" for i in range(300)],
+            embeddings=vectors,
+            documents=[f"text {i}" for i in range(300)],
+            metadatas=[{'source': 'x.pdf', 'subject': s, 'page_number': i} for i, s in enumerate(subjects)]
+        )
+        collection.delete(ids=["c1", "c2"])
+
+        queries = rng.normal(size=(3, 8)).astype(np.float32)
+        results = collection.query(queries, n_results=5, where={"subject": "a"})
+        for i, query in enumerate(queries):
+            distances = ((vectors - query) ** 2).sum(axis=1)
+            allowed = [j for j in np.argsort(distances) if subjects[j] == "a" and j not in (1, 2)]
+            assert results['ids'][i] == [f"c{j}" for j in allowed[:5]]
+            assert np.allclose(results['distances'][i], distances[allowed[:5]], atol=1e-4)
+            assert results['metadatas'][i][0]['subject'] == "a"
+
+        # Another instance (e.g. another process) sees the same data; deleted rows are reused
+        reopened = NumpyCollection(tmp_path, "test")
+        assert reopened.count() == 298
+        reopened.upsert(ids=["new"], embeddings=vectors[:1], documents=["new"],
+                        metadatas=[{'source': 'y.pdf', 'subject': 'b'}])
+        assert collection.get(ids=["new"], include=["embeddings"])['embeddings'].tolist() == [vectors[0].tolist()]
+        assert collection.count() == 299
+        collection.delete(where={"$and": [{"source": "x.pdf"}, {"subject": "b"}]})
+        assert collection.get(where={"subject": "b"}, include=[])['ids'] == ["new"]
+
+    def test_int8_quantization_rescores(self, tmp_path):
+        """Test that int8 search re-scored at full precision returns the exact neighbours."""
+        import numpy as np
+        from src.numpy_index import NumpyCollection, quantize_int8
+
+        rng = np.random.default_rng(2)
+        vectors = rng.normal(size=(500, 16)).astype(np.float32)
+        codes, scales = quantize_int8(vectors)
+        assert codes.dtype == np.int8
+        assert np.abs(codes * scales[:, None] - vectors).max() <= scales.max() / 2 + 1e-6
+
+        collection = NumpyCollection(tmp_path, "test", {"hnsw:space": "cosine", "quantization": "int8"}, rescore=4)
+        ids = [f"c{i}" for i in range(500)]
+        collection.upsert(ids, vectors, ids, [{'source': 'x.pdf', 'subject': 'a'} for _ in ids])
+        assert collection.codes_path.exists()
+
+        queries = rng.normal(size=(5, 16)).astype(np.float32)
+        results = collection.query(queries, n_results=5, include=["distances"])
+        unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        for i, query in enumerate(queries):
+            exact = 1 - unit @ (query / np.linalg.norm(query))
+            assert results['ids'][i] == [f"c{j}" for j in np.argsort(exact)[:5]]
+            assert np.allclose(results['distances'][i], np.sort(exact)[:5], atol=1e-5)
+
+        # Another process reopening the collection scans the same codes
+        assert NumpyCollection(tmp_path, "test").query(queries[:1], n_results=5, include=[])['ids'][0] == results['ids'][0]
+
+    def test_vector_store_backend(self, tmp_path, monkeypatch):
+        """Test that VectorStore runs on the numpy backend, including generation swaps."""
+        import numpy as np
+        from src import config
+
+        monkeypatch.setattr(config, "VECTORDB_DIR", tmp_path)
+        monkeypatch.setattr(config, "VECTOR_BACKEND", "numpy")
+        monkeypatch.setattr(config, "SHARD_BY_SUBJECT", False)
+
+        store = VectorStore()
+        chunks = [
+            DocumentChunk(text=f"chunk {i}", metadata={'source': 'a.pdf', 'subject': 'general', 'page_number': 1},
+                          chunk_id=f"a.pdf_page1_chunk{i}")
+            for i in range(3)
+        ]
+        store.add_chunks(chunks, np.eye(3, 4, dtype=np.float32))
+        assert store.search_by_embedding(np.array([0, 1, 0, 0], dtype=np.float32), 1)['ids'] == ["a.pdf_page1_chunk1"]
+
+        staged = store.stage_generation()
+        staged.remove_document("a.pdf", "general", ["a.pdf_page1_chunk0"])
+        store.publish(staged)
+        assert store.collection.count() == 2
+        assert store.get_stats()['total_chunks'] == 2
+        assert (tmp_path / "numpy" / staged.generation / "embeddings.f32").exists()
+
+
+class TestSharding:
+    """Test per-subject shards."""
+
+    @pytest.mark.parametrize("backend", ["chroma", "numpy"])
+    def test_scatter_gather_matches_single_index(self, tmp_path, monkeypatch, backend):
+        """Test that shards give the same results as one collection, and subject queries use one shard."""
+        import numpy as np
+        from src import config
+        from src.sharding import ShardedCollection
+
+        monkeypatch.setattr(config, "VECTORDB_DIR", tmp_path)
+        monkeypatch.setattr(config, "VECTOR_BACKEND", backend)
+        monkeypatch.setattr(config, "SHARD_BY_SUBJECT", True)
+
+        rng = np.random.default_rng(1)
+        vectors = rng.normal(size=(60, 8)).astype(np.float32)
+        subjects = ["logic", "math", "Theory 3"]
+        chunks = [
+            DocumentChunk(text=f"chunk {i}", chunk_id=f"c{i}",
+                          metadata={'source': f"{i % 4}.pdf", 'subject': subjects[i % 3], 'page_number': 1})
+            for i in range(60)
+        ]
+        store = VectorStore()
+        store.add_chunks(chunks, vectors)
+        assert isinstance(store.collection, ShardedCollection)
+        assert len(store.collection.shards()) == 3
+        assert store.collection.count() == 60
+
+        unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        query = rng.normal(size=8).astype(np.float32)
+        similarity = unit @ (query / np.linalg.norm(query))
+        ranked = [f"c{i}" for i in np.argsort(-similarity)]
+        assert store.search_by_embedding(query, 5)['ids'] == ranked[:5]
+        in_math = [chunk_id for chunk_id in ranked if subjects[int(chunk_id[1:]) % 3] == "math"]
+        assert store.search_by_embedding(query, 5, {"subject": "math"})['ids'] == in_math[:5]
+
+        # Paging and deletes span the shards; generations keep their shards together
+        assert len(store.collection.get(include=[], limit=25, offset=50)['ids']) == 10
+        store.remove_document("0.pdf", "logic")
+        assert store.collection.count() == 55
+        staged = store.stage_generation()
+        store.publish(staged)
+        assert store.collection.count() == 55
+        assert store.get_subjects() == sorted(subjects)
+
+
+class TestDistanceMetric:
+    """Test the configured distance metric and relevance scores."""
+
+    @pytest.mark.parametrize("backend,metric", [("chroma", "cosine"), ("numpy", "cosine"), ("numpy", "l2")])
+    def test_relevance_is_cosine(self, tmp_path, monkeypatch, backend, metric):
+        """Test that relevance is cosine similarity and matches between search and get_chunks."""
+        import numpy as np
+        from src import config
+
+        monkeypatch.setattr(config, "VECTORDB_DIR", tmp_path)
+        monkeypatch.setattr(config, "VECTOR_BACKEND", backend)
+        monkeypatch.setattr(config, "DISTANCE_METRIC", metric)
+
+        store = VectorStore()
+        assert store.metric == metric
+        chunks = [
+            DocumentChunk(text=f"chunk {i}", metadata={'source': 'a.pdf', 'subject': 'general', 'page_number': 1},
+                          chunk_id=f"c{i}")
+            for i in range(2)
+        ]
+        # Not unit length; the store normalizes them
+        store.add_chunks(chunks, np.array([[3, 0, 0, 0], [1, 1, 0, 0]], dtype=np.float32))
+
+        query = np.array([2, 0, 0, 0], dtype=np.float32)
+        results = store.search_by_embedding(query, 2)
+        assert results['ids'] == ["c0", "c1"]
+        relevances = [store.relevance(d) for d in results['distances']]
+        assert np.allclose(relevances, [1.0, np.sqrt(0.5)], atol=1e-3)
+
+        fetched = store.get_chunks(["c1"], query)
+        assert np.isclose(fetched['distances'][0], results['distances'][1], atol=1e-3)
+
+
+class TestSnapshot:
+    """Test index snapshot export and import."""
+
+    def test_round_trip_without_reembedding(self, tmp_path, monkeypatch):
+        """Test that a chroma snapshot loads into a fresh numpy node with the same results."""
+        import json
+        import numpy as np
+        from src import config
+        from src.snapshot import export_snapshot, import_snapshot
+
+        monkeypatch.setattr(config, "VECTORDB_DIR", tmp_path / "source")
+        monkeypatch.setattr(config, "VECTOR_BACKEND", "chroma")
+        rng = np.random.default_rng(3)
+        vectors = rng.normal(size=(30, 8)).astype(np.float32)
+        chunks = [
+            DocumentChunk(text=f"chunk {i} about topic{i % 3}", chunk_id=f"c{i}",
+                          metadata={'source': f"{i % 2}.pdf", 'subject': ["logic", "math"][i % 2], 'page_number': 1})
+            for i in range(30)
+        ]
+        source = VectorStore()
+        source.add_chunks(chunks, vectors)
+        pdf = tmp_path / "pdfs" / "0.pdf"
+        pdf.parent.mkdir()
+        pdf.write_bytes(b"pdf")
+        source_manifest = IngestManifest(tmp_path / "source.sqlite3", pdf.parent)
+        source_manifest.record(pdf, [f"c{i}" for i in range(0, 30, 2)])
+
+        bundle = tmp_path / "bundle"
+        info = export_snapshot(source, source_manifest, bundle, page_size=7)
+        assert info['chunks'] == 30 and info['dimension'] == 8
+
+        monkeypatch.setattr(config, "VECTORDB_DIR", tmp_path / "replica")
+        monkeypatch.setattr(config, "VECTOR_BACKEND", "numpy")
+        replica = VectorStore()
+        replica_manifest = IngestManifest(tmp_path / "replica.sqlite3", pdf.parent)
+        import_snapshot(replica, replica_manifest, bundle, page_size=7)
+
+        query = rng.normal(size=8).astype(np.float32)
+        assert replica.search_by_embedding(query, 5)['ids'] == source.search_by_embedding(query, 5)['ids']
+        assert replica.keyword_search("topic1", 30) == source.keyword_search("topic1", 30)
+        assert replica.get_stats()['total_chunks'] == 30
+        assert replica.get_subjects() == ["logic", "math"]
+        assert replica.get_version() >= source.get_version()
+        assert replica_manifest.entries() == source_manifest.entries()
+
+        # A damaged bundle is rejected before anything is loaded
+        info = json.loads((bundle / "snapshot.json").read_text())
+        info['files']['chunks.jsonl.gz'] = "0" * 64
+        (bundle / "snapshot.json").write_text(json.dumps(info))
+        with pytest.raises(ValueError):
+            import_snapshot(replica, replica_manifest, bundle)
+        assert replica.collection.count() == 30
+
+
 class TestEmbeddings:
     """Test embedding generation."""
 
@@ -80,6 +453,145 @@ class TestEmbeddings:
         assert len(embeddings) == 3
         assert all(len(e) == 384 for e in embeddings)
 
+    def test_embed_batch_array(self):
+        """Test that the array API returns one contiguous float32 matrix."""
+        import numpy as np
+
+        embed_gen = EmbeddingGenerator()
+        texts = ["Test 1", "Test 2", "Test 3"]
+        embeddings = embed_gen.embed_batch_array(texts, show_progress=False)
+
+        assert isinstance(embeddings, np.ndarray)
+        assert embeddings.dtype == np.float32
+        assert embeddings.shape == (3, 384)
+        assert embeddings.flags['C_CONTIGUOUS']
+        assert np.allclose(embeddings, embed_gen.embed_batch(texts, show_progress=False))
+
+    def test_length_bucketed_batches(self):
+        """Test that batches respect the token budget and results keep input order."""
+        import numpy as np
+
+        embed_gen = EmbeddingGenerator()
+        embed_gen.cache = None
+        embed_gen.token_budget = 512
+
+        lengths = np.array([10, 200, 15, 180, 12])
+        batches = embed_gen._length_batches(lengths)
+        assert sorted(np.concatenate(batches).tolist()) == [0, 1, 2, 3, 4]
+        assert all(len(b) * lengths[b].max() <= 512 for b in batches)
+
+        texts = ["short", "a much longer text " * 40, "tiny", "another long one " * 40, "brief"]
+        batched = embed_gen.embed_batch_array(texts, show_progress=False)
+        singles = np.stack([embed_gen.embed_text_array(t) for t in texts])
+        assert np.allclose(batched, singles, atol=1e-5)
+
+    def test_autotune_times_distinct_layouts_repeatedly(self):
+        """Test that autotune skips budgets giving the same batches and times the others several times."""
+        embed_gen = EmbeddingGenerator()
+        calls = []
+        embed_gen._encode_uncached = lambda texts, show_progress=False: calls.append((embed_gen.token_budget, len(texts)))
+
+        texts = ["short text"] * 40 + ["a much longer text " * 20] * 8
+        chosen = embed_gen.autotune(texts, budgets=(256, 1024, 8192, 16384, 32768), repeats=3)
+
+        timed = [budget for budget, count in calls if count == len(texts)]
+        assert set(timed) == set(embed_gen.tuning) and chosen in embed_gen.tuning
+        assert all(timed.count(budget) == 3 for budget in embed_gen.tuning)
+        assert 16384 not in embed_gen.tuning and 32768 not in embed_gen.tuning  # Same single batch as 8192
+        assert embed_gen.token_budget == chosen
+
+    def test_onnx_matches_torch(self, tmp_path):
+        """Test that the ONNX backend (float32 and int8) embeds like the torch model."""
+        import numpy as np
+        pytest.importorskip("torch")
+        pytest.importorskip("onnx")
+        pytest.importorskip("onnxruntime")
+        from src.embeddings import export_onnx, OnnxEncoder
+
+        embed_gen = EmbeddingGenerator(backend="torch")
+        export_onnx(embed_gen.model_name, tmp_path, quantize=True)
+
+        texts = ["Test 1", "The halting problem is undecidable.", "NP-complete problems " * 100]
+        expected = embed_gen.model.encode(texts, convert_to_numpy=True)
+        fp32 = OnnxEncoder(tmp_path).encode(texts)
+        int8 = OnnxEncoder(tmp_path, quantized=True).encode(texts)
+
+        assert np.allclose(fp32, expected, atol=1e-4)
+        assert (int8 * expected).sum(axis=1).min() > 0.98
+
+
+class TestEmbeddingCache:
+    """Test the on-disk embedding cache."""
+
+    def test_put_and_get(self, tmp_path):
+        """Test that stored embeddings are returned for equivalent text."""
+        import numpy as np
+
+        cache = EmbeddingCache(tmp_path, "test/model", dimension=4, max_bytes=1024)
+        key = EmbeddingCache.text_key("A  Turing\nmachine")
+        cache.put_many([key], np.array([[1, 2, 3, 4]], dtype=np.float32))
+
+        found = cache.get_many([EmbeddingCache.text_key("A Turing machine"), EmbeddingCache.text_key("other")])
+        assert list(found) == [key]
+        assert found[key].tolist() == [1, 2, 3, 4]
+
+        # Persists across instances
+        reopened = EmbeddingCache(tmp_path, "test/model", dimension=4, max_bytes=1024)
+        assert len(reopened) == 1
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Test that the cache stays within its size limit."""
+        import numpy as np
+
+        cache = EmbeddingCache(tmp_path, "test-model", dimension=4, max_bytes=4 * 4 * 10)  # 10 entries
+        keys = [EmbeddingCache.text_key(f"text {i}") for i in range(10)]
+        cache.put_many(keys, np.arange(40, dtype=np.float32).reshape(10, 4))
+        cache.get_many(keys[1:])  # Key 0 becomes least recently used
+
+        new_key = EmbeddingCache.text_key("text 10")
+        cache.put_many([new_key], np.full((1, 4), 99, dtype=np.float32))
+
+        assert len(cache) == 10
+        assert keys[0] not in cache.get_many([keys[0]])
+        assert cache.get_many([new_key])[new_key].tolist() == [99, 99, 99, 99]
+        assert cache.get_many([keys[9]])[keys[9]].tolist() == [36, 37, 38, 39]
+
+    def test_reused_slots_never_return_wrong_vectors(self, tmp_path):
+        """Test that concurrent eviction, or slot reuse by another process, gives a miss, not another key's vector."""
+        import threading
+        import numpy as np
+
+        cache = EmbeddingCache(tmp_path, "test-model", dimension=4, max_bytes=4 * 4 * 10)  # 10 entries
+        keys = [EmbeddingCache.text_key(f"text {i}") for i in range(40)]
+        wrong = []
+
+        def writer():
+            for round_ in range(20):
+                for i in range(0, 40, 5):
+                    cache.put_many(keys[i:i + 5], np.repeat(np.arange(i, i + 5, dtype=np.float32)[:, None], 4, axis=1))
+
+        def reader():
+            for _ in range(200):
+                for key, vector in cache.get_many(keys).items():
+                    if vector[0] != keys.index(key):
+                        wrong.append(key)
+
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not wrong
+
+        # Another process reused the slot after this one's lookup
+        cache.clear()
+        cache.put_many([keys[0]], np.zeros((1, 4), dtype=np.float32))
+        other = EmbeddingCache(tmp_path, "test-model", dimension=4, max_bytes=4 * 4 * 10)
+        other._ensure_capacity(1)
+        other._vectors[0] = 7
+        other._keys[0] = np.frombuffer(bytes.fromhex(keys[1]), dtype=np.uint8)
+        assert cache.get_many([keys[0]]) == {}
+
 
 class TestDocumentProcessor:
     """Test document processing."""
@@ -103,6 +615,96 @@ class TestDocumentProcessor:
         assert all(isinstance(c, DocumentChunk) for c in chunks)
         assert all(c.metadata['subject'] == 'test' for c in chunks)
 
+    def test_chunk_pages_is_order_independent(self):
+        """Test that chunk IDs don't depend on page extraction order."""
+        processor = PDFProcessor(chunk_size=100, chunk_overlap=20)
+        pages = [
+            {'text': f"Page {n} text. " * 20, 'page_number': n, 'source': 'test.pdf',
+             'total_pages': 3, 'subject': 'test'}
+            for n in (1, 2, 3)
+        ]
+
+        in_order = processor.chunk_pages(pages)
+        shuffled = processor.chunk_pages([pages[2], pages[0], pages[1]])
+
+        assert [c.chunk_id for c in in_order] == [c.chunk_id for c in shuffled]
+
+    def test_sentence_chunks_continue_across_pages(self):
+        """Test that sentence packing keeps sentences whole, also across a page break."""
+        processor = PDFProcessor(chunk_size=200, chunk_overlap=50, strategy="sentence")
+        pages = [
+            {'text': "A language is decidable if some Turing machine decides it. " * 4 + "The halting",
+             'page_number': 1, 'source': 'test.pdf', 'total_pages': 2, 'subject': 'test'},
+            {'text': "problem is undecidable. " + "Reductions transfer undecidability, e.g. to ATM. " * 4,
+             'page_number': 2, 'source': 'test.pdf', 'total_pages': 2, 'subject': 'test'}
+        ]
+
+        chunks = processor.chunk_pages(pages)
+
+        assert all(len(c.text) <= 200 for c in chunks)
+        assert all(c.text.endswith(".") for c in chunks)
+        spanning = [c for c in chunks if "The halting problem is undecidable." in c.text]
+        assert spanning and spanning[0].metadata['page_end'] == 2
+        assert len({c.chunk_id for c in chunks}) == len(chunks)
+
+    def test_section_chunks_break_at_headings(self):
+        """Test that section chunking starts a new chunk at each heading."""
+        processor = PDFProcessor(chunk_size=1000, chunk_overlap=200, strategy="section")
+        text = (
+            "1 Introduction\nThis course covers computability and complexity in some depth.\n"
+            "Definition 2.1 (Decidable). A language is decidable if some Turing machine decides it.\n"
+        )
+        page = {'text': text, 'page_number': 1, 'source': 'test.pdf', 'total_pages': 1, 'subject': 'test'}
+
+        chunks = processor.chunk_pages([page])
+
+        assert len(chunks) == 2
+        assert chunks[0].metadata['section'] == "1 Introduction"
+        assert chunks[1].text.startswith("Definition 2.1")
+
+    def test_heading_pattern_ignores_prose(self):
+        """Test that lines starting with numbers or keywords in running text are not headings."""
+        from src.chunking import HEADING
+
+        for line in ["2 is the only even prime.", "10 times faster", "3 x + 4 = 7", "Example 3 shows the idea",
+                     "example: consider", "Section 3 shows that", "Examples of regular languages"]:
+            assert not HEADING.match(line), line
+        for line in ["2.1 Finite Automata", "Chapter 3 Regular Languages", "PART II", "Theorem 3.4. Every",
+                     "Lemma 2: if", "Example 3", "DEFINITION 1 (Language)"]:
+            assert HEADING.match(line), line
+
+    def test_chunker_requires_chunk_pages(self):
+        """Test that a strategy without chunk_pages cannot be instantiated."""
+        from src.chunking import Chunker
+
+        class Incomplete(Chunker):
+            name = "incomplete"
+
+        with pytest.raises(TypeError):
+            Incomplete(100, 10)
+
+    def test_token_chunks_respect_budget(self):
+        """Test that token chunking counts tokens, not characters."""
+        from src.chunking import TokenChunker
+
+        chunker = TokenChunker(chunk_size=20, chunk_overlap=5, count_tokens=lambda text: len(text.split()))
+        page = {'text': "One two three four five six seven. " * 10, 'page_number': 1,
+                'source': 'test.pdf', 'total_pages': 1, 'subject': 'test'}
+
+        chunks = list(chunker.chunk_pages([page]))
+
+        assert len(chunks) > 1
+        assert all(len(c.text.split()) <= 20 for c in chunks)
+
+    def test_strategy_per_subject(self):
+        """Test that subjects can override the default chunking strategy."""
+        processor = PDFProcessor(strategy="sentence", subject_strategies={"math": "section"})
+
+        assert processor.chunker_for("math").name == "section"
+        assert processor.chunker_for("history").name == "sentence"
+        with pytest.raises(ValueError):
+            PDFProcessor(strategy="paragraphs").chunker_for("general")
+
 
 class TestAgent:
     """Test CourseAgent functionality."""
@@ -153,6 +755,18 @@ class TestAgent:
             # Results should only be from the specified subject
             # (we can't easily test this without checking metadata)
 
+    def test_retrieve_batch_matches_single(self, agent):
+        """Test that batch retrieval returns the same citations as one-by-one retrieval."""
+        queries = ["What is a Turing machine?", "What is propositional logic?"]
+        batch = agent.retrieve_batch(queries, n_results=3)
+
+        assert len(batch) == len(queries)
+        for query, citations in zip(queries, batch):
+            agent.retrieval_cache.clear()  # Otherwise the single lookup returns the batch's cached result
+            single = agent.retrieve_from_course(query, n_results=3)
+            assert [(c.source, c.page) for c in citations] == [(c.source, c.page) for c in single]
+            assert [c.relevance for c in citations] == pytest.approx([c.relevance for c in single], abs=1e-4)
+
     def test_should_use_web_search(self, agent):
         """Test web search decision logic."""
         # Mock some citations
@@ -174,6 +788,289 @@ class TestAgent:
         assert agent.should_use_web_search("What happened in 2025?", good_citations)
 
 
+class TestAgentCaches:
+    """Test the agent's query and answer caches."""
+
+    def test_lru_cache_evicts_oldest(self):
+        """Test LRU eviction order."""
+        from src.agent.cache import LRUCache
+
+        cache = LRUCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_answer_cache_near_duplicates(self):
+        """Test exact, near-duplicate and out-of-scope lookups."""
+        from src.agent.cache import AnswerCache
+
+        cache = AnswerCache(max_size=10, similarity=0.95, ttl=3600)
+        scope = ("all", True, 1)
+        cache.put(scope, "What is a Turing machine?", [1.0, 0.0, 0.0], "answer")
+
+        assert cache.get(scope, "what is a  turing machine?", [0.0, 1.0, 0.0]) == "answer"
+        assert cache.get(scope, "Define Turing machines", [0.99, 0.05, 0.0]) == "answer"
+        assert cache.get(scope, "What is a DFA?", [0.5, 0.5, 0.5]) is None
+        assert cache.get(("all", True, 2), "What is a Turing machine?", [1.0, 0.0, 0.0]) is None
+
+
+    def test_batch_embeds_each_question_once(self):
+        """Test that answering a batch without caches encodes every question in one call."""
+        import asyncio
+        import numpy as np
+        from concurrent.futures import ThreadPoolExecutor
+        from src.agent.cache import AnswerCache, LRUCache
+        from src.agent.core import CourseAgent
+
+        class CountingEmbedder:
+            dimension = 4
+
+            def __init__(self):
+                self.calls = []
+
+            def embed_batch_array(self, texts, show_progress=False):
+                self.calls.append(list(texts))
+                return np.ones((len(texts), self.dimension), dtype=np.float32)
+
+        class FakeStore:
+            def get_version(self):
+                return 1
+
+            def pin(self):
+                return self
+
+            def search_batch(self, embeddings, n_results, where=None, include_embeddings=False):
+                return [{} for _ in embeddings]
+
+        class FakeLLM:
+            async def ainvoke(self, prompt):
+                return "answer"
+
+        agent = CourseAgent.__new__(CourseAgent)
+        agent.embedding_gen = CountingEmbedder()
+        agent.embed_pool = ThreadPoolExecutor(1)
+        agent.query_embedding_cache = LRUCache(0)  # As with CACHE_ENABLED=false
+        agent.retrieval_cache = LRUCache(0)
+        agent.answer_cache = AnswerCache(max_size=0, similarity=0.95, ttl=3600)
+        agent.vector_store = FakeStore()
+        agent.reranker = None
+        agent._index_version = 1
+        agent._search = lambda query, embedding, n_results, subject, store, dense=None: ({}, True)
+        agent._citations_from_results = lambda results, store: []
+        agent.prepare_prompt = lambda query, citations, web_results: ("prompt", "context")
+        agent.generate_reasoning = lambda query, citations, web_results, context: []
+        agent.llm = FakeLLM()
+
+        questions = ["What is a DFA?", "What is an NFA?"]
+        responses = asyncio.run(agent.aanswer_batch(questions, use_web=False))
+
+        assert [r.answer for r in responses] == ["answer", "answer"]
+        assert agent.embedding_gen.calls == [questions]
+        agent.embed_pool.shutdown()
+
+
+class TestPromptContext:
+    """Test packing of sources into the prompt's token budget."""
+
+    @staticmethod
+    def count_words(text):
+        return len(text.split())
+
+    def test_overlapping_chunks_are_merged(self):
+        """Test that the overlap shared by neighbouring chunks appears once."""
+        from src.agent.context import build_context
+        from src.agent.core import Citation
+
+        text = " ".join(f"word{i}" for i in range(300))
+        first, second = text[:1000], text[800:]
+        citations = [
+            Citation(source="a.pdf", page=1, text=first, relevance=0.9),
+            Citation(source="a.pdf", page=1, text=second, relevance=0.8)
+        ]
+
+        context = build_context(citations, [], budget=10_000, count_tokens=self.count_words)
+
+        assert context.merged == 1
+        assert len(context.passages) == 1
+        assert context.passages[0].text == text
+
+    def test_sources_fit_budget_in_rank_order(self):
+        """Test that the budget is respected and the best-ranked sources are kept."""
+        from src.agent.context import build_context
+        from src.agent.core import Citation
+
+        citations = [
+            Citation(source=f"{name}.pdf", page=1, text=f"{name} " * 40, relevance=relevance)
+            for name, relevance in [("best", 0.9), ("good", 0.7), ("low", 0.4)]
+        ]
+        web = [{'title': "Web", 'url': "https://example.com", 'snippet': "snippet " * 40}]
+
+        context = build_context(citations, web, budget=100, count_tokens=self.count_words)
+
+        assert context.tokens <= 100
+        assert [p.source for p in context.passages] == ["best.pdf", "good.pdf"]
+        assert context.dropped == 2
+        assert "[Source 1: best.pdf, Page 1]" in context.text
+
+    def test_source_numbers_follow_citations(self):
+        """Test that [Source N] is the Nth returned citation after merging and dropping."""
+        from src.agent.context import build_context
+        from src.agent.core import Citation
+
+        shared = "the pumping lemma shows this language is not regular "
+        citations = [
+            Citation(source="a.pdf", page=1, text="intro " * 5 + shared, relevance=0.9),
+            Citation(source="a.pdf", page=1, text=shared + "so we conclude", relevance=0.8),  # Merged into 1
+            Citation(source="big.pdf", page=2, text="big " * 200, relevance=0.7),  # Over budget
+            Citation(source="c.pdf", page=4, text="closure properties", relevance=0.6),
+        ]
+        web = [{'title': "Long", 'snippet': "long " * 200}, {'title': "Short", 'snippet': "short"}]
+
+        context = build_context(citations, web, budget=60, count_tokens=self.count_words)
+
+        assert "[Source 1: a.pdf, Page 1]" in context.text
+        assert "[Source 4: c.pdf, Page 4]" in context.text
+        assert "[Source 2" not in context.text and "[Source 3" not in context.text
+        assert "[Web Source 2: Short]" in context.text
+
+    def test_oversized_best_passage_is_truncated(self):
+        """Test that the best passage is shortened rather than dropped."""
+        from src.agent.context import build_context
+        from src.agent.core import Citation
+
+        citations = [Citation(source="a.pdf", page=3, text="long " * 500, relevance=0.9)]
+
+        context = build_context(citations, [], budget=50, count_tokens=self.count_words)
+
+        assert len(context.passages) == 1
+        assert 0 < context.tokens <= 50
+
+
+class TestReranker:
+    """Test cross-encoder re-ranking."""
+
+    class FakeCrossEncoder:
+        """Scores a pair by how often the chunk mentions the query's last word."""
+
+        def __init__(self, delay=0.0):
+            self.delay = delay
+            self.pairs = 0
+
+        def predict(self, pairs, batch_size=32, show_progress_bar=False, activation_fct=None):
+            import time
+            time.sleep(self.delay)
+            self.pairs += len(pairs)
+            return [text.count(query.split()[-1]) / 10 for query, text in pairs]
+
+    @staticmethod
+    def results(texts):
+        return {
+            'ids': [f"c{i}" for i in range(len(texts))],
+            'documents': texts,
+            'metadatas': [{'source': "a.pdf", 'page_number': i + 1} for i in range(len(texts))],
+            'distances': [0.1 * i for i in range(len(texts))]
+        }
+
+    def test_reorders_and_caches_scores(self):
+        """Test that candidates are reordered by score and scores are reused."""
+        from src.agent.rerank import CrossEncoderReranker
+
+        model = self.FakeCrossEncoder()
+        reranker = CrossEncoderReranker(model=model, batch_size=2, budget_ms=10_000, cache_size=100)
+        results = self.results(["nothing", "turing once", "turing turing", "also nothing"])
+
+        reranked, complete = reranker.rerank("what is turing", results, n_results=2)
+        assert complete
+        assert reranked['ids'] == ["c2", "c1"]
+        assert model.pairs == 4
+
+        reranker.rerank("what is turing", results, n_results=2)
+        assert model.pairs == 4
+
+    def test_scores_are_probabilities(self, monkeypatch):
+        """Test that logits become probabilities and RERANK_MIN_SCORE applies to them."""
+        import math
+        from src import config
+        from src.agent.rerank import CrossEncoderReranker
+
+        monkeypatch.setattr(config, "RERANK_MIN_SCORE", 0.54)
+        reranker = CrossEncoderReranker(model=self.FakeCrossEncoder(), budget_ms=10_000, cache_size=0)
+        reranked, _ = reranker.rerank("what is turing", self.results(["turing once", "turing turing"]), n_results=2)
+
+        assert reranked['ids'] == ["c1"]  # sigmoid(0.1) = 0.525 is dropped
+        assert math.isclose(reranked['rerank_scores'][0], 1 / (1 + math.exp(-0.2)))
+
+    def test_budget_falls_back_to_retrieval_order(self):
+        """Test that running out of time keeps the original order."""
+        from src.agent.rerank import CrossEncoderReranker
+
+        reranker = CrossEncoderReranker(model=self.FakeCrossEncoder(delay=0.05), batch_size=1, budget_ms=10, cache_size=100)
+        results = self.results(["nothing", "turing once", "turing turing"])
+
+        reranked, complete = reranker.rerank("what is turing", results, n_results=2)
+
+        assert not complete
+        assert reranked['ids'] == ["c0", "c1"]
+
+
+class TestDiversification:
+    """Test maximal-marginal-relevance selection."""
+
+    def test_near_duplicates_are_skipped(self):
+        """Test that MMR prefers a new topic over a near-copy of the best chunk."""
+        import numpy as np
+        from src.agent.core import maximal_marginal_relevance
+
+        query = np.array([1.0, 0.2, 0.0])
+        candidates = np.array([
+            [1.0, 0.0, 0.0],    # best match
+            [0.98, 0.0, 0.05],  # near-duplicate of the best
+            [0.6, 0.8, 0.0],    # relevant, different
+            [0.0, 0.0, 1.0]     # unrelated
+        ])
+
+        assert maximal_marginal_relevance(query, candidates, k=2, lambda_mult=0.5) == [0, 2]
+        assert maximal_marginal_relevance(query, candidates, k=2, lambda_mult=1.0) == [0, 1]
+
+    def test_relevance_override_and_limits(self):
+        """Test custom relevance scores and k larger than the candidate set."""
+        import numpy as np
+        from src.agent.core import maximal_marginal_relevance
+
+        candidates = np.eye(3)
+        picked = maximal_marginal_relevance(np.ones(3), candidates, k=5, relevance=np.array([0.1, 0.9, 0.5]))
+
+        assert picked == [1, 2, 0]
+        assert maximal_marginal_relevance(np.ones(3), np.empty((0, 3)), k=2) == []
+
+    def test_rerank_scale_is_normalized(self):
+        """Test that large-scale scores (e.g. logits) don't drown out the redundancy penalty."""
+        import numpy as np
+        from src.agent.core import maximal_marginal_relevance
+
+        candidates = np.array([[1.0, 0.0, 0.0], [0.98, 0.0, 0.05], [0.6, 0.8, 0.0], [0.0, 0.0, 1.0]])
+        logits = np.array([9.0, 8.9, 8.4, 1.0])
+
+        assert maximal_marginal_relevance(np.ones(3), candidates, k=2, lambda_mult=0.5, relevance=logits) == [0, 2]
+
+
+class TestRankFusion:
+    """Test reciprocal rank fusion."""
+
+    def test_items_in_both_lists_rank_first(self):
+        """Test that agreement between retrievers is rewarded."""
+        from src.agent.core import reciprocal_rank_fusion
+
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d", "a"]], k=60)
+        assert fused[:2] == ["a", "c"]
+        assert set(fused) == {"a", "b", "c", "d"}
+
+
 class TestSubjectFiltering:
     """Test subject-based filtering."""
 
@@ -242,6 +1139,454 @@ class TestAPI:
             assert isinstance(data["subjects"], list)
 
 
+class TestAskLimiter:
+    """Test /api/ask admission control."""
+
+    def test_rejects_when_saturated(self):
+        """Test that the limiter admits concurrency + queue_limit requests."""
+        import asyncio
+        from src.api.main import AskLimiter
+
+        async def scenario():
+            limiter = AskLimiter(concurrency=1, queue_limit=1)
+            assert limiter.try_acquire()
+            assert limiter.try_acquire()
+            assert not limiter.try_acquire()
+
+            async with limiter:
+                assert limiter.pending == 2
+            assert limiter.pending == 1
+            assert limiter.try_acquire()
+
+        asyncio.run(scenario())
+
+
+class TestAnswerStream:
+    """Test streamed answers: agent events, SSE framing and /api/ask/stream."""
+
+    class FakeLLM:
+        def __init__(self, tokens, fail=False):
+            self.tokens = tokens
+            self.fail = fail
+
+        async def astream(self, prompt):
+            for token in self.tokens:
+                yield token
+            if self.fail:
+                raise RuntimeError("LLM went away")
+
+    @classmethod
+    def stub_agent(cls, tokens, fail=False):
+        """A CourseAgent with retrieval, prompting and the LLM replaced by stubs."""
+        from src.agent.cache import AnswerCache
+        from src.agent.core import Citation, CourseAgent
+
+        agent = CourseAgent.__new__(CourseAgent)
+        citation = Citation(source="notes.pdf", page=3, text="A Turing machine has a tape.", relevance=0.9)
+
+        async def cached_answer(query, use_web, subject):
+            return [1.0, 0.0], ("all", use_web, 1), None
+
+        async def gather_sources(query, use_web, subject):
+            return [citation], []
+
+        agent._acached_answer = cached_answer
+        agent._agather_sources = gather_sources
+        agent.prepare_prompt = lambda query, citations, web_results: ("prompt", "context")
+        agent.generate_reasoning = lambda query, citations, web_results, context: ["Found 1 passage"]
+        agent.llm = cls.FakeLLM(tokens, fail)
+        agent.answer_cache = AnswerCache(max_size=10, similarity=0.95, ttl=3600)
+        return agent
+
+    @staticmethod
+    def parse_sse(body):
+        """Split an event stream into (event name, data dict) pairs."""
+        import json
+
+        assert body.endswith("\n\n")
+        events = []
+        for message in body[:-2].split("\n\n"):
+            event_line, data_line = message.split("\n")
+            assert event_line.startswith("event: ") and data_line.startswith("data: ")
+            events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+        return events
+
+    def test_agent_streams_retrieval_tokens_done(self):
+        """Test the event order and that the joined tokens are cached as the answer."""
+        import asyncio
+
+        agent = self.stub_agent(["A Turing", " machine", " computes."])
+
+        async def collect():
+            return [event async for event in agent.astream_answer("What is a Turing machine?")]
+
+        events = asyncio.run(collect())
+        assert [e['type'] for e in events] == ["retrieval", "token", "token", "token", "done"]
+        assert events[0]['course_citations'][0]['source'] == "notes.pdf"
+        assert events[0]['reasoning_steps'] == ["Found 1 passage"]
+        assert "".join(e['text'] for e in events if e['type'] == "token") == "A Turing machine computes."
+        assert events[-1]['course_citations'] == events[0]['course_citations']
+        assert events[-1]['used_web_search'] is False
+
+        cached = agent.answer_cache.get(("all", True, 1), "What is a Turing machine?", [1.0, 0.0])
+        assert cached.answer == "A Turing machine computes."
+
+    def test_format_sse(self):
+        """Test that an event is framed as one SSE message named after its type."""
+        from src.api.main import format_sse
+
+        message = format_sse({'type': 'token', 'text': 'line one\nline two'})
+        assert message == 'event: token\ndata: {"type": "token", "text": "line one\\nline two"}\n\n'
+
+    def test_stream_endpoint(self, monkeypatch):
+        """Test that /api/ask/stream sends retrieval, tokens and done as SSE messages."""
+        try:
+            from fastapi.testclient import TestClient
+            from src.api import main
+        except Exception as e:
+            pytest.skip(f"Cannot create API client: {e}")
+
+        monkeypatch.setattr(main, "agent", self.stub_agent(["Hello", " world"]))
+        response = TestClient(main.app).post("/api/ask/stream", json={"question": "What is a Turing machine?"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = self.parse_sse(response.text)
+        assert [name for name, _ in events] == ["retrieval", "token", "token", "done"]
+        assert all(name == data['type'] for name, data in events)
+        assert [data['text'] for name, data in events if name == "token"] == ["Hello", " world"]
+
+    def test_stream_endpoint_reports_errors(self, monkeypatch):
+        """Test that a failure mid-answer ends the stream with an error event."""
+        try:
+            from fastapi.testclient import TestClient
+            from src.api import main
+        except Exception as e:
+            pytest.skip(f"Cannot create API client: {e}")
+
+        monkeypatch.setattr(main, "agent", self.stub_agent(["Hello"], fail=True))
+        response = TestClient(main.app).post("/api/ask/stream", json={"question": "What is a Turing machine?"})
+
+        events = self.parse_sse(response.text)
+        assert [name for name, _ in events] == ["retrieval", "token", "error"]
+        assert "LLM went away" in events[-1][1]['detail']
+        assert main.ask_limiter.pending == 0
+
+
+    def test_dropped_stream_releases_its_place(self, monkeypatch):
+        """Test that a stream whose client leaves before the body starts gives back its limiter place."""
+        import asyncio
+        try:
+            from src.api import main
+        except Exception as e:
+            pytest.skip(f"Cannot import API: {e}")
+
+        agent = self.stub_agent(["Hello"])
+        monkeypatch.setattr(main, "agent", agent)
+        monkeypatch.setattr(main, "ask_limiter", main.AskLimiter(concurrency=1, queue_limit=0))
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            raise OSError("Client went away")
+
+        async def scenario():
+            response = await main.ask_question_stream(main.QuestionRequest(question="What is a Turing machine?"))
+            assert main.ask_limiter.pending == 1
+            with pytest.raises(BaseException):
+                await response({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, send)
+
+        asyncio.run(scenario())
+        assert main.ask_limiter.pending == 0
+        assert main.ask_limiter.try_acquire()
+
+
+class TestIngestPipeline:
+    """Test the extract → embed → store ingestion pipeline."""
+
+    @staticmethod
+    def chunks(source, count, produced):
+        for i in range(count):
+            produced.append(i)
+            yield DocumentChunk(text=f"chunk {i}", metadata={'source': source}, chunk_id=f"{source}_page1_chunk{i}")
+
+    class FakeEmbedder:
+        def embed_batch_array(self, texts, show_progress=False):
+            import numpy as np
+            return np.zeros((len(texts), 4), dtype=np.float32)
+
+    def test_streams_documents_in_batches(self):
+        """Test that chunk generators are stored batch by batch, in order, per document."""
+        from src.ingestion import IngestPipeline
+
+        batch_size, queue_size = 3, 1
+        produced = []
+
+        class FakeStore:
+            def __init__(self):
+                self.batches = []
+                self.removed = []
+
+            def add_chunks(self, batch, embeddings):
+                # Extraction runs at most this many chunks ahead of the store: the batch being
+                # stored, one waiting in each queue, one held by the embed stage and one being
+                # put by the extractor
+                stored = sum(len(b) for b in self.batches)
+                assert len(produced) - stored <= (2 * queue_size + 3) * batch_size
+                self.batches.append([chunk.chunk_id for chunk in batch])
+
+            def remove_document(self, source, subject, chunk_ids=None, keep=()):
+                self.removed.append((source, chunk_ids))
+                assert list(keep) == [f"{source}_page1_chunk{i}" for i in range(2)]  # After the new chunks
+
+        store = FakeStore()
+        stored = {}
+        pipeline = IngestPipeline(self.FakeEmbedder(), store, batch_size=batch_size, queue_size=queue_size, autotune=False)
+        metrics = pipeline.run(
+            [
+                (Path("a.pdf"), self.chunks("a.pdf", 40, produced), []),
+                (Path("b.pdf"), self.chunks("b.pdf", 2, produced), ["b.pdf_page9_chunk0"]),
+            ],
+            on_document=lambda pdf_path, ids: stored.__setitem__(pdf_path.name, ids)
+        )
+
+        assert [len(b) for b in store.batches] == [3] * 13 + [1, 2]
+        assert len(produced) == 42
+        assert stored["a.pdf"] == [f"a.pdf_page1_chunk{i}" for i in range(40)]
+        assert store.removed == [("b.pdf", ["b.pdf_page9_chunk0"])]
+        assert metrics["store"].chunks == metrics["embed"].chunks == metrics["extract"].chunks == 42
+
+    def test_batches_by_tokens_and_tunes_on_a_sample(self, monkeypatch):
+        """Test that batches fill the encoder's token budget and autotune waits for a full sample."""
+        from src import config
+        from src.ingestion import IngestPipeline
+
+        class TuningEmbedder(self.FakeEmbedder):
+            token_budget = 100
+
+            def __init__(self):
+                self.tuning = {}
+                self.samples = []
+
+            def autotune(self, texts):
+                self.samples.append(len(texts))
+                self.tuning = {self.token_budget: 1.0}
+
+        class FakeStore:
+            def __init__(self):
+                self.batches = []
+
+            def add_chunks(self, batch, embeddings):
+                self.batches.append(len(batch))
+
+        monkeypatch.setattr(config, "EMBEDDING_AUTOTUNE_SAMPLE", 30)
+        chunks = [DocumentChunk(text="x" * 72, metadata={'source': 'a.pdf'}, chunk_id=f"a.pdf_page1_chunk{i}")
+                  for i in range(50)]  # ~20 tokens each
+        embedder, store = TuningEmbedder(), FakeStore()
+        IngestPipeline(embedder, store, batch_size=8, autotune=True).run([(Path("a.pdf"), chunks, [])])
+
+        assert store.batches == [5] * 10
+        assert embedder.samples == [30]
+
+    def test_upserting_stored_chunks_keeps_catalog_counts(self, tmp_path, monkeypatch):
+        """Test that adding chunks whose IDs are already stored does not inflate the catalog."""
+        from src import config
+
+        monkeypatch.setattr(config, "VECTORDB_DIR", tmp_path)
+        store = VectorStore()
+        chunks = [DocumentChunk(text=f"text {i}", metadata={'source': 'a.pdf', 'subject': 'general', 'page_number': i},
+                                chunk_id=f"a.pdf_page{i}_chunk0") for i in range(3)]
+        embeddings = self.FakeEmbedder().embed_batch_array(["x"] * 3) + 1
+
+        store.add_chunks(chunks, embeddings)
+        store.add_chunks(chunks[1:], embeddings[1:])
+        assert store.catalog.total_chunks() == store.collection.count() == 3
+        assert store.catalog.entries()[0]['chunk_count'] == 3
+
+    def test_live_update_replaces_document_in_place(self, tmp_path, monkeypatch):
+        """Test that an incremental update changes the live generation without copying it."""
+        from src import config
+        from src.ingestion import IngestPipeline, index_update
+
+        monkeypatch.setattr(config, "VECTORDB_DIR", tmp_path)
+        store = VectorStore()
+        old = [DocumentChunk(text=f"old {i}", metadata={'source': 'a.pdf', 'subject': 'general', 'page_number': i},
+                             chunk_id=f"a.pdf_page1_chunk{i}") for i in range(5)]
+        store.add_chunks(old, self.FakeEmbedder().embed_batch_array(["x"] * 5) + 1)
+        generation, version = store.generation, store.get_version()
+
+        manifest = IngestManifest(tmp_path / "manifest.sqlite3", tmp_path)
+        with index_update(store, manifest, staged=False) as (target, pending):
+            assert target is store
+            IngestPipeline(self.FakeEmbedder(), target, batch_size=2, autotune=False).run(
+                [(Path("pdfs/a.pdf"), self.chunks("a.pdf", 3, []), [c.chunk_id for c in old])]
+            )
+
+        assert store.generation == generation
+        assert store.get_version() > version
+        assert sorted(store.collection.get(include=[])['ids']) == [f"a.pdf_page1_chunk{i}" for i in range(3)]
+        assert store.get_source_details()[0]['chunk_count'] == 3
+        assert store.keyword_index.count() == 3
+
+    @staticmethod
+    def make_pdf(path, pages):
+        """Write a minimal PDF with one line of text per page."""
+        objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+        kids = []
+        for text in pages:
+            stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+            objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+            objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                           f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+            kids.append(f"{len(objects)} 0 R")
+        objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+        out, offsets = b"%PDF-1.4\n", []
+        for number, body in enumerate(objects, 1):
+            offsets.append(len(out))
+            out += f"{number} 0 obj\n{body}\nendobj\n".encode()
+        xref = len(out)
+        out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+        out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+        out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+        path.write_bytes(out)
+
+    def test_parallel_extraction_streams_in_order(self, tmp_path):
+        """Test that parallel extraction yields files in order with the same chunks as sequential extraction."""
+        from src.ingestion import extract_in_parallel
+
+        pdf_dir = tmp_path / "pdfs"
+        pdf_dir.mkdir()
+        paths = [pdf_dir / "long.pdf", pdf_dir / "empty.pdf", pdf_dir / "short.pdf"]
+        self.make_pdf(paths[0], [f"Long document page {i} covers topic {i}." for i in range(1, 8)])
+        paths[1].write_bytes(b"")
+        self.make_pdf(paths[2], ["A short document with a single page of text about automata."])
+        processor = PDFProcessor(chunk_size=60, chunk_overlap=10, strategy="sentence")
+
+        extracted = extract_in_parallel(paths, processor, workers=2, pages_per_shard=2)
+        results = [(pdf_path, [c.chunk_id for c in chunks]) for pdf_path, chunks in extracted]
+
+        assert [pdf_path for pdf_path, _ in results] == paths
+        assert results[0][1] == [c.chunk_id for c in processor.iter_chunks(paths[0])]
+        assert results[1][1] == []
+        assert results[2][1] == [c.chunk_id for c in processor.iter_chunks(paths[2])] != []
+
+    def test_unreadable_pdf_raises(self, tmp_path):
+        """Test that an extraction error is raised, not recorded as a complete document."""
+        broken = tmp_path / "pdfs" / "broken.pdf"
+        broken.parent.mkdir()
+        broken.write_bytes(b"%PDF-1.4 not really")
+        processor = PDFProcessor(chunk_size=100, chunk_overlap=10)
+
+        with pytest.raises(RuntimeError, match="broken.pdf"):
+            list(processor.iter_chunks(broken))
+
+    def test_stage_errors_propagate(self):
+        """Test that a failing stage stops the pipeline and re-raises."""
+        from src.ingestion import IngestPipeline
+
+        class FailingStore:
+            def add_chunks(self, batch, embeddings):
+                raise RuntimeError("disk full")
+
+        pipeline = IngestPipeline(self.FakeEmbedder(), FailingStore(), batch_size=2, queue_size=1, autotune=False)
+        with pytest.raises(RuntimeError, match="disk full"):
+            pipeline.run([(Path("a.pdf"), self.chunks("a.pdf", 50, []), [])])
+
+
+class TestIngestJobs:
+    """Test the background ingestion job queue."""
+
+    def test_job_runs_and_reports_progress(self, tmp_path):
+        """Test that a submitted job completes and is queryable by ID."""
+        import time
+        from src.ingestion import IngestJobQueue
+
+        pdf_dir = tmp_path / "pdfs"
+        pdf_dir.mkdir()
+        jobs = IngestJobQueue(None, None, pdf_dir=pdf_dir, manifest_path=tmp_path / "manifest.sqlite3", workers=1)
+
+        job = jobs.submit()
+        assert jobs.get(job.id) is job
+
+        deadline = time.time() + 10
+        while job.status in ("queued", "running") and time.time() < deadline:
+            time.sleep(0.05)
+
+        assert job.status == "completed"
+        assert job.total_files == 0
+        assert job.finished_at is not None
+        assert jobs.get("unknown") is None
+        jobs.shutdown(wait=True)
+
+    def test_job_ingests_documents(self, tmp_path, monkeypatch):
+        """Test that a job ingests PDFs through the store, then removes a deleted one on the next run."""
+        import time
+        from src import config
+        from src.ingestion import IngestJobQueue
+
+        class FakeEmbedder(TestIngestPipeline.FakeEmbedder):
+            token_budget = 8192
+            tuning = {8192: 1.0}  # Already tuned
+
+        class FakeStore:
+            def __init__(self):
+                self.chunks = {}
+                self.seen = []  # (job status, current file) at each write
+
+            def refresh(self):
+                pass
+
+            def has_source(self, source, subject=None):
+                return any(meta['source'] == source for meta in self.chunks.values())
+
+            def add_chunks(self, batch, embeddings):
+                self.seen.append((job.status, job.current_file))
+                self.chunks.update((chunk.chunk_id, chunk.metadata) for chunk in batch)
+
+            def remove_document(self, source, subject, chunk_ids=None, keep=()):
+                for chunk_id in set(chunk_ids or []) - set(keep):
+                    self.chunks.pop(chunk_id, None)
+
+        def wait(job):
+            deadline = time.time() + 30
+            while job.status in ("queued", "running") and time.time() < deadline:
+                time.sleep(0.05)
+
+        monkeypatch.setattr(config, "INGEST_STAGED", False)
+        pdf_dir = tmp_path / "pdfs" / "logic"
+        pdf_dir.mkdir(parents=True)
+        for name in ("a.pdf", "b.pdf"):
+            TestIngestPipeline.make_pdf(pdf_dir / name, [
+                f"Page {i} of {name} explains how a proof system derives theorems from axioms." for i in range(1, 4)
+            ])
+
+        store = FakeStore()
+        jobs = IngestJobQueue(store, FakeEmbedder(), pdf_dir=tmp_path / "pdfs",
+                              manifest_path=tmp_path / "manifest.sqlite3", workers=1)
+        job = jobs.submit()
+        assert job.status in ("queued", "running")
+        wait(job)
+
+        assert job.status == "completed", job.error
+        assert job.total_files == job.processed_files == 2
+        assert job.chunks_added == len(store.chunks) > 0
+        assert job.metrics["store"]["chunks"] == job.metrics["embed"]["chunks"] == job.chunks_added
+        assert job.current_file is None and job.finished_at is not None
+        assert {status for status, _ in store.seen} == {"running"}
+        assert {current for _, current in store.seen} <= {"logic/a.pdf", "logic/b.pdf"}  # Extraction runs ahead
+        assert job.message == f"Processed 2 PDF(s), {job.chunks_added} chunks, removed 0"
+
+        (pdf_dir / "a.pdf").unlink()
+        job = jobs.submit()
+        wait(job)
+
+        assert job.status == "completed", job.error
+        assert (job.total_files, job.files_removed, job.chunks_added) == (0, 1, 0)
+        assert {meta['source'] for meta in store.chunks.values()} == {"b.pdf"}
+        jobs.shutdown(wait=True)
+
+
 def test_integration_query():
     """Integration test: Full query pipeline."""
     try: